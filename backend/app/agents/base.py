@@ -1,16 +1,28 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
 from datetime import datetime
 import asyncio
 
 from app.services.kimi_client import KimiClient
+from app.services.usage_tracker import usage_scope
+from app.services.singleflight import request_key
 from app.api.websocket import manager
 from app.config import settings
 
+T = TypeVar("T")
+
 
 class BaseAgent(ABC):
     """Base class for all agents in the pipeline."""
 
+    # Pipeline wiring: execute() input key -> artifact name, and the artifact produced
+    inputs: Dict[str, str] = {}
+    output: str = ""
+
+    # Memoization: prompt templates and settings that change this agent's output
+    prompts: Tuple[str, ...] = ()
+    output_settings: Tuple[str, ...] = ()
+
     def __init__(
         self,
         project_id: str,
@@ -21,6 +33,59 @@ class BaseAgent(ABC):
         self.kimi_client = kimi_client
         self.use_large_model = use_large_model
         self.agent_name: str = "BaseAgent"
+        # Loop time by which execute() must return (set by the orchestrator), and
+        # the corners cut to meet it
+        self.deadline: Optional[float] = None
+        self.degradations: List[str] = []
+
+    @property
+    def model(self) -> str:
+        return settings.KIMI_MODEL_THINKING if self.use_large_model else settings.KIMI_MODEL_STANDARD
+
+    def prompt_version(self) -> str:
+        """Short fingerprint of this agent's prompt templates; changes whenever a prompt is edited."""
+        return request_key(*self.prompts)[:12]
+
+    def cache_key(self, input_data: Dict[str, Any]) -> str:
+        """Memoization key for a run of this agent: inputs, prompt version, model and relevant settings."""
+        return request_key(
+            self.agent_name,
+            input_data,
+            self.prompt_version(),
+            self.model,
+            {name: getattr(settings, name) for name in self.output_settings},
+        )
+
+    def time_left(self) -> Optional[float]:
+        """Seconds until the stage deadline, or None when there is no deadline."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - asyncio.get_running_loop().time())
+
+    def budget(self, share: float) -> Optional[float]:
+        """``share`` of the time left, for a step that must leave room for later steps."""
+        left = self.time_left()
+        return None if left is None else left * share
+
+    def degrade(self, note: str):
+        """Record a corner cut to meet the deadline."""
+        self.degradations.append(note)
+
+    async def within(self, awaitable: Awaitable[T], timeout: Optional[float], default: T, note: str) -> T:
+        """Await with a timeout, returning ``default`` (and recording ``note``) when it expires."""
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            self.degrade(note)
+            return default
+
+    async def fallback(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Degraded output for when the deadline passes before execute() returns.
+
+        Built from the inputs and whatever partial work execute() kept, without
+        network calls. None (the default) means the stage has no fallback and fails.
+        """
+        return None
 
     async def emit_progress(self, status: str, progress: int, message: str):
         """Emit progress update via WebSocket."""
@@ -49,43 +114,44 @@ class BaseAgent(ABC):
         if max_retries is None:
             max_retries = settings.MAX_RETRIES
 
-        last_error = None
-
-        for attempt in range(max_retries):
-            try:
-                await self.emit_progress(
-                    "running",
-                    0,
-                    f"Starting {self.agent_name}{'...' if attempt == 0 else f' (retry {attempt})'}",
-                )
-
-                result = await self.execute(input_data)
-
-                await self.emit_progress(
-                    "completed",
-                    100,
-                    f"{self.agent_name} completed successfully",
-                )
-
-                return result
-
-            except Exception as e:
-                last_error = e
-                error_msg = str(e)
+        with usage_scope(self.project_id, self.agent_name):
+            last_error = None
 
-                if attempt < max_retries - 1:
-                    wait_time = settings.RETRY_DELAY * (2 ** attempt)
+            for attempt in range(max_retries):
+                try:
                     await self.emit_progress(
                         "running",
                         0,
-                        f"{self.agent_name} error: {error_msg[:100]}. Retrying in {wait_time}s...",
+                        f"Starting {self.agent_name}{'...' if attempt == 0 else f' (retry {attempt})'}",
                     )
-                    await asyncio.sleep(wait_time)
-                else:
+
+                    result = await self.execute(input_data)
+
                     await self.emit_progress(
-                        "failed",
-                        0,
-                        f"{self.agent_name} failed after {max_retries} attempts: {error_msg[:100]}",
+                        "completed",
+                        100,
+                        f"{self.agent_name} completed successfully",
                     )
 
-        raise last_error
+                    return result
+
+                except Exception as e:
+                    last_error = e
+                    error_msg = str(e)
+
+                    if attempt < max_retries - 1:
+                        wait_time = settings.RETRY_DELAY * (2 ** attempt)
+                        await self.emit_progress(
+                            "running",
+                            0,
+                            f"{self.agent_name} error: {error_msg[:100]}. Retrying in {wait_time}s...",
+                        )
+                        await asyncio.sleep(wait_time)
+                    else:
+                        await self.emit_progress(
+                            "failed",
+                            0,
+                            f"{self.agent_name} failed after {max_retries} attempts: {error_msg[:100]}",
+                        )
+
+            raise last_error
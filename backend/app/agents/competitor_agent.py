@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from app.agents.base import BaseAgent
 from app.services.kimi_client import KimiClient
@@ -9,14 +9,23 @@ from app.utils.prompts import COMPETITOR_ANALYSIS_PROMPT, COMPETITOR_DISCOVERY_P
 class CompetitorAgent(BaseAgent):
     """Agent that discovers and analyzes competitors."""
 
+    inputs = {"brand_research": "brand_research", "competitor_urls": "competitor_urls"}
+    output = "competitor_research"
+    prompts = (COMPETITOR_DISCOVERY_PROMPT, COMPETITOR_ANALYSIS_PROMPT)
+
     def __init__(self, project_id: str, kimi_client: KimiClient, scraper: WebScraper):
         super().__init__(project_id, kimi_client, use_large_model=False)
         self.agent_name = "CompetitorAgent"
         self.scraper = scraper
+        # Progress kept for fallback(): finished analyses and URLs not yet analyzed
+        self.competitors: List[Dict[str, Any]] = []
+        self.pending_urls: Optional[List[str]] = None
 
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         brand_research = input_data["brand_research"]
         competitor_urls = input_data.get("competitor_urls", [])
+        competitors = self.competitors = []
+        self.pending_urls = None
 
         # Auto-discover competitors if none provided
         if not competitor_urls:
@@ -34,7 +43,7 @@ class CompetitorAgent(BaseAgent):
                 f"Discovered {len(competitor_urls)} competitor(s)"
             )
 
-        competitors = []
+        self.pending_urls = list(competitor_urls[:5])
         total = len(competitor_urls)
 
         for i, url in enumerate(competitor_urls[:5]):  # Limit to 5
@@ -43,32 +52,42 @@ class CompetitorAgent(BaseAgent):
 
             try:
                 page_data = await self.scraper.scrape_page(url)
-                if page_data.get("error"):
-                    continue
-
-                prompt = COMPETITOR_ANALYSIS_PROMPT.format(
-                    content=str(page_data),
-                    our_brand=str(brand_research),
-                )
+                if not page_data.get("error"):
+                    prompt = COMPETITOR_ANALYSIS_PROMPT.format(
+                        content=str(page_data),
+                        our_brand=str(brand_research),
+                    )
 
-                analysis = await self.kimi_client.chat(
-                    prompt=prompt,
-                    system_prompt="You are a competitive intelligence analyst. Return valid JSON.",
-                )
+                    analysis = await self.kimi_client.chat(
+                        prompt=prompt,
+                        system_prompt="You are a competitive intelligence analyst. Return valid JSON.",
+                    )
 
-                analysis["url"] = url
-                competitors.append(analysis)
+                    analysis["url"] = url
+                    competitors.append(analysis)
 
             except Exception as e:
                 print(f"Error analyzing competitor {url}: {e}")
-                continue
+
+            self.pending_urls.remove(url)
 
         # Summarize competitive landscape
         await self.emit_progress("running", 85, "Summarizing competitive landscape...")
 
+        return self._landscape(brand_research, competitors)
+
+    def _landscape(self, brand_research: Dict[str, Any], competitors: List[Dict[str, Any]]) -> Dict[str, Any]:
         return {
             "competitors": competitors,
             "competitive_advantages": brand_research.get("unique_selling_points", []),
             "gaps_opportunities": [],
             "total_analyzed": len(competitors),
         }
+
+    async def fallback(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The competitors analyzed before the deadline; pages not yet scraped are skipped."""
+        if self.pending_urls is None:
+            self.degrade("competitor discovery did not finish; no competitors analyzed")
+        elif self.pending_urls:
+            self.degrade(f"skipped {len(self.pending_urls)} competitor page(s) not yet analyzed")
+        return self._landscape(input_data["brand_research"], list(self.competitors))
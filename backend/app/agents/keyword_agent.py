@@ -1,20 +1,338 @@
-from typing import Any, Dict, List
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 from app.agents.base import BaseAgent
 from app.services.kimi_client import KimiClient
 from app.services.dataforseo_client import DataForSEOClient
-from app.config import MARKETS
-from app.utils.prompts import KEYWORD_CLUSTERING_PROMPT
+from app.services.keyword_clustering import KeywordClusterGroup, cluster_keywords, merge_shard_clusters
+from app.services.keyword_normalizer import KeywordVariantIndex, dedupe_keywords, signature
+from app.services.keyword_scoring import KeywordArrays, brand_terms, rank_keywords, score, top_n, weights_for_market
+from app.config import MARKETS, settings
+from app.utils.prompts import CLUSTER_NAMING_PROMPT, KEYWORD_CLUSTERING_PROMPT
+
+logger = logging.getLogger(__name__)
+
+
+class _ShardStream:
+    """Map-phase clustering calls started while keyword expansions are still streaming in.
+
+    New unique keywords (by variant signature) accumulate until a shard's worth
+    is available; the best-scoring pending keywords are then sent as one shard
+    immediately, so clustering overlaps the remaining DataForSEO fetches.
+
+    Early shards only see the keywords that have arrived so far, so they may use
+    at most half of KEYWORD_SHARD_MAX. The other calls go to the best keywords of
+    the final ranking that no early shard covered, so top keywords that arrive
+    late are still clustered.
+    """
+
+    def __init__(
+        self,
+        start_shard: Callable[[List[Dict[str, Any]]], Awaitable[Dict[str, Any]]],
+        language: str,
+        market_key: str,
+        terms: set,
+    ):
+        self.start_shard = start_shard
+        self.language = language
+        self.index = KeywordVariantIndex(language)
+        self.weights = weights_for_market(market_key)
+        self.terms = terms
+        self.pending: List[Dict[str, Any]] = []
+        self.sent: set = set()  # Signatures of keywords already sent in a shard
+        self.tasks: List[asyncio.Task] = []
+
+    @property
+    def early_max(self) -> int:
+        return settings.KEYWORD_SHARD_MAX // 2
+
+    def add(self, batch: List[Dict[str, Any]]):
+        if len(self.tasks) >= self.early_max:
+            return
+        for kw in batch:
+            sig = self.index.add(kw)
+            if sig is not None and len(self.index.groups[sig].items) == 1:
+                self.pending.append(kw)
+
+        size = settings.KEYWORD_SHARD_SIZE
+        while len(self.pending) >= size and len(self.tasks) < self.early_max:
+            scores = score(KeywordArrays(self.pending, self.terms), self.weights)
+            ranked = [self.pending[i] for i in top_n(scores, len(self.pending))]
+            shard, self.pending = ranked[:size], ranked[size:]
+            self._start(shard)
+        if len(self.tasks) >= self.early_max:
+            self.pending = []
+
+    def _start(self, shard: List[Dict[str, Any]]):
+        self.sent.update(signature(kw["keyword"], self.language) for kw in shard)
+        self.tasks.append(asyncio.ensure_future(self.start_shard(shard)))
+
+    async def finish(self, ranked: List[Dict[str, Any]]) -> List[Any]:
+        """Shard the best unsent keywords of ``ranked`` and wait for every shard (exceptions are returned)."""
+        size = settings.KEYWORD_SHARD_SIZE
+        remaining = [kw for kw in ranked if signature(kw["keyword"], self.language) not in self.sent]
+        slots = max(0, settings.KEYWORD_SHARD_MAX - len(self.tasks))
+        for i in range(0, min(len(remaining), slots * size), size):
+            self._start(remaining[i:i + size])
+        return await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def cancel(self):
+        for task in self.tasks:
+            task.cancel()
 
 
 class KeywordAgent(BaseAgent):
     """Agent that performs keyword research using DataForSEO + AI clustering."""
 
+    inputs = {
+        "brand_research": "brand_research",
+        "persona_research": "persona_research",
+        "market": "market",
+        "landing_page_urls": "landing_page_urls",
+    }
+    output = "keyword_research"
+    prompts = (KEYWORD_CLUSTERING_PROMPT, CLUSTER_NAMING_PROMPT)
+    output_settings = (
+        "KEYWORD_CLUSTERING_MODE",
+        "KEYWORD_CLUSTER_SIMILARITY",
+        "KEYWORD_CLUSTER_MAX",
+        "KEYWORD_CLUSTER_SAMPLE",
+        "KEYWORD_SCORE_WEIGHTS",
+        "KEYWORD_PROMPT_LIMIT",
+        "KEYWORD_SHARD_SIZE",
+        "KEYWORD_SHARD_MAX",
+        "KEYWORD_MERGE_SIMILARITY",
+    )
+
     def __init__(self, project_id: str, kimi_client: KimiClient, dataforseo_client: DataForSEOClient):
         super().__init__(project_id, kimi_client, use_large_model=False)
         self.agent_name = "KeywordAgent"
         self.dataforseo = dataforseo_client
+        # Best-so-far keywords and seeds, kept for fallback()
+        self.keywords: List[Dict[str, Any]] = []
+        self.seed_keywords: List[str] = []
+
+    async def _stream_expansions(
+        self,
+        expansions: List[Tuple[str, Awaitable[List[Dict[str, Any]]]]],
+        on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        timeout: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """Run keyword expansions concurrently, streaming each batch to ``on_batch`` as it lands.
+
+        Expansions are producers feeding one queue; this coroutine consumes it,
+        so downstream work starts with the first response instead of the last.
+        Results are returned concatenated in the order the expansions were
+        listed, not the order they complete, so downstream dedup is deterministic.
+        After ``timeout`` seconds, expansions still loading are dropped.
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in expansions]
+        queue: asyncio.Queue = asyncio.Queue()
+        until = None if timeout is None else asyncio.get_running_loop().time() + timeout
+
+        async def produce(index: int, label: str, call: Awaitable[List[Dict[str, Any]]]):
+            try:
+                await queue.put((index, label, await call, None))
+            except Exception as e:
+                await queue.put((index, label, None, e))
+
+        tasks = [asyncio.ensure_future(produce(i, label, call)) for i, (label, call) in enumerate(expansions)]
+        try:
+            for done in range(1, len(tasks) + 1):
+                remaining = None if until is None else max(0.0, until - asyncio.get_running_loop().time())
+                try:
+                    index, label, batch, error = await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    self.degrade(f"used {done - 1} of {len(tasks)} keyword expansions")
+                    break
+                if error is not None:
+                    raise error
+                results[index] = batch
+                if on_batch is not None:
+                    on_batch(batch)
+                progress = 10 + int((done / len(tasks)) * 55)
+                await self.emit_progress(
+                    "running", progress,
+                    f"Expanded {label} ({len(batch)} keywords, {done}/{len(tasks)})",
+                )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return [kw for batch in results for kw in batch]
+
+    async def _cluster_with_llm(
+        self,
+        keywords: List[Dict[str, Any]],
+        brand_context: str,
+        market_name: str,
+        currency: str,
+    ) -> Dict[str, Any]:
+        """Have the LLM cluster the top keywords (already ranked by opportunity) in a single call."""
+        keyword_data_str = "\n".join(
+            f"- {kw['keyword']} | Volume: {kw.get('search_volume', 'N/A')} | "
+            f"CPC: {kw.get('cpc', 'N/A')} {currency} | Competition: {kw.get('competition', 'N/A')}"
+            for kw in keywords[:settings.KEYWORD_PROMPT_LIMIT]
+        )
+
+        prompt = KEYWORD_CLUSTERING_PROMPT.format(
+            keyword_data=keyword_data_str,
+            brand_context=brand_context,
+            market=market_name,
+            currency=currency,
+        )
+
+        return await self.kimi_client.chat(
+            prompt=prompt,
+            system_prompt="You are a paid search keyword strategist. Return valid JSON.",
+        )
+
+    async def _cluster_shard(
+        self,
+        shard: List[Dict[str, Any]],
+        brand_context: str,
+        market_name: str,
+        currency: str,
+    ) -> Dict[str, Any]:
+        """Map step: cluster one shard with the LLM."""
+        result = await self._cluster_with_llm(shard, brand_context, market_name, currency)
+        await self.emit_progress("running", 70, f"Clustered a shard of {len(shard)} keywords")
+        return result
+
+    async def _reduce_shards(
+        self,
+        results: List[Any],
+        keywords: List[Dict[str, Any]],
+        language: str,
+    ) -> Dict[str, Any]:
+        """Reduce step: merge shard clusters, mapping members back to their canonical keywords."""
+        succeeded = [r for r in results if isinstance(r, dict)]
+        if not succeeded:
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                raise errors[0]
+            return {"clusters": [], "negative_keywords": [], "keyword_gaps": []}
+        for r in results:
+            if isinstance(r, BaseException):
+                logger.warning(f"Keyword clustering shard failed, continuing without it: {r}")
+
+        # Shards saw keywords as they streamed in; the LLM also echoes metrics
+        # back. Map members to the final canonical variant and its source data.
+        source = {signature(kw["keyword"], language): kw for kw in keywords}
+        shard_clusters = []
+        for result in succeeded:
+            clusters = [c for c in result.get("clusters", []) if isinstance(c, dict)]
+            for cluster in clusters:
+                for kw in cluster.get("keywords") or []:
+                    original = source.get(signature(kw.get("keyword") or "", language))
+                    if original:
+                        kw["keyword"] = original["keyword"]
+                        kw["search_volume"] = original.get("search_volume")
+                        kw["cpc"] = original.get("cpc")
+            shard_clusters.append(clusters)
+
+        merged = await asyncio.to_thread(
+            merge_shard_clusters,
+            shard_clusters,
+            settings.KEYWORD_MERGE_SIMILARITY,
+            settings.KEYWORD_MERGE_SIMILARITY,
+        )
+
+        def unique(values: List[Any]) -> List[str]:
+            seen = set()
+            out = []
+            for value in values:
+                if isinstance(value, str) and value.lower() not in seen:
+                    seen.add(value.lower())
+                    out.append(value)
+            return out
+
+        return {
+            "clusters": merged[:settings.KEYWORD_CLUSTER_MAX],
+            "negative_keywords": unique([n for r in succeeded for n in r.get("negative_keywords", [])]),
+            "keyword_gaps": unique([g for r in succeeded for g in r.get("keyword_gaps", [])]),
+        }
+
+    async def _cluster_locally(
+        self,
+        keywords: List[Dict[str, Any]],
+        brand_context: str,
+        market_name: str,
+        currency: str,
+    ) -> Dict[str, Any]:
+        """Cluster every keyword locally, then ask the LLM only to name the clusters."""
+        texts = [kw["keyword"] for kw in keywords]
+        result = await asyncio.to_thread(
+            cluster_keywords,
+            texts,
+            [kw.get("search_volume") for kw in keywords],
+            threshold=settings.KEYWORD_CLUSTER_SIMILARITY,
+            max_clusters=settings.KEYWORD_CLUSTER_MAX,
+        )
+        groups = result["clusters"]
+
+        await self.emit_progress(
+            "running", 80,
+            f"Grouped {len(texts)} keywords into {len(groups)} clusters. Naming with AI...",
+        )
+
+        cluster_samples = "\n".join(
+            f"{i} | {group.total_volume} | "
+            + ", ".join(texts[m] for m in group.members[:settings.KEYWORD_CLUSTER_SAMPLE])
+            for i, group in enumerate(groups)
+        )
+
+        named = await self.kimi_client.chat(
+            prompt=CLUSTER_NAMING_PROMPT.format(
+                cluster_samples=cluster_samples,
+                brand_context=brand_context,
+                market=market_name,
+                currency=currency,
+            ),
+            system_prompt="You are a paid search keyword strategist. Return valid JSON.",
+        )
+        names = {
+            str(c.get("id")): c
+            for c in named.get("clusters", [])
+            if isinstance(c, dict)
+        }
+
+        return {
+            "clusters": self._named_clusters(keywords, groups, names),
+            "negative_keywords": named.get("negative_keywords", []),
+            "keyword_gaps": named.get("keyword_gaps", []),
+        }
+
+    def _named_clusters(
+        self,
+        keywords: List[Dict[str, Any]],
+        groups: List[KeywordClusterGroup],
+        names: Dict[str, Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """Cluster dicts for local groups; groups the AI did not name are named after their lead keyword."""
+        texts = [kw["keyword"] for kw in keywords]
+        clusters = []
+        for i, group in enumerate(groups):
+            meta = names.get(str(i), {})
+            match_type = meta.get("recommended_match_type") or "phrase"
+            intent = meta.get("intent") or "commercial"
+            clusters.append({
+                "cluster_name": meta.get("cluster_name") or texts[group.members[0]].title(),
+                "theme": meta.get("theme") or ", ".join(group.top_terms),
+                "keywords": [
+                    {
+                        "keyword": texts[m],
+                        "search_volume": keywords[m].get("search_volume"),
+                        "cpc": keywords[m].get("cpc"),
+                        "recommended_match_type": match_type,
+                        "intent": intent,
+                    }
+                    for m in group.members
+                ],
+            })
+        return clusters
 
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         brand_research = input_data["brand_research"]
@@ -27,25 +345,13 @@ class KeywordAgent(BaseAgent):
         language = market["language"]
         currency = market["currency"]
 
-        all_keywords = []
-
-        # Step 1: Get keywords from domains
-        await self.emit_progress("running", 10, "Fetching keywords from landing page domains...")
+        # Step 1 + 2: expand landing page domains and seed keywords concurrently.
+        # DataForSEOClient caps in-flight requests at DATAFORSEO_MAX_CONCURRENCY.
+        domains = sorted(set(urlparse(url).netloc for url in landing_page_urls if url))
 
-        domains = list(set(urlparse(url).netloc for url in landing_page_urls if url))
-
-        for domain in domains[:3]:
-            await self.emit_progress("running", 15, f"Fetching keywords for {domain}...")
-            site_keywords = await self.dataforseo.get_keywords_for_site(
-                domain=domain,
-                location_code=location_code,
-                language=language,
-                limit=50,
-            )
-            all_keywords.extend(site_keywords)
-
-        # Step 2: Get related keywords from seed keywords
-        seed_keywords = brand_research.get("seed_keywords", [])
+        # Copy: brand_research is a shared artifact, and extending it in place would
+        # change the inputs (and memo keys) of every stage that reads it later
+        seed_keywords = list(brand_research.get("seed_keywords") or [])
         if not seed_keywords:
             # Fallback: use products/services as seeds
             seed_keywords = brand_research.get("products_services", [])[:5]
@@ -55,74 +361,136 @@ class KeywordAgent(BaseAgent):
         for persona in personas[:3]:
             seed_keywords.extend(persona.get("sample_search_queries", [])[:3])
 
-        await self.emit_progress("running", 35, f"Expanding {len(seed_keywords)} seed keywords...")
-
-        for i, seed in enumerate(seed_keywords[:8]):
-            progress = 35 + int((i / max(len(seed_keywords[:8]), 1)) * 30)
-            await self.emit_progress("running", progress, f"Expanding: {seed[:30]}...")
+        self.keywords, self.seed_keywords = [], list(seed_keywords)
+        # Report before creating the expansion coroutines, so a cancellation here cannot drop them unawaited
+        await self.emit_progress(
+            "running", 10,
+            f"Expanding {len(domains[:3])} domain(s) and {len(seed_keywords[:8])} seed keyword(s)...",
+        )
 
-            related = await self.dataforseo.get_related_keywords(
+        expansions = [
+            (f"site {domain}", self.dataforseo.get_keywords_for_site(
+                domain=domain,
+                location_code=location_code,
+                language=language,
+                limit=50,
+            ))
+            for domain in domains[:3]
+        ] + [
+            (f"seed {seed[:30]}", self.dataforseo.get_related_keywords(
                 seed_keyword=seed,
                 location_code=location_code,
                 language=language,
                 limit=20,
+            ))
+            for seed in seed_keywords[:8]
+        ]
+
+        terms = brand_terms(
+            brand_research.get("brand_name"),
+            brand_research.get("products_services"),
+            seed_keywords,
+        )
+        brand_context = str({
+            "brand_name": brand_research.get("brand_name"),
+            "industry": brand_research.get("industry"),
+            "products_services": brand_research.get("products_services"),
+            "value_propositions": brand_research.get("value_propositions"),
+        })
+
+        # In mapreduce mode, shards start clustering while later expansions are still loading
+        stream = None
+        if settings.KEYWORD_CLUSTERING_MODE == "mapreduce":
+            stream = _ShardStream(
+                lambda shard: self._cluster_shard(shard, brand_context, market["name"], currency),
+                language, market_key, terms,
             )
-            all_keywords.extend(related)
 
-        # Deduplicate
-        seen = set()
-        unique_keywords = []
-        for kw in all_keywords:
-            keyword_text = kw.get("keyword", "").lower().strip()
-            if keyword_text and keyword_text not in seen:
-                seen.add(keyword_text)
-                unique_keywords.append(kw)
+        try:
+            # Under a deadline, expansions get half the time so clustering can still run
+            all_keywords = await self._stream_expansions(
+                expansions, stream.add if stream else None, timeout=self.budget(0.5),
+            )
 
-        await self.emit_progress(
-            "running", 70,
-            f"Found {len(unique_keywords)} unique keywords. Clustering with AI..."
-        )
+            # Deduplicate, folding plural/possessive/word-order variants together
+            unique_keywords = dedupe_keywords(all_keywords, language)
 
-        # If no keywords from DataForSEO, use Kimi-extracted keywords
-        if not unique_keywords:
-            await self.emit_progress("running", 72, "DataForSEO returned no data. Using AI-extracted keywords...")
-            unique_keywords = [
-                {"keyword": kw, "search_volume": None, "cpc": None, "competition": None}
-                for kw in seed_keywords
-            ]
+            await self.emit_progress(
+                "running", 70,
+                f"Found {len(unique_keywords)} unique keywords. Clustering..."
+            )
 
-        # Step 3: Cluster with AI
-        keyword_data_str = "\n".join(
-            f"- {kw['keyword']} | Volume: {kw.get('search_volume', 'N/A')} | "
-            f"CPC: {kw.get('cpc', 'N/A')} {currency} | Competition: {kw.get('competition', 'N/A')}"
-            for kw in unique_keywords[:100]
-        )
+            # If no keywords from DataForSEO, use Kimi-extracted keywords
+            if not unique_keywords:
+                await self.emit_progress("running", 72, "DataForSEO returned no data. Using AI-extracted keywords...")
+                unique_keywords = [
+                    {"keyword": kw, "search_volume": None, "cpc": None, "competition": None}
+                    for kw in seed_keywords
+                ]
+                if stream:
+                    stream.add(unique_keywords)
 
-        prompt = KEYWORD_CLUSTERING_PROMPT.format(
-            keyword_data=keyword_data_str,
-            brand_context=str({
-                "brand_name": brand_research.get("brand_name"),
-                "industry": brand_research.get("industry"),
-                "products_services": brand_research.get("products_services"),
-                "value_propositions": brand_research.get("value_propositions"),
-            }),
-            market=market["name"],
-            currency=currency,
-        )
+            # Rank by opportunity so prompt budgets and raw_keywords go to the best keywords
+            unique_keywords = await asyncio.to_thread(rank_keywords, unique_keywords, market_key, terms)
+            self.keywords = unique_keywords
 
-        clusters = await self.kimi_client.chat(
-            prompt=prompt,
-            system_prompt="You are a paid search keyword strategist. Return valid JSON.",
-        )
+            # Step 3: Cluster (locally with AI naming, entirely with AI, or merge the streamed AI shards)
+            if stream:
+                clusters = await self._reduce_shards(await stream.finish(unique_keywords), unique_keywords, language)
+            elif settings.KEYWORD_CLUSTERING_MODE == "local":
+                clusters = await self._cluster_locally(unique_keywords, brand_context, market["name"], currency)
+            else:
+                clusters = await self._cluster_with_llm(unique_keywords, brand_context, market["name"], currency)
+        finally:
+            if stream:
+                stream.cancel()
 
         await self.emit_progress("running", 95, f"Organized into {len(clusters.get('clusters', []))} clusters")
 
+        return self._research(clusters, unique_keywords, market_key, currency)
+
+    def _research(
+        self,
+        clusters: Dict[str, Any],
+        keywords: List[Dict[str, Any]],
+        market_key: str,
+        currency: str,
+    ) -> Dict[str, Any]:
         return {
             "clusters": clusters.get("clusters", []),
             "negative_keywords": clusters.get("negative_keywords", []),
             "keyword_gaps": clusters.get("keyword_gaps", []),
-            "total_keywords": len(unique_keywords),
+            "total_keywords": len(keywords),
             "market": market_key,
             "currency": currency,
-            "raw_keywords": unique_keywords[:200],
+            "raw_keywords": keywords[:200],
         }
+
+    async def fallback(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Keywords ranked before the deadline (else the seeds), clustered locally without AI naming."""
+        market_key = input_data.get("market", "us")
+        market = MARKETS.get(market_key, MARKETS["us"])
+        keywords = self.keywords
+        if not keywords:
+            brand_research = input_data["brand_research"]
+            seeds = self.seed_keywords or brand_research.get("seed_keywords") or brand_research.get("products_services", [])[:5]
+            keywords = [
+                {"keyword": kw, "search_volume": None, "cpc": None, "competition": None}
+                for kw in dict.fromkeys(str(seed) for seed in seeds if seed)
+            ]
+            self.degrade("no keyword data arrived; clustered seed keywords")
+
+        groups = []
+        if keywords:
+            result = await asyncio.to_thread(
+                cluster_keywords,
+                [kw["keyword"] for kw in keywords],
+                [kw.get("search_volume") for kw in keywords],
+                threshold=settings.KEYWORD_CLUSTER_SIMILARITY,
+                max_clusters=settings.KEYWORD_CLUSTER_MAX,
+            )
+            groups = result["clusters"]
+        self.degrade("clusters named after their lead keyword instead of by AI")
+        return self._research(
+            {"clusters": self._named_clusters(keywords, groups, {})}, keywords, market_key, market["currency"],
+        )
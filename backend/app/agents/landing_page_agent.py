@@ -1,4 +1,6 @@
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
 
 from app.agents.base import BaseAgent
 from app.services.kimi_client import KimiClient
@@ -9,6 +11,11 @@ from app.utils.prompts import LANDING_PAGE_ANALYSIS_PROMPT
 class LandingPageAgent(BaseAgent):
     """Agent that crawls and analyzes multiple landing page URLs."""
 
+    inputs = {"landing_page_urls": "landing_page_urls"}
+    output = "brand_research"
+    prompts = (LANDING_PAGE_ANALYSIS_PROMPT,)
+    output_settings = ("MAX_PAGES_TO_CRAWL",)
+
     def __init__(self, project_id: str, kimi_client: KimiClient, scraper: WebScraper):
         super().__init__(project_id, kimi_client, use_large_model=False)
         self.agent_name = "LandingPageAgent"
@@ -19,13 +26,24 @@ class LandingPageAgent(BaseAgent):
 
         await self.emit_progress("running", 10, f"Crawling {len(urls)} landing page(s)...")
 
+        # Under a deadline, crawling gets half the time so the analysis can still run
+        crawl_budget = self.budget(0.5)
+        crawl_until = None if crawl_budget is None else asyncio.get_running_loop().time() + crawl_budget
+
         all_content = []
         for i, url in enumerate(urls):
             progress = 10 + int((i / len(urls)) * 40)
             await self.emit_progress("running", progress, f"Crawling {url}...")
 
-            content = await self.scraper.crawl_site(url, max_pages=5)
-            all_content.append(f"=== URL: {url} ===\n{content}")
+            remaining = None if crawl_until is None else crawl_until - asyncio.get_running_loop().time()
+            if remaining is not None and remaining <= 0:
+                self.degrade(f"skipped crawling {url}")
+                continue
+            content = await self.within(
+                self.scraper.crawl_site(url, max_pages=5), remaining, None, f"crawl of {url} timed out",
+            )
+            if content is not None:
+                all_content.append(f"=== URL: {url} ===\n{content}")
 
         combined_content = "\n\n".join(all_content)
 
@@ -42,3 +60,23 @@ class LandingPageAgent(BaseAgent):
         await self.emit_progress("running", 95, "Brand analysis complete")
 
         return result
+
+    async def fallback(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Minimal brand profile named after the first landing page's domain."""
+        urls = input_data.get("landing_page_urls") or []
+        domain = urlparse(urls[0]).netloc if urls else ""
+        name = domain.removeprefix("www.").split(".")[0].replace("-", " ").title() or "Unknown"
+        return {
+            "brand_name": name,
+            "brand_voice": "professional",
+            "value_propositions": [],
+            "products_services": [],
+            "target_audience": "",
+            "key_messages": [],
+            "unique_selling_points": [],
+            "call_to_actions": ["Learn More", "Get Started"],
+            "industry": "",
+            "pricing_model": "",
+            "geographic_focus": "",
+            "seed_keywords": [name.lower()] if name != "Unknown" else [],
+        }
@@ -1,4 +1,4 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from app.agents.base import BaseAgent
 from app.services.kimi_client import KimiClient
@@ -9,6 +9,10 @@ from app.utils.prompts import PERSONA_RESEARCH_PROMPT
 class PersonaAgent(BaseAgent):
     """Agent that creates audience personas from multi-source research."""
 
+    inputs = {"brand_research": "brand_research", "market": "market_name"}
+    output = "persona_research"
+    prompts = (PERSONA_RESEARCH_PROMPT,)
+
     def __init__(self, project_id: str, kimi_client: KimiClient, multi_scraper: MultiSourceScraper):
         super().__init__(project_id, kimi_client, use_large_model=False)
         self.agent_name = "PersonaAgent"
@@ -37,10 +41,16 @@ class PersonaAgent(BaseAgent):
         async def progress_cb(source: str, pct: int):
             await self.emit_progress("running", 15 + int(pct * 0.4), f"Researching on {source}...")
 
-        research_results = await self.multi_scraper.search_all_sources(
-            queries=queries,
-            max_results_per_query=8,
-            progress_callback=progress_cb,
+        # Under a deadline, research gets half the time so persona building can still run
+        research_results = await self.within(
+            self.multi_scraper.search_all_sources(
+                queries=queries,
+                max_results_per_query=8,
+                progress_callback=progress_cb,
+            ),
+            self.budget(0.5),
+            {},
+            "skipped forum research",
         )
 
         research_text = self.multi_scraper.format_results_for_analysis(research_results)
@@ -71,3 +81,24 @@ class PersonaAgent(BaseAgent):
         await self.emit_progress("running", 95, f"Created {persona_count} personas")
 
         return result
+
+    async def fallback(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """One persona drawn from the brand's own description of its audience."""
+        brand_research = input_data["brand_research"]
+        audience = brand_research.get("target_audience", "")
+        seeds = brand_research.get("seed_keywords") or brand_research.get("products_services") or []
+        return {
+            "personas": [{
+                "name": "Core Customer",
+                "age_range": "",
+                "occupation": "",
+                "description": audience,
+                "goals": [],
+                "frustrations": [],
+                "search_behavior": [],
+                "purchase_triggers": [],
+                "preferred_messaging": brand_research.get("brand_voice", ""),
+                "sample_search_queries": list(seeds[:5]),
+            }],
+            "research_sources": {},
+        }
@@ -1,8 +1,10 @@
 import asyncio
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from app.agents.base import BaseAgent
 from app.services.kimi_client import KimiClient
+from app.services.singleflight import request_key
+from app.services.usage_tracker import usage_scope
 from app.models.rsa import Headline, Description, AdGroupRSA, KeywordWithMatch
 from app.utils.prompts import RSA_GENERATION_PROMPT
 
@@ -10,9 +12,23 @@ from app.utils.prompts import RSA_GENERATION_PROMPT
 class RSAAgent(BaseAgent):
     """Agent that generates RSA ad copy for each ad group."""
 
+    inputs = {
+        "strategy": "strategy",
+        "synthesis": "synthesis",
+        "brand_research": "brand_research",
+        "market": "market",
+        "currency": "currency",
+    }
+    output = "rsas"
+    prompts = (RSA_GENERATION_PROMPT,)
+
     def __init__(self, project_id: str, kimi_client: KimiClient):
         super().__init__(project_id, kimi_client, use_large_model=True)
         self.agent_name = "RSAAgent"
+        self.finished: Dict[int, AdGroupRSA] = {}  # Ad group index -> RSA, kept for fallback()
+        # RSAs started from streamed ad groups before the strategy was final, by speculation key
+        self.speculative: Dict[str, asyncio.Task] = {}
+        self.reconciliation = {"speculated": 0, "reused": 0, "regenerated": 0, "discarded": 0}
 
     INCOMPLETE_ENDINGS = {
         'the', 'a', 'an', 'in', 'for', 'and', 'of', 'to', 'with', 'by',
@@ -66,21 +82,111 @@ class RSAAgent(BaseAgent):
             f"Generating RSAs for {total} ad groups in parallel...",
         )
 
-        tasks = [
-            self._generate_rsa_for_ad_group(
-                ad_group=ad_group,
-                synthesis=synthesis,
-                brand_research=brand_research,
-                currency=currency,
-            )
-            for ad_group in ad_groups
-        ]
-        all_rsas = await asyncio.gather(*tasks)
+        self.finished = {}
+
+        async def generate(index: int, ad_group: Dict) -> AdGroupRSA:
+            # Reconcile with speculation: an RSA started for this exact ad group and context is reused
+            rsa = await self._speculated(self._speculation_key(ad_group, synthesis, brand_research, currency))
+            if rsa is not None:
+                self.reconciliation["reused"] += 1
+            else:
+                if self.reconciliation["speculated"]:
+                    self.reconciliation["regenerated"] += 1
+                rsa = await self._generate_rsa_for_ad_group(
+                    ad_group=ad_group,
+                    synthesis=synthesis,
+                    brand_research=brand_research,
+                    currency=currency,
+                )
+            self.finished[index] = rsa
+            return rsa
+
+        try:
+            all_rsas = await asyncio.gather(*(generate(i, ad_group) for i, ad_group in enumerate(ad_groups)))
+        finally:
+            # Speculative RSAs for ad groups the final strategy changed or dropped
+            self.discard_speculation()
 
         await self.emit_progress("running", 95, "Finalizing RSA generation...")
 
         return {"ad_group_rsas": [rsa.model_dump() for rsa in all_rsas]}
 
+    def speculate(self, ad_group: Dict, synthesis: Dict, brand_research: Dict, currency: str):
+        """Start generating an RSA for a streamed ad group before the strategy is final."""
+        key = self._speculation_key(ad_group, synthesis, brand_research, currency)
+        if key in self.speculative:
+            return
+
+        async def generate() -> AdGroupRSA:
+            with usage_scope(self.project_id, self.agent_name):
+                return await self._generate_rsa_for_ad_group(
+                    ad_group=ad_group,
+                    synthesis=synthesis,
+                    brand_research=brand_research,
+                    currency=currency,
+                )
+
+        self.speculative[key] = asyncio.ensure_future(generate())
+        self.reconciliation["speculated"] += 1
+
+    def discard_speculation(self):
+        """Cancel speculative RSAs that were never claimed."""
+        for task in self.speculative.values():
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # Retrieve, so a failed speculation is not logged as unhandled
+            self.reconciliation["discarded"] += 1
+        self.speculative = {}
+
+    def _speculation_key(self, ad_group: Dict, synthesis: Dict, brand_research: Dict, currency: str) -> str:
+        return request_key(ad_group, synthesis, brand_research, currency)
+
+    async def _speculated(self, key: str) -> Optional[AdGroupRSA]:
+        """The speculative RSA for ``key``, or None if there was none or it failed."""
+        task = self.speculative.pop(key, None)
+        if task is None:
+            return None
+        await asyncio.wait([task])
+        if task.cancelled() or task.exception() is not None:
+            return None
+        return task.result()
+
+    async def fallback(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """RSAs finished before the deadline; the other ad groups get keyword-based template copy."""
+        ad_groups = input_data["strategy"].get("ad_groups", [])
+        synthesis = input_data["synthesis"]
+        brand_research = input_data["brand_research"]
+        currency = input_data.get("currency", "USD")
+
+        rsas = []
+        templated = 0
+        for i, ad_group in enumerate(ad_groups):
+            rsa = self.finished.get(i)
+            if rsa is None:
+                task = self.speculative.get(self._speculation_key(ad_group, synthesis, brand_research, currency))
+                if task is not None and task.done() and not task.cancelled() and task.exception() is None:
+                    rsa = task.result()
+            if rsa is None:
+                headlines = [text.title() for text in self._keyword_texts(ad_group)[:12]]
+                rsa = self._build_rsa(ad_group, {"headlines": headlines}, brand_research, currency)
+                templated += 1
+            rsas.append(rsa)
+        self.discard_speculation()
+
+        if templated:
+            self.degrade(f"{templated} of {len(ad_groups)} ad group(s) got template copy")
+        return {"ad_group_rsas": [rsa.model_dump() for rsa in rsas]}
+
+    def _keyword_texts(self, ad_group: Dict) -> List[str]:
+        keyword_texts = []
+        for kw in ad_group.get("keywords", [])[:15]:
+            if isinstance(kw, dict):
+                keyword_texts.append(kw.get("keyword", kw.get("text", str(kw))))
+            else:
+                keyword_texts.append(str(kw))
+        return keyword_texts
+
     async def _generate_rsa_for_ad_group(
         self,
         ad_group: Dict,
@@ -88,13 +194,7 @@ class RSAAgent(BaseAgent):
         brand_research: Dict,
         currency: str,
     ) -> AdGroupRSA:
-        keywords = ad_group.get("keywords", [])
-        keyword_texts = []
-        for kw in keywords[:15]:
-            if isinstance(kw, dict):
-                keyword_texts.append(kw.get("keyword", kw.get("text", str(kw))))
-            else:
-                keyword_texts.append(str(kw))
+        keyword_texts = self._keyword_texts(ad_group)
 
         messaging = synthesis.get("messaging_framework", {})
 
@@ -123,6 +223,12 @@ class RSAAgent(BaseAgent):
             system_prompt="You are an expert Google Ads copywriter. Always respond with valid JSON. Never truncate words.",
         )
 
+        return self._build_rsa(ad_group, response, brand_research, currency)
+
+    def _build_rsa(self, ad_group: Dict, response: Dict, brand_research: Dict, currency: str) -> AdGroupRSA:
+        """Fit the response's copy to RSA limits, padding with fallback copy."""
+        keywords = ad_group.get("keywords", [])
+
         # Parse headlines
         headlines = []
         for h in response.get("headlines", [])[:15]:
@@ -1,17 +1,34 @@
-from typing import Any, Dict
+import logging
+from typing import Any, Callable, Dict, Optional
 
 from app.agents.base import BaseAgent
 from app.services.kimi_client import KimiClient
-from app.config import MARKETS
+from app.services.json_stream import JsonArrayStream
+from app.services.keyword_clustering import cluster_digest
+from app.config import MARKETS, settings
 from app.utils.prompts import STRATEGY_PROMPT
 
+logger = logging.getLogger(__name__)
+
 
 class StrategyAgent(BaseAgent):
     """Agent that creates the paid search strategy with ad group recommendations."""
 
+    inputs = {
+        "synthesis": "synthesis",
+        "keyword_research": "keyword_research",
+        "persona_research": "persona_research",
+        "market": "market",
+    }
+    output = "strategy"
+    prompts = (STRATEGY_PROMPT,)
+    output_settings = ("KEYWORD_PROMPT_CLUSTER_KEYWORDS",)
+
     def __init__(self, project_id: str, kimi_client: KimiClient):
         super().__init__(project_id, kimi_client, use_large_model=True)
         self.agent_name = "StrategyAgent"
+        # Called with each ad group as it streams out of the model, before the strategy is complete
+        self.on_ad_group: Optional[Callable[[Dict[str, Any]], None]] = None
 
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         synthesis = input_data["synthesis"]
@@ -25,7 +42,9 @@ class StrategyAgent(BaseAgent):
 
         prompt = STRATEGY_PROMPT.format(
             synthesis=str(synthesis)[:5000],
-            keyword_clusters=str(keyword_research.get("clusters", []))[:5000],
+            keyword_clusters=cluster_digest(
+                keyword_research.get("clusters", []), settings.KEYWORD_PROMPT_CLUSTER_KEYWORDS,
+            )[:16000],
             personas=str(persona_research.get("personas", []))[:3000],
             market=market["name"],
             currency=market["currency"],
@@ -33,13 +52,78 @@ class StrategyAgent(BaseAgent):
 
         await self.emit_progress("running", 50, "Creating ad group structure...")
 
-        result = await self.kimi_client.chat(
-            prompt=prompt,
-            system_prompt="You are an expert paid search strategist. Return valid JSON.",
-            use_large_model=True,
-        )
+        system_prompt = "You are an expert paid search strategist. Return valid JSON."
+        if self.on_ad_group is not None:
+            result = await self._stream_strategy(prompt, system_prompt)
+        else:
+            result = await self.kimi_client.chat(
+                prompt=prompt,
+                system_prompt=system_prompt,
+                use_large_model=True,
+            )
 
         ad_group_count = len(result.get("ad_groups", []))
         await self.emit_progress("running", 95, f"Strategy complete: {ad_group_count} ad groups")
 
         return result
+
+    async def _stream_strategy(self, prompt: str, system_prompt: str) -> Dict[str, Any]:
+        """Stream the strategy, handing each ad group to ``on_ad_group`` as soon as it is complete."""
+        ad_groups = JsonArrayStream("ad_groups")
+
+        def on_text(text: str):
+            for ad_group in ad_groups.feed(text):
+                if isinstance(ad_group, dict):
+                    self.on_ad_group(ad_group)
+
+        try:
+            return await self.kimi_client.chat_stream(
+                prompt=prompt,
+                on_text=on_text,
+                system_prompt=system_prompt,
+                use_large_model=True,
+            )
+        except Exception as e:
+            logger.warning(f"Streaming strategy failed ({e}); retrying without streaming")
+            return await self.kimi_client.chat(
+                prompt=prompt,
+                system_prompt=system_prompt,
+                use_large_model=True,
+            )
+
+    async def fallback(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """One ad group per top keyword cluster (by volume), without AI."""
+        keyword_research = input_data["keyword_research"]
+        personas = input_data["persona_research"].get("personas", [])
+        messaging = input_data["synthesis"].get("messaging_framework", {})
+
+        def volume(cluster: Dict[str, Any]) -> int:
+            return sum(kw.get("search_volume") or 0 for kw in cluster.get("keywords", []))
+
+        clusters = sorted(keyword_research.get("clusters", []), key=volume, reverse=True)[:8]
+        ad_groups = []
+        for cluster in clusters:
+            keywords = [kw for kw in cluster.get("keywords", []) if kw.get("keyword")][:20]
+            cpcs = [kw["cpc"] for kw in keywords if kw.get("cpc")]
+            ad_groups.append({
+                "name": cluster.get("cluster_name", ""),
+                "theme": cluster.get("theme", ""),
+                "keywords": [kw["keyword"] for kw in keywords],
+                "match_types": {kw["keyword"]: kw.get("recommended_match_type", "phrase") for kw in keywords},
+                "target_persona": personas[0].get("name", "") if personas else "",
+                "messaging_angle": messaging.get("primary_message", ""),
+                "priority": "medium",
+                "suggested_bid": round(sum(cpcs) / len(cpcs), 2) if cpcs else 1.0,
+            })
+
+        return {
+            "campaign_name": f"SEM Campaign - {MARKETS.get(input_data.get('market', 'us'), MARKETS['us'])['name']}",
+            "objective": "",
+            "budget_recommendation": "",
+            "bidding_strategy": "Maximize Conversions",
+            "ad_groups": ad_groups,
+            "negative_keywords": keyword_research.get("negative_keywords", []),
+            "targeting_notes": "",
+            "optimization_tips": [],
+            "kpis": [],
+        }
@@ -1,6 +1,8 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from app.agents.base import BaseAgent
+from app.config import settings
+from app.services.keyword_clustering import cluster_digest
 from app.services.kimi_client import KimiClient
 from app.utils.prompts import SYNTHESIS_PROMPT
 
@@ -8,6 +10,17 @@ from app.utils.prompts import SYNTHESIS_PROMPT
 class SynthesisAgent(BaseAgent):
     """Agent that synthesizes all research into a comprehensive summary."""
 
+    inputs = {
+        "brand_research": "brand_research",
+        "competitor_research": "competitor_research",
+        "persona_research": "persona_research",
+        "keyword_research": "keyword_research",
+        "market": "market_name",
+    }
+    output = "synthesis"
+    prompts = (SYNTHESIS_PROMPT,)
+    output_settings = ("KEYWORD_SYNTHESIS_CLUSTER_KEYWORDS",)
+
     def __init__(self, project_id: str, kimi_client: KimiClient):
         super().__init__(project_id, kimi_client, use_large_model=True)
         self.agent_name = "SynthesisAgent"
@@ -26,7 +39,7 @@ class SynthesisAgent(BaseAgent):
             brand=str(brand_research)[:3000],
             competitors=str(competitor_research)[:3000],
             personas=str(persona_research)[:4000],
-            keywords=str(keyword_research)[:4000],
+            keywords=self._keyword_summary(keyword_research)[:6000],
             market=market,
         )
 
@@ -42,3 +55,49 @@ class SynthesisAgent(BaseAgent):
         await self.emit_progress("running", 95, f"Synthesis complete: {insights_count} key insights")
 
         return result
+
+    @staticmethod
+    def _keyword_summary(keyword_research: Dict[str, Any]) -> str:
+        """Gaps, negatives and one line per cluster; raw keyword lists are left out."""
+        clusters = keyword_research.get("clusters", [])
+        return (
+            f"Keyword gaps: {keyword_research.get('keyword_gaps', [])}\n"
+            f"Negative keywords: {keyword_research.get('negative_keywords', [])}\n"
+            f"{keyword_research.get('total_keywords', 0)} keywords in {len(clusters)} clusters:\n"
+            f"{cluster_digest(clusters, settings.KEYWORD_SYNTHESIS_CLUSTER_KEYWORDS)}"
+        )
+
+    async def fallback(self, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Synthesis assembled directly from the research, without AI."""
+        brand = input_data["brand_research"]
+        personas = input_data["persona_research"].get("personas", [])
+        clusters = input_data["keyword_research"].get("clusters", [])
+        value_props = list(brand.get("value_propositions") or [])
+        usps = list(brand.get("unique_selling_points") or [])
+        return {
+            "executive_summary": (
+                f"{brand.get('brand_name', 'The brand')} campaign for {input_data.get('market', 'United States')}, "
+                f"assembled from brand, persona and keyword research without AI synthesis."
+            ),
+            "key_insights": (list(brand.get("key_messages") or []) + usps)[:10],
+            "competitive_positioning": "; ".join(usps),
+            "messaging_framework": {
+                "primary_message": value_props[0] if value_props else "",
+                "supporting_messages": value_props[1:5],
+                "proof_points": usps,
+                "tone_guidelines": brand.get("brand_voice", ""),
+            },
+            "audience_priority": [
+                {
+                    "persona": p.get("name", ""),
+                    "priority": "medium",
+                    "recommended_approach": p.get("preferred_messaging", ""),
+                }
+                for p in personas
+            ],
+            "keyword_strategy": {
+                "focus_themes": [c.get("cluster_name", "") for c in clusters[:5]],
+                "budget_allocation": "",
+                "match_type_strategy": "",
+            },
+        }
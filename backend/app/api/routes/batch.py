@@ -0,0 +1,203 @@
+import asyncio
+import io
+import json
+import uuid
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.models import BatchCreate
+from app.api.routes.exports import add_project_outputs
+from app.api.routes.pipeline import enqueue_pipeline, sync_run
+from app.api.routes.projects import check_markets, new_project
+from app.services import job_queue as jobs
+from app.services.job_queue import Job, job_queue
+from app.services.project_store import project_store
+
+router = APIRouter()
+
+EXPORT_FORMATS = ("excel", "zip", "pdf")
+
+
+def _line(event: Dict[str, Any]) -> bytes:
+    return (json.dumps(event, default=str) + "\n").encode()
+
+
+async def _get_batch(batch_id: str) -> Dict[str, Any]:
+    batch = await project_store.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+
+async def _batch_jobs(batch: Dict[str, Any]) -> Dict[str, Job]:
+    return await job_queue.get_many([entry["job_id"] for entry in batch["projects"]])
+
+
+async def _manifest(batch: Dict[str, Any]) -> Dict[str, Any]:
+    """Each project's final state and export links, plus the bulk download."""
+    found = await _batch_jobs(batch)
+    counts: Dict[str, int] = {}
+    projects = []
+    for entry in batch["projects"]:
+        job = found.get(entry["job_id"])
+        status = job.status if job else "unknown"
+        counts[status] = counts.get(status, 0) + 1
+        item = {**entry, "status": status, "error": job.error if job and status == jobs.FAILED else None}
+        if job is not None and not job.active:
+            await sync_run(job)
+        if status in (jobs.COMPLETED, jobs.CANCELLED):
+            item["exports"] = {fmt: f"/api/exports/{entry['project_id']}/{fmt}" for fmt in EXPORT_FORMATS}
+        projects.append(item)
+
+    return {
+        "batch_id": batch["id"],
+        "created_at": batch["created_at"],
+        "done": all(job is not None and not job.active for job in found.values()),
+        "counts": counts,
+        "projects": projects,
+        "download": f"/api/batch/{batch['id']}/zip",
+    }
+
+
+async def _events(batch: Dict[str, Any]) -> AsyncIterator[bytes]:
+    """NDJSON progress for every project in the batch, ending with the manifest.
+
+    Lines carry an ``event`` of "batch" (first line), "project" (job status
+    changes), "agent" (agent progress), "heartbeat" (keep-alive) or
+    "manifest" (last line).
+    """
+    loop = asyncio.get_running_loop()
+    names = {entry["job_id"]: entry["name"] for entry in batch["projects"]}
+    yield _line({"event": "batch", "batch_id": batch["id"], "projects": batch["projects"]})
+
+    job_states: Dict[str, str] = {}
+    agent_states: Dict[Tuple[str, str], Tuple] = {}
+    last_sent = loop.time()
+    while True:
+        found = await _batch_jobs(batch)
+        progress = await project_store.agent_progress(list(found))
+        lines: List[bytes] = []
+        for job in found.values():
+            if job_states.get(job.id) != job.status:
+                job_states[job.id] = job.status
+                if not job.active:
+                    await sync_run(job)
+                lines.append(_line({
+                    "event": "project",
+                    "project_id": job.project_id,
+                    "name": names[job.id],
+                    "status": job.status,
+                    "attempts": job.attempts,
+                    "error": job.error if job.status == jobs.FAILED else None,
+                }))
+            for agent in progress.get(job.id, []):
+                key = (job.id, agent.agent)
+                state = (agent.status, agent.progress, agent.message)
+                if agent_states.get(key) != state:
+                    agent_states[key] = state
+                    lines.append(_line({
+                        "event": "agent",
+                        "project_id": job.project_id,
+                        "agent": agent.agent,
+                        "status": agent.status.value,
+                        "progress": agent.progress,
+                        "message": agent.message,
+                    }))
+
+        for line in lines:
+            yield line
+        if lines:
+            last_sent = loop.time()
+        elif loop.time() - last_sent >= settings.BATCH_KEEPALIVE:
+            yield _line({"event": "heartbeat", "at": datetime.utcnow()})
+            last_sent = loop.time()
+
+        if len(found) == len(batch["projects"]) and not any(job.active for job in found.values()):
+            break
+        await asyncio.sleep(settings.BATCH_POLL_INTERVAL)
+
+    yield _line({"event": "manifest", **await _manifest(batch)})
+
+
+@router.post("/")
+async def create_batch(batch: BatchCreate, stream: bool = True):
+    """Create, configure and queue many projects in one request.
+
+    Runs are scheduled by the job queue under its global limits (JOB_MAX_RUNNING,
+    worker concurrency). Streams NDJSON progress for all projects, one line per
+    event, ending with the batch manifest; ``stream=false`` returns the batch and
+    project ids right away.
+    """
+    if len(batch.projects) > settings.BATCH_MAX_PROJECTS:
+        raise HTTPException(
+            status_code=400, detail=f"A batch holds at most {settings.BATCH_MAX_PROJECTS} projects",
+        )
+    # Validate everything before creating anything
+    for item in batch.projects:
+        check_markets(item.config)
+
+    batch_id = str(uuid.uuid4())[:8]
+    entries = []
+    for item in batch.projects:
+        project = await new_project(item.name, item.config)
+        job = await enqueue_pipeline(project["id"], project["config"], force=item.force)
+        entries.append({"project_id": project["id"], "name": item.name, "job_id": job.id})
+
+    created_at = await project_store.create_batch(batch_id, entries)
+
+    if not stream:
+        return {"batch_id": batch_id, "projects": entries}
+    batch_data = {"id": batch_id, "created_at": created_at, "projects": entries}
+    return StreamingResponse(_events(batch_data), media_type="application/x-ndjson")
+
+
+@router.get("/{batch_id}")
+async def get_batch(batch_id: str) -> Dict[str, Any]:
+    """Current manifest of a batch."""
+    return await _manifest(await _get_batch(batch_id))
+
+
+@router.get("/{batch_id}/events")
+async def stream_batch(batch_id: str) -> StreamingResponse:
+    """Reattach to a batch's NDJSON progress stream (replays current state first)."""
+    return StreamingResponse(_events(await _get_batch(batch_id)), media_type="application/x-ndjson")
+
+
+@router.get("/{batch_id}/zip")
+async def export_batch_zip(batch_id: str) -> StreamingResponse:
+    """Download the outputs of every finished project in the batch, one folder per project."""
+    batch = await _get_batch(batch_id)
+    found = await _batch_jobs(batch)
+
+    folders = []
+    for entry in batch["projects"]:
+        job = found.get(entry["job_id"])
+        if job is None or job.status not in (jobs.COMPLETED, jobs.CANCELLED):
+            continue
+        safe_name = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in entry["name"])
+        folders.append((Path(job.payload["project_folder"]), f"{safe_name}_{entry['project_id']}/"))
+
+    def build() -> io.BytesIO:
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for project_path, prefix in folders:
+                if project_path.exists():
+                    add_project_outputs(zf, project_path, prefix)
+        buf.seek(0)
+        return buf
+
+    buf = await asyncio.to_thread(build)
+    if buf.getbuffer().nbytes <= 22:  # Empty zip is ~22 bytes
+        raise HTTPException(status_code=404, detail="No finished projects with outputs in this batch yet.")
+
+    return StreamingResponse(
+        buf,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="batch_{batch_id}_export.zip"'},
+    )
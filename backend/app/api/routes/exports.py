@@ -1,31 +1,29 @@
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse, StreamingResponse
 from pathlib import Path
+from typing import Any, Dict, Tuple
 import io
 import zipfile
 
-from app.api.routes.projects import projects_db
+from app.api.routes.projects import get_project_or_404
 from app.config import MARKETS
 
 router = APIRouter()
 
 
-def _get_project_folder(project_id: str) -> Path:
-    if project_id not in projects_db:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    project = projects_db[project_id]
+async def _get_project_folder(project_id: str) -> Tuple[Dict[str, Any], Path]:
+    project = await get_project_or_404(project_id)
     folder = project.get("project_folder")
     if not folder:
         raise HTTPException(status_code=404, detail="Pipeline has not been run yet")
 
-    return Path(folder)
+    return project, Path(folder)
 
 
 @router.get("/{project_id}/excel")
 async def export_excel(project_id: str) -> FileResponse:
     """Download Media Plan Excel workbook."""
-    project_path = _get_project_folder(project_id)
+    _, project_path = await _get_project_folder(project_id)
 
     xlsx_files = list(project_path.glob("media_plan_*.xlsx"))
     if not xlsx_files:
@@ -40,28 +38,50 @@ async def export_excel(project_id: str) -> FileResponse:
     )
 
 
+def _add_outputs(zf: zipfile.ZipFile, folder_path: Path, prefix: str):
+    # Add .md files from research/ and ads/ subfolders
+    for subfolder in ("research", "ads"):
+        folder = folder_path / subfolder
+        if folder.exists():
+            for md_file in sorted(folder.glob("*.md")):
+                zf.write(md_file, f"{prefix}{subfolder}/{md_file.name}")
+
+    # Add .xlsx media plan
+    xlsx_files = list(folder_path.glob("media_plan_*.xlsx"))
+    if xlsx_files:
+        xlsx_file = max(xlsx_files, key=lambda f: f.stat().st_mtime)
+        zf.write(xlsx_file, f"{prefix}{xlsx_file.name}")
+
+    # Add negative keyword conflicts, if any were found
+    conflict_files = list(folder_path.glob("negative_conflicts_*.csv"))
+    if conflict_files:
+        conflict_file = max(conflict_files, key=lambda f: f.stat().st_mtime)
+        zf.write(conflict_file, f"{prefix}{conflict_file.name}")
+
+
+def add_project_outputs(zf: zipfile.ZipFile, project_path: Path, prefix: str = ""):
+    _add_outputs(zf, project_path, prefix)
+    # Multi-market runs keep each market's research, ads and exports in markets/<market>/
+    markets_path = project_path / "markets"
+    if markets_path.exists():
+        for market_path in sorted(p for p in markets_path.iterdir() if p.is_dir()):
+            _add_outputs(zf, market_path, f"{prefix}markets/{market_path.name}/")
+
+
 @router.get("/{project_id}/zip")
 async def export_zip(project_id: str):
-    """Download all outputs as a single zip: .md files + .xlsx media plan."""
-    project_path = _get_project_folder(project_id)
+    """Download all outputs as a single zip: .md files + .xlsx media plan (+ negative conflicts CSV).
+
+    Multi-market runs add each market's outputs under markets/<market>/.
+    """
+    project, project_path = await _get_project_folder(project_id)
 
-    project_name = projects_db[project_id].get("name", "sem_export")
+    project_name = project.get("name", "sem_export")
     safe_name = "".join(c if c.isalnum() or c in ("-", "_") else "_" for c in project_name)
 
     buf = io.BytesIO()
     with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        # Add .md files from research/ and ads/ subfolders
-        for subfolder in ("research", "ads"):
-            folder = project_path / subfolder
-            if folder.exists():
-                for md_file in sorted(folder.glob("*.md")):
-                    zf.write(md_file, f"{subfolder}/{md_file.name}")
-
-        # Add .xlsx media plan
-        xlsx_files = list(project_path.glob("media_plan_*.xlsx"))
-        if xlsx_files:
-            xlsx_file = max(xlsx_files, key=lambda f: f.stat().st_mtime)
-            zf.write(xlsx_file, xlsx_file.name)
+        add_project_outputs(zf, project_path)
 
     buf.seek(0)
 
@@ -78,7 +98,7 @@ async def export_zip(project_id: str):
 @router.get("/{project_id}/pdf")
 async def export_pdf(project_id: str) -> FileResponse:
     """Download SEM Analysis Report as PDF."""
-    project_path = _get_project_folder(project_id)
+    project, project_path = await _get_project_folder(project_id)
 
     # Check for existing PDF on disk
     pdf_files = list(project_path.glob("sem_report_*.pdf"))
@@ -91,17 +111,17 @@ async def export_pdf(project_id: str) -> FileResponse:
         )
 
     # Generate on-demand from pipeline outputs
-    from app.api.routes.pipeline import pipeline_status_db
+    from app.api.routes.pipeline import load_pipeline_status
 
-    if project_id not in pipeline_status_db:
+    status = await load_pipeline_status(project_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Pipeline not found. Run the pipeline first.")
 
-    outputs = pipeline_status_db[project_id].outputs
+    outputs = status.outputs
     if not outputs:
         raise HTTPException(status_code=404, detail="No pipeline results. Run the pipeline first.")
 
-    project = projects_db[project_id]
-    config = project.get("config", {})
+    config = project.get("config") or {}
     market = config.get("market", "us")
     market_config = MARKETS.get(market, MARKETS["us"])
     currency = market_config["currency"]
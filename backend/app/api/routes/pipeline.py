@@ -1,119 +1,121 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException
+from typing import Dict, Any, Optional
 from datetime import datetime
 import tempfile
+from pathlib import Path
 import os
 
-from app.models import AgentStatus, PipelineStatus, ProjectStatus, AgentProgress
-from app.api.routes.projects import projects_db
-from app.services.pipeline_orchestrator import PipelineOrchestrator
+from app.models import AgentStatus, PipelineStatus
+from app.api.routes.projects import get_project_or_404
+from app.services import job_queue as jobs
+from app.services.job_queue import Job, job_queue
+from app.services.project_store import project_store
 
 router = APIRouter()
 
-pipeline_status_db: Dict[str, PipelineStatus] = {}
-pipeline_instances: Dict[str, PipelineOrchestrator] = {}
+JOB_AGENT_STATUS = {
+    jobs.QUEUED: AgentStatus.PENDING,
+    jobs.RUNNING: AgentStatus.RUNNING,
+    jobs.COMPLETED: AgentStatus.COMPLETED,
+    jobs.FAILED: AgentStatus.FAILED,
+    jobs.CANCELLED: AgentStatus.CANCELLED,
+}
 
 
-def update_agent_status(project_id: str, progress: AgentProgress):
-    if project_id in pipeline_status_db:
-        agents = pipeline_status_db[project_id].agents
-        existing = None
-        for i, agent in enumerate(agents):
-            if agent.agent == progress.agent:
-                existing = i
-                break
-        if existing is not None:
-            agents[existing] = progress
-        else:
-            agents.append(progress)
-
-
-async def run_pipeline_task(project_id: str, config: Dict[str, Any]):
-    """Background task to run the pipeline."""
-    def status_callback(progress: AgentProgress):
-        update_agent_status(project_id, progress)
-
+def project_folder_for(project_id: str, config: Dict[str, Any]) -> str:
     # Use user-specified folder or fall back to temp
     user_folder = config.get("project_folder")
     if user_folder:
-        project_folder = os.path.join(user_folder, project_id)
-    else:
-        project_folder = os.path.join(tempfile.gettempdir(), "sem-manager", project_id)
-    os.makedirs(project_folder, exist_ok=True)
-
-    orchestrator = PipelineOrchestrator(project_id, project_folder, status_callback)
-    pipeline_instances[project_id] = orchestrator
-
-    try:
-        pipeline_status_db[project_id].status = AgentStatus.RUNNING
-        pipeline_status_db[project_id].started_at = datetime.utcnow()
-        projects_db[project_id]["status"] = ProjectStatus.RUNNING
-
-        results = await orchestrator.run(
-            landing_page_urls=config["landing_page_urls"],
-            market=config["market"],
-            competitor_urls=config.get("competitor_urls", []),
+        return os.path.join(user_folder, project_id)
+    return os.path.join(tempfile.gettempdir(), "sem-manager", project_id)
+
+
+async def sync_run(job: Job):
+    """Close the run of a job that ended in the queue without its worker recording it.
+
+    Workers record their own runs; this covers jobs cancelled while still queued
+    and jobs failed after their last lease expired.
+    """
+    if not job.active:
+        await project_store.finish_run(
+            job.id,
+            JOB_AGENT_STATUS[job.status].value,
+            error=job.error if job.status == jobs.FAILED else None,
+            project_folder=job.payload["project_folder"],
         )
 
-        pipeline_status_db[project_id].status = AgentStatus.COMPLETED
-        pipeline_status_db[project_id].completed_at = datetime.utcnow()
-        pipeline_status_db[project_id].outputs = results
-        projects_db[project_id]["status"] = ProjectStatus.COMPLETED
-        projects_db[project_id]["project_folder"] = project_folder
 
-    except Exception as e:
-        pipeline_status_db[project_id].status = AgentStatus.FAILED
-        pipeline_status_db[project_id].completed_at = datetime.utcnow()
-        projects_db[project_id]["status"] = ProjectStatus.FAILED
+async def load_pipeline_status(project_id: str, with_outputs: bool = True) -> Optional[PipelineStatus]:
+    """The project's latest run, with agent progress and (optionally) its outputs."""
+    job = await job_queue.latest(project_id)
+    if job is not None:
+        await sync_run(job)
+    return await project_store.pipeline_status(project_id, with_outputs)
 
-    finally:
-        if project_id in pipeline_instances:
-            del pipeline_instances[project_id]
 
+async def enqueue_pipeline(project_id: str, config: Dict[str, Any], resume: bool = False, force: bool = False) -> Job:
+    """Queue a pipeline run for a configured project; workers pick it up."""
+    job = await job_queue.enqueue(project_id, {
+        "config": config,
+        "project_folder": project_folder_for(project_id, config),
+        "resume": resume,
+        "force": force,
+    })
+    await project_store.create_run(job.id, project_id, datetime.utcfromtimestamp(job.created_at))
+    return job
 
-@router.post("/{project_id}/start")
-async def start_pipeline(project_id: str, background_tasks: BackgroundTasks) -> Dict[str, str]:
-    """Start the agent pipeline for a project."""
-    if project_id not in projects_db:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    project = projects_db[project_id]
 
-    if project["status"] == ProjectStatus.RUNNING:
+async def _check_startable(project_id: str) -> Dict[str, Any]:
+    project = await get_project_or_404(project_id)
+    latest = await job_queue.latest(project_id)
+    if latest is not None and latest.active:
         raise HTTPException(status_code=400, detail="Pipeline already running")
 
     if not project["config"]:
         raise HTTPException(status_code=400, detail="Project not configured")
+    return project
+
+
+@router.post("/{project_id}/start")
+async def start_pipeline(project_id: str, force: bool = False) -> Dict[str, str]:
+    """Queue the agent pipeline for a project.
+
+    Stages whose inputs are unchanged since the last run are reused; ``force`` recomputes everything.
+    """
+    project = await _check_startable(project_id)
+    job = await enqueue_pipeline(project_id, project["config"], force=force)
+    return {"message": "Pipeline started", "project_id": project_id, "job_id": job.id}
+
 
-    pipeline_status_db[project_id] = PipelineStatus(
-        project_id=project_id,
-        status=AgentStatus.PENDING,
-        agents=[],
-    )
+@router.post("/{project_id}/resume")
+async def resume_pipeline(project_id: str) -> Dict[str, str]:
+    """Resume a failed or cancelled pipeline from its first incomplete stage."""
+    project = await _check_startable(project_id)
 
-    background_tasks.add_task(
-        run_pipeline_task,
-        project_id,
-        project["config"],
-    )
+    project_folder = project_folder_for(project_id, project["config"])
+    if not any(Path(project_folder, "checkpoints").glob("*.json")):
+        raise HTTPException(status_code=400, detail="No checkpoints to resume from. Start the pipeline instead.")
 
-    return {"message": "Pipeline started", "project_id": project_id}
+    job = await enqueue_pipeline(project_id, project["config"], resume=True)
+    return {"message": "Pipeline resumed", "project_id": project_id, "job_id": job.id}
 
 
 @router.get("/{project_id}/status")
 async def get_pipeline_status(project_id: str) -> PipelineStatus:
     """Get current pipeline execution status."""
-    if project_id not in pipeline_status_db:
+    status = await load_pipeline_status(project_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Pipeline not found")
 
-    return pipeline_status_db[project_id]
+    return status
 
 
 @router.post("/{project_id}/cancel")
 async def cancel_pipeline(project_id: str) -> Dict[str, str]:
-    """Cancel a running pipeline."""
-    if project_id not in pipeline_instances:
+    """Cancel a queued or running pipeline, aborting in-flight agent calls. Finished stage outputs are kept."""
+    job = await job_queue.latest(project_id)
+    if job is None or not job.active:
         raise HTTPException(status_code=404, detail="No running pipeline found")
 
-    pipeline_instances[project_id].cancel()
+    await job_queue.request_cancel(job.id)
     return {"message": "Pipeline cancellation requested"}
@@ -1,15 +1,27 @@
 from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 import uuid
 
 from app.models import ProjectCreate, ProjectConfig, ProjectResponse, ProjectStatus
 from app.config import MARKETS
+from app.services.project_store import project_store
 
 router = APIRouter()
 
-# In-memory project storage
-projects_db: Dict[str, Dict[str, Any]] = {}
+
+def project_response(project: Dict[str, Any]) -> ProjectResponse:
+    data = project.copy()
+    if data["config"]:
+        data["config"] = ProjectConfig(**data["config"])
+    return ProjectResponse(**data)
+
+
+async def get_project_or_404(project_id: str) -> Dict[str, Any]:
+    project = await project_store.get_project(project_id)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
 
 
 # --- Static routes MUST come before /{project_id} ---
@@ -17,13 +29,7 @@ projects_db: Dict[str, Dict[str, Any]] = {}
 @router.get("/")
 async def list_projects() -> list:
     """List all projects."""
-    result = []
-    for p in projects_db.values():
-        data = p.copy()
-        if data["config"]:
-            data["config"] = ProjectConfig(**data["config"])
-        result.append(ProjectResponse(**data))
-    return result
+    return [project_response(p) for p in await project_store.list_projects()]
 
 
 @router.get("/markets/list")
@@ -63,37 +69,43 @@ async def browse_folder() -> Dict[str, str]:
 
 # --- Dynamic routes ---
 
-@router.post("/", response_model=ProjectResponse)
-async def create_project(project: ProjectCreate) -> ProjectResponse:
-    """Create a new SEM project."""
+async def new_project(name: str, config: Optional[ProjectConfig] = None) -> Dict[str, Any]:
+    """Create and store a project, configured if ``config`` is given."""
     project_id = str(uuid.uuid4())[:8]
     now = datetime.utcnow()
 
     project_data = {
         "id": project_id,
-        "name": project.name,
-        "status": ProjectStatus.CREATED,
-        "config": None,
+        "name": name,
+        "status": ProjectStatus.CONFIGURED if config else ProjectStatus.CREATED,
+        "config": config.model_dump() if config else None,
         "created_at": now,
         "updated_at": now,
     }
 
-    projects_db[project_id] = project_data
-    return ProjectResponse(**project_data)
+    await project_store.create_project(project_data)
+    return project_data
+
+
+def check_markets(config: ProjectConfig):
+    for market in [config.market, *config.markets]:
+        if market not in MARKETS:
+            raise HTTPException(status_code=400, detail=f"Invalid market: {market}")
+
+
+@router.post("/", response_model=ProjectResponse)
+async def create_project(project: ProjectCreate) -> ProjectResponse:
+    """Create a new SEM project."""
+    return project_response(await new_project(project.name))
 
 
 @router.post("/{project_id}/config")
 async def set_project_config(project_id: str, config: ProjectConfig) -> Dict[str, str]:
     """Set project configuration (URLs + market)."""
-    if project_id not in projects_db:
-        raise HTTPException(status_code=404, detail="Project not found")
+    await get_project_or_404(project_id)
+    check_markets(config)
 
-    if config.market not in MARKETS:
-        raise HTTPException(status_code=400, detail=f"Invalid market: {config.market}")
-
-    projects_db[project_id]["config"] = config.model_dump()
-    projects_db[project_id]["status"] = ProjectStatus.CONFIGURED
-    projects_db[project_id]["updated_at"] = datetime.utcnow()
+    await project_store.update_project(project_id, config=config.model_dump(), status=ProjectStatus.CONFIGURED)
 
     return {"message": "Project configured", "project_id": project_id}
 
@@ -101,11 +113,4 @@ async def set_project_config(project_id: str, config: ProjectConfig) -> Dict[str
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(project_id: str) -> ProjectResponse:
     """Get project details."""
-    if project_id not in projects_db:
-        raise HTTPException(status_code=404, detail="Project not found")
-
-    project_data = projects_db[project_id].copy()
-    if project_data["config"]:
-        project_data["config"] = ProjectConfig(**project_data["config"])
-
-    return ProjectResponse(**project_data)
+    return project_response(await get_project_or_404(project_id))
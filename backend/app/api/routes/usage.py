@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException
+from pathlib import Path
+from typing import Dict, Any
+import json
+
+import aiofiles
+
+from app.services.usage_tracker import usage_tracker
+from app.services.job_queue import job_queue
+from app.services.project_store import project_store
+from app.services.singleflight import singleflight_stats
+from app.services.semantic_cache import semantic_cache
+from app.services.dataforseo_client import batching_stats
+from app.services.dataforseo_queue import dataforseo_task_queue
+from app.services.client_registry import client_registry
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_process_usage() -> Dict[str, Any]:
+    """Kimi and DataForSEO usage for this process since startup."""
+    summary = usage_tracker.process_summary()
+    summary["coalescing"] = singleflight_stats()
+    summary["semantic_cache"] = dict(semantic_cache.stats)
+    summary["dataforseo_batching"] = batching_stats()
+    summary["dataforseo_queue"] = {
+        **dataforseo_task_queue.stats,
+        "in_flight": len(dataforseo_task_queue.pending),
+    }
+    summary["http_pools"] = client_registry.stats()
+    return summary
+
+
+@router.get("/semantic-cache/audit")
+async def get_semantic_cache_audit(limit: int = 100) -> Dict[str, Any]:
+    """Most recent semantic cache reuse decisions."""
+    return {
+        "stats": semantic_cache.stats,
+        "decisions": await semantic_cache.audit_trail(limit),
+    }
+
+
+@router.get("/{project_id}")
+async def get_project_usage(project_id: str) -> Dict[str, Any]:
+    """Usage for a project's latest run, broken down by agent and service.
+
+    Live totals while the run is in progress in this process; otherwise the
+    summary the run saved to research/usage.json, whichever process ran it.
+    """
+    if project_id in usage_tracker.runs:
+        return usage_tracker.summarize(project_id)
+
+    project = await project_store.get_project(project_id)
+    folder = project.get("project_folder") if project else None
+    if not folder:
+        job = await job_queue.latest(project_id)
+        folder = job.payload.get("project_folder") if job else None
+
+    usage_path = Path(folder, "research", "usage.json") if folder else None
+    if usage_path is None or not usage_path.exists():
+        raise HTTPException(status_code=404, detail="No usage recorded for this project")
+
+    async with aiofiles.open(usage_path, "r", encoding="utf-8") as f:
+        return json.loads(await f.read())
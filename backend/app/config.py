@@ -92,10 +92,29 @@ class Settings(BaseSettings):
     KIMI_API_BASE: str = "https://api.moonshot.ai/v1"
     KIMI_MODEL_STANDARD: str = "kimi-k2-turbo-preview"
     KIMI_MODEL_THINKING: str = "kimi-k2.5"
+    # USD per million tokens, used for usage cost estimates
+    KIMI_PRICE_INPUT_PER_M: float = 0.60
+    KIMI_PRICE_CACHED_INPUT_PER_M: float = 0.15
+    KIMI_PRICE_OUTPUT_PER_M: float = 2.50
 
     # DataForSEO API
     DATAFORSEO_LOGIN: str = ""
     DATAFORSEO_PASSWORD: str = ""
+    DATAFORSEO_API_BASE: str = "https://api.dataforseo.com"
+    DATAFORSEO_MAX_CONCURRENCY: int = 5  # Max in-flight DataForSEO requests per process
+    DATAFORSEO_BATCH_WINDOW_MS: int = 50  # Gather tasks this long into one POST (0 = no batching)
+    DATAFORSEO_BATCH_MAX_TASKS: int = 100  # Send early once this many tasks are pending
+    KEYWORD_METRICS_DB: str = "cache/keyword_metrics.db"
+    KEYWORD_METRICS_TTL_DAYS: float = 30.0
+
+    # DataForSEO standard (task_post/tasks_ready) mode. Only Google Ads search volume supports it;
+    # the Labs endpoints a pipeline run calls are live-only, so runs are unaffected.
+    DATAFORSEO_QUEUE_MODE: bool = False
+    DATAFORSEO_QUEUE_DB: str = "cache/dataforseo_queue.db"
+    DATAFORSEO_QUEUE_POLL_MIN: float = 5.0  # Seconds between polls while results are arriving
+    DATAFORSEO_QUEUE_POLL_MAX: float = 60.0  # Back-off ceiling while nothing is ready
+    DATAFORSEO_QUEUE_RESULT_TTL_HOURS: float = 24.0  # Reuse stored results for identical tasks
+    DATAFORSEO_QUEUE_TIMEOUT_HOURS: float = 6.0
 
     # Application Settings
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
@@ -103,11 +122,92 @@ class Settings(BaseSettings):
     MAX_RETRIES: int = 3
     RETRY_DELAY: float = 1.0
     SCRAPING_TIMEOUT: int = 30
+    SINGLEFLIGHT_ENABLED: bool = True  # Coalesce identical in-flight Kimi/DataForSEO calls
+
+    # Shared HTTP pools (kimi, dataforseo, web, sources) reused across pipeline runs.
+    # HTTP_POOL_LIMITS overrides per pool, e.g. {"web": {"max_connections": 50, "max_keepalive": 10}}
+    HTTP_POOL_LIMITS: Dict[str, Dict[str, float]] = {}
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP2_ENABLED: bool = True  # Takes effect when the optional h2 package is installed
+    HTTP_WARMUP: bool = True  # Open Kimi/DataForSEO connections at startup
+
+    # Semantic (near-duplicate) LLM response reuse, keyed by agent name -> min similarity,
+    # e.g. SEMANTIC_CACHE_AGENTS='{"CompetitorAgent": 0.9, "PersonaAgent": 0.85}'
+    SEMANTIC_CACHE_AGENTS: Dict[str, float] = {}
+    SEMANTIC_CACHE_DIR: str = "cache/semantic"
+    SEMANTIC_CACHE_TTL_HOURS: float = 168.0
+    SEMANTIC_CACHE_NUM_PERM: int = 64
+    SEMANTIC_CACHE_BANDS: int = 16
+    SEMANTIC_CACHE_SHINGLE_SIZE: int = 3
 
     # Pipeline Settings
     MAX_PAGES_TO_CRAWL: int = 10
     MAX_COMPETITORS: int = 10
     MAX_AD_GROUPS: int = 20
+    # Reuse a stage's checkpoint when its inputs, prompt version, model and settings are unchanged
+    PIPELINE_MEMOIZE: bool = True
+    # Time budgets in seconds (0 = none). Stage deadlines are keyed by agent name or "default",
+    # e.g. {"CompetitorAgent": 90, "default": 240}. A stage past its deadline uses its agent's
+    # degraded fallback output; no stage runs past the run deadline.
+    PIPELINE_RUN_DEADLINE: float = 0
+    PIPELINE_STAGE_DEADLINES: Dict[str, float] = {}
+    # Stream StrategyAgent and start each ad group's RSA as soon as that ad group arrives
+    RSA_SPECULATIVE: bool = True
+
+    # Pipeline job queue. The API enqueues runs; workers (python -m app.worker, or the one
+    # embedded in the API process) claim them under a lease kept alive by heartbeats.
+    JOB_QUEUE_BACKEND: str = "sqlite"  # Or "package.module:ClassName" implementing JobBackend
+    JOB_QUEUE_DB: str = "cache/jobs.db"
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_DELAY: float = 30.0  # Seconds before the first retry, doubled per failed attempt
+    JOB_LEASE_SECONDS: float = 60.0  # A job whose worker stops heartbeating is reclaimed after this
+    JOB_HEARTBEAT_INTERVAL: float = 10.0
+    JOB_PROGRESS_INTERVAL: float = 1.0  # Min seconds between agent progress writes
+    JOB_POLL_INTERVAL: float = 2.0  # Idle workers check for new jobs this often
+    JOB_MAX_RUNNING: int = 0  # Running jobs across all workers (0 = unlimited); one per project always
+    WORKER_PROCESSES: int = 2
+    WORKER_CONCURRENCY: int = 4  # Pipelines per worker process
+    WORKER_EMBEDDED: bool = True  # Run a worker inside the API process; disable when running app.worker
+
+    # Projects, runs, agent progress and artifacts, shared by every API and worker process
+    PROJECT_DB: str = "cache/projects.db"
+
+    # Batch launches (/api/batch)
+    BATCH_MAX_PROJECTS: int = 200
+    BATCH_POLL_INTERVAL: float = 1.0  # Seconds between job status reads while streaming progress
+    BATCH_KEEPALIVE: float = 15.0  # Send a heartbeat line after this long without events
+
+    # Keyword clustering: "local" (NumPy clustering + AI naming), "llm" (AI clusters the top-scored
+    # keywords) or "mapreduce" (AI clusters shards in parallel, results merged locally)
+    KEYWORD_CLUSTERING_MODE: str = "local"
+    KEYWORD_CLUSTER_SIMILARITY: float = 0.45  # Cosine similarity to join a cluster
+    KEYWORD_CLUSTER_MAX: int = 30
+    KEYWORD_CLUSTER_SAMPLE: int = 8  # Keywords per cluster shown to the AI for naming
+
+    # Keyword opportunity scoring weights, keyed by market ("default" applies to all),
+    # e.g. {"my": {"cpc": 0.3, "volume": 0.25}}. Unset fields keep their defaults.
+    KEYWORD_SCORE_WEIGHTS: Dict[str, Dict[str, float]] = {}
+    KEYWORD_PROMPT_LIMIT: int = 100  # Top-scored keywords sent to the AI in "llm" clustering mode
+    # Top keywords (by volume) per cluster shown to StrategyAgent and SynthesisAgent
+    KEYWORD_PROMPT_CLUSTER_KEYWORDS: int = 10
+    KEYWORD_SYNTHESIS_CLUSTER_KEYWORDS: int = 3
+
+    # "mapreduce" clustering: top-scored keywords split into shards clustered by parallel AI calls
+    KEYWORD_SHARD_SIZE: int = 100
+    KEYWORD_SHARD_MAX: int = 10
+    KEYWORD_MERGE_SIMILARITY: float = 0.6  # Name (Jaccard) or member (cosine) similarity to merge shard clusters
+
+    # Record/replay benchmarking ("" = live, "record" or "replay")
+    HTTP_CASSETTE_MODE: str = ""
+    HTTP_CASSETTE_DIR: str = "cassettes"
+    SCRAPER_STANDIN_URL: str = ""  # Route scraper traffic through a replay stand-in
+    REPLAY_LATENCY: str = "recorded"  # recorded | none | fixed:s | uniform:lo,hi | lognormal:mu,sigma
+    REPLAY_LATENCY_SCALE: float = 1.0
+    REPLAY_ERROR_RATE: float = 0.0
+    REPLAY_RATE_LIMIT: float = 0.0  # Requests per second, 0 = unlimited
+    REPLAY_BURST: int = 10
+    REPLAY_SEED: int = 0
+    REPLAY_STRICT: bool = False
 
     class Config:
         env_file = ".env"
@@ -1,13 +1,41 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.api.routes import projects, pipeline, exports
+from app.api.routes import projects, pipeline, exports, usage, batch
 from app.api.websocket import router as ws_router
+from app.services.dataforseo_client import auth_headers
+from app.services.dataforseo_queue import dataforseo_task_queue
+from app.services.client_registry import client_registry
+from app.services.pipeline_worker import PipelineWorker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await client_registry.start()
+    # Pick up DataForSEO tasks that were still queued when the process stopped
+    if settings.DATAFORSEO_LOGIN and settings.DATAFORSEO_PASSWORD:
+        await dataforseo_task_queue.resume(auth_headers())
+    # Without separate app.worker processes, the API process runs queued pipelines itself
+    worker = PipelineWorker() if settings.WORKER_EMBEDDED else None
+    worker_task = asyncio.ensure_future(worker.run()) if worker else None
+    try:
+        yield
+    finally:
+        if worker is not None:
+            worker.stop()
+            await worker_task
+        await dataforseo_task_queue.close()
+        await client_registry.close()
+
 
 app = FastAPI(
     title="SEM Manager API",
     description="Multi-Agent SEM Manager with AI-Powered Keyword Research & RSA Generation",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 cors_origins = list(settings.CORS_ORIGINS)
@@ -25,6 +53,8 @@ app.add_middleware(
 app.include_router(projects.router, prefix="/api/projects", tags=["projects"])
 app.include_router(pipeline.router, prefix="/api/pipeline", tags=["pipeline"])
 app.include_router(exports.router, prefix="/api/exports", tags=["exports"])
+app.include_router(usage.router, prefix="/api/usage", tags=["usage"])
+app.include_router(batch.router, prefix="/api/batch", tags=["batch"])
 app.include_router(ws_router, prefix="/ws", tags=["websocket"])
 
 
@@ -1,4 +1,4 @@
-from app.models.project import ProjectCreate, ProjectConfig, ProjectResponse, ProjectStatus
+from app.models.project import BatchCreate, BatchProject, ProjectCreate, ProjectConfig, ProjectResponse, ProjectStatus
 from app.models.pipeline import AgentProgress, AgentStatus, PipelineStatus
 from app.models.research import BrandResearch, CompetitorAnalysis, CompetitorResearch
 from app.models.keywords import KeywordData, KeywordCluster
@@ -10,6 +10,7 @@ class ProjectStatus(str, Enum):
     RUNNING = "running"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class ProjectCreate(BaseModel):
@@ -22,6 +23,9 @@ class ProjectConfig(BaseModel):
     market: str  # Market key from MARKETS dict (e.g., "sg", "us")
     competitor_urls: List[str] = Field(default_factory=list)
     project_folder: str = ""  # User-chosen output folder (optional on cloud)
+    # Further markets for a multi-market run: brand and competitor research are shared,
+    # keyword research through RSAs runs once per market
+    markets: List[str] = Field(default_factory=list)
 
 
 class ProjectResponse(BaseModel):
@@ -31,3 +35,13 @@ class ProjectResponse(BaseModel):
     config: Optional[ProjectConfig] = None
     created_at: datetime
     updated_at: datetime
+
+
+class BatchProject(BaseModel):
+    name: str
+    config: ProjectConfig
+    force: bool = False  # Recompute every stage instead of reusing unchanged ones
+
+
+class BatchCreate(BaseModel):
+    projects: List[BatchProject] = Field(min_length=1)
@@ -0,0 +1,198 @@
+"""
+Application-scoped HTTP connection pools.
+
+Each upstream (Kimi, DataForSEO, crawled websites, research sources) gets one
+pooled httpx.AsyncClient for the life of the process, so concurrent and
+consecutive pipeline runs share keep-alive connections instead of paying TCP
+and TLS handshakes on every run. Orchestrators borrow clients from the
+registry and never close them; the FastAPI lifespan starts the registry
+(warming the fixed-host pools) and closes it on shutdown.
+
+HTTP/2 is negotiated when the optional ``h2`` package is installed
+(``pip install httpx[http2]``); otherwise pools speak HTTP/1.1. Every pool
+is metered: requests, errors, in-flight peak, time to response headers,
+status classes, negotiated HTTP versions and open connections.
+"""
+
+import importlib.util
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+
+from app.config import settings
+from app.services import dataforseo_client, multi_source_scraper, scraper
+from app.services.http_cassette import get_transport
+
+logger = logging.getLogger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True)
+class PoolSpec:
+    cassette: str  # http_cassette service name
+    options: Callable[[], Dict[str, Any]]  # httpx.AsyncClient kwargs
+    max_connections: int
+    max_keepalive: int
+    warmup_url: Callable[[], str] = lambda: ""
+
+
+POOLS: Dict[str, PoolSpec] = {
+    "kimi": PoolSpec("kimi", dict, 50, 20, lambda: settings.KIMI_API_BASE),
+    "dataforseo": PoolSpec(
+        "dataforseo", dataforseo_client.client_options,
+        max(2 * settings.DATAFORSEO_MAX_CONCURRENCY, 10), max(settings.DATAFORSEO_MAX_CONCURRENCY, 5),
+        lambda: settings.DATAFORSEO_API_BASE if settings.DATAFORSEO_LOGIN else "",
+    ),
+    "web": PoolSpec("web", lambda: dict(scraper.CLIENT_OPTIONS), 100, 20),
+    "sources": PoolSpec("web", lambda: dict(multi_source_scraper.CLIENT_OPTIONS), 100, 20),
+}
+
+
+@dataclass
+class PoolMetrics:
+    requests: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    header_seconds: float = 0.0
+    statuses: Dict[str, int] = field(default_factory=dict)
+    http_versions: Dict[str, int] = field(default_factory=dict)
+
+    def snapshot(self) -> Dict[str, Any]:
+        completed = self.requests - self.errors - self.in_flight
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "avg_header_seconds": round(self.header_seconds / completed, 4) if completed > 0 else None,
+            "statuses": dict(self.statuses),
+            "http_versions": dict(self.http_versions),
+        }
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport, recording each request in a pool's metrics."""
+
+    def __init__(self, wrapped: httpx.AsyncBaseTransport, metrics: PoolMetrics):
+        self.wrapped = wrapped
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        metrics = self.metrics
+        metrics.requests += 1
+        metrics.in_flight += 1
+        metrics.peak_in_flight = max(metrics.peak_in_flight, metrics.in_flight)
+        started = time.monotonic()
+        try:
+            response = await self.wrapped.handle_async_request(request)
+        except BaseException:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.in_flight -= 1
+
+        metrics.header_seconds += time.monotonic() - started
+        status = f"{response.status_code // 100}xx"
+        metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+        version = response.extensions.get("http_version", b"").decode("ascii", "replace") or "unknown"
+        metrics.http_versions[version] = metrics.http_versions.get(version, 0) + 1
+        return response
+
+    async def aclose(self):
+        await self.wrapped.aclose()
+
+
+class ClientPool:
+    """One shared, metered httpx.AsyncClient."""
+
+    def __init__(self, name: str, spec: PoolSpec):
+        self.name = name
+        self.spec = spec
+        self.metrics = PoolMetrics()
+        overrides = settings.HTTP_POOL_LIMITS.get(name, {})
+        self.limits = httpx.Limits(
+            max_connections=int(overrides.get("max_connections", spec.max_connections)),
+            max_keepalive_connections=int(overrides.get("max_keepalive", spec.max_keepalive)),
+            keepalive_expiry=float(overrides.get("keepalive_expiry", settings.HTTP_KEEPALIVE_EXPIRY)),
+        )
+        self.http2 = settings.HTTP2_ENABLED and HTTP2_AVAILABLE
+
+        # Record/replay benchmarking supplies its own transport; it is metered the same way
+        inner = get_transport(spec.cassette) or httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits)
+        self.transport = MeteredTransport(inner, self.metrics)
+        self.client = httpx.AsyncClient(transport=self.transport, **spec.options())
+
+    def connections(self) -> Dict[str, Optional[int]]:
+        """Open and idle connections in the underlying pool (None under a custom transport)."""
+        pool = getattr(self.transport.wrapped, "_pool", None)
+        conns = getattr(pool, "connections", None)
+        if conns is None:
+            return {"open": None, "idle": None}
+        return {"open": len(conns), "idle": sum(1 for c in conns if c.is_idle())}
+
+    async def warm(self) -> bool:
+        """Open a connection to the pool's fixed host so the first real request skips the handshake."""
+        url = self.spec.warmup_url()
+        if not url:
+            return False
+        try:
+            await self.client.head(url, timeout=5.0)
+            return True
+        except Exception as e:
+            logger.info(f"HTTP pool {self.name}: warm-up of {url} failed ({e})")
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "limits": {
+                "max_connections": self.limits.max_connections,
+                "max_keepalive": self.limits.max_keepalive_connections,
+                "keepalive_expiry": self.limits.keepalive_expiry,
+            },
+            "connections": self.connections(),
+            **self.metrics.snapshot(),
+        }
+
+
+class ClientRegistry:
+    """Process-wide pools, created on first use or at startup."""
+
+    def __init__(self):
+        self.pools: Dict[str, ClientPool] = {}
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """The shared client for pool ``name`` (one of POOLS). Borrowers must not close it."""
+        pool = self.pools.get(name)
+        if pool is None:
+            pool = self.pools[name] = ClientPool(name, POOLS[name])
+        return pool.client
+
+    async def start(self):
+        """Create every pool and warm the fixed-host ones."""
+        for name in POOLS:
+            self.client(name)
+        if settings.HTTP_WARMUP and not settings.HTTP_CASSETTE_MODE:
+            warmed = [pool.name for pool in self.pools.values() if await pool.warm()]
+            if warmed:
+                logger.info(f"HTTP pools warmed: {', '.join(warmed)}")
+        logger.info(f"HTTP pools ready (HTTP/2 {'on' if HTTP2_AVAILABLE and settings.HTTP2_ENABLED else 'off'})")
+
+    async def close(self):
+        pools, self.pools = self.pools, {}
+        for pool in pools.values():
+            try:
+                await pool.client.aclose()
+            except Exception as e:
+                logger.warning(f"HTTP pool {pool.name} failed to close: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+
+client_registry = ClientRegistry()
@@ -1,10 +1,11 @@
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from datetime import datetime
 import aiofiles
 
 from app.models.rsa import MediaPlan
 from app.config import MARKETS
+from app.services.negative_keywords import conflict_rows
 
 
 class CSVExporter:
@@ -101,3 +102,28 @@ class CSVExporter:
                 await f.write(",".join(values) + "\n")
 
         return str(csv_path)
+
+    async def export_negative_conflicts(
+        self,
+        conflicts: Optional[Dict[str, Any]],
+        output_folder: str,
+    ) -> Optional[str]:
+        """Write negative keyword conflicts (see find_negative_conflicts) to CSV; None if there are none."""
+        rows = conflict_rows(conflicts)
+        if not rows:
+            return None
+
+        output_path = Path(output_folder)
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        csv_path = output_path / f"negative_conflicts_{timestamp}.csv"
+
+        headers = ["ad_group", "keyword", "match_type", "negative", "negative_match_type", "source", "severity"]
+        async with aiofiles.open(csv_path, "w", newline="", encoding="utf-8") as f:
+            await f.write(",".join(f'"{h}"' for h in headers) + "\n")
+            for row in rows:
+                values = [str(row.get(h, "")).replace('"', '""') for h in headers]
+                await f.write(",".join(f'"{v}"' for v in values) + "\n")
+
+        return str(csv_path)
@@ -0,0 +1,285 @@
+"""
+Dependency-graph scheduler for pipeline agents.
+
+Each node declares the artifacts it reads (``inputs``: run() input key ->
+artifact name) and the artifact it produces (``output``). The scheduler starts
+every node as soon as all of its input artifacts exist, so independent agents
+overlap instead of waiting on fixed stage barriers. It tracks per-node status,
+propagates failures to downstream nodes (which are skipped) while independent
+branches keep running, supports cancellation, and reports critical-path
+timing once the run settles.
+"""
+
+import asyncio
+import copy
+import logging
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class NodeStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class DagNode:
+    name: str
+    inputs: Dict[str, str]
+    output: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    status: NodeStatus = NodeStatus.PENDING
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def for_agent(cls, agent: Any, run: Callable[[Dict[str, Any]], Awaitable[Any]]) -> "DagNode":
+        """Node named after ``agent`` using its declared ``inputs`` and ``output``."""
+        return cls(name=agent.agent_name, inputs=dict(agent.inputs), output=agent.output, run=run)
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+class DagError(ValueError):
+    """The graph is invalid: missing inputs, duplicate outputs or a cycle."""
+
+
+class DagFailure(Exception):
+    """One or more nodes failed; ``failures`` maps node name to its exception."""
+
+    def __init__(self, failures: Dict[str, BaseException]):
+        self.failures = failures
+        name, error = next(iter(failures.items()))
+        super().__init__(f"{name} failed: {error}")
+
+
+class DagScheduler:
+    """Runs DagNodes as their inputs become available."""
+
+    def __init__(
+        self,
+        nodes: List[DagNode],
+        artifacts: Optional[Dict[str, Any]] = None,
+        on_status: Optional[Callable[[DagNode], None]] = None,
+    ):
+        self.nodes: Dict[str, DagNode] = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise DagError(f"Duplicate node name: {node.name}")
+            self.nodes[node.name] = node
+        self.artifacts: Dict[str, Any] = dict(artifacts or {})
+        self.on_status = on_status
+        self.producers: Dict[str, str] = {}
+        for node in nodes:
+            if node.output in self.producers or node.output in self.artifacts:
+                raise DagError(f"Artifact {node.output!r} has more than one source")
+            self.producers[node.output] = node.name
+
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.failures: Dict[str, BaseException] = {}
+        self.cancelled = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._validate()
+
+    # ------------------------------------------------------------------
+    # Graph structure
+    # ------------------------------------------------------------------
+
+    def dependencies(self, name: str) -> Set[str]:
+        """Names of the nodes producing ``name``'s inputs."""
+        return {
+            self.producers[artifact]
+            for artifact in self.nodes[name].inputs.values()
+            if artifact in self.producers
+        }
+
+    def dependents(self, name: str) -> Set[str]:
+        """Every node downstream of ``name``, transitively."""
+        found: Set[str] = set()
+        frontier = [name]
+        while frontier:
+            current = frontier.pop()
+            for other in self.nodes:
+                if other not in found and current in self.dependencies(other):
+                    found.add(other)
+                    frontier.append(other)
+        return found
+
+    def _validate(self):
+        for node in self.nodes.values():
+            for artifact in node.inputs.values():
+                if artifact not in self.producers and artifact not in self.artifacts:
+                    raise DagError(f"{node.name} needs {artifact!r}, which nothing provides")
+
+        # Kahn's algorithm: anything left over is on a cycle
+        remaining = {name: len(self.dependencies(name)) for name in self.nodes}
+        ready = [name for name, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for other in self.nodes:
+                if name in self.dependencies(other):
+                    remaining[other] -= 1
+                    if remaining[other] == 0:
+                        ready.append(other)
+        if visited != len(self.nodes):
+            cyclic = sorted(name for name, count in remaining.items() if count > 0)
+            raise DagError(f"Dependency cycle between: {', '.join(cyclic)}")
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def _set_status(self, node: DagNode, status: NodeStatus, error: Optional[str] = None):
+        node.status = status
+        if error is not None:
+            node.error = error
+        if status == NodeStatus.RUNNING:
+            node.started_at = time.monotonic()
+        elif status in (NodeStatus.COMPLETED, NodeStatus.FAILED) or (
+            status == NodeStatus.CANCELLED and node.started_at is not None
+        ):
+            node.finished_at = time.monotonic()
+        if self.on_status:
+            try:
+                self.on_status(node)
+            except Exception as e:
+                logger.warning(f"DAG status callback failed for {node.name}: {e}")
+
+    def _ready(self, node: DagNode) -> bool:
+        return all(artifact in self.artifacts for artifact in node.inputs.values())
+
+    def _start_ready(self):
+        for node in self.nodes.values():
+            if node.status == NodeStatus.PENDING and self._ready(node):
+                # Each node gets its own copy of its inputs, so a node that modifies them can
+                # neither change what later nodes read nor the memo keys computed from them
+                input_data = copy.deepcopy({key: self.artifacts[artifact] for key, artifact in node.inputs.items()})
+                self._set_status(node, NodeStatus.RUNNING)
+                self.tasks[node.name] = asyncio.ensure_future(node.run(input_data))
+
+    def _settle(self, name: str, task: asyncio.Task):
+        node = self.nodes[name]
+        if task.cancelled():
+            self._set_status(node, NodeStatus.CANCELLED)
+            return
+
+        error = task.exception()
+        if error is None:
+            self.artifacts[node.output] = task.result()
+            self._set_status(node, NodeStatus.COMPLETED)
+            return
+
+        self.failures[name] = error
+        self._set_status(node, NodeStatus.FAILED, str(error))
+        for downstream in self.dependents(name):
+            other = self.nodes[downstream]
+            if other.status == NodeStatus.PENDING:
+                self._set_status(other, NodeStatus.SKIPPED, f"upstream {name} failed")
+
+    def _close_pending(self):
+        for node in self.nodes.values():
+            if node.status == NodeStatus.PENDING:
+                self._set_status(node, NodeStatus.CANCELLED if self.cancelled else NodeStatus.SKIPPED)
+
+    async def run(self) -> Dict[str, Any]:
+        """Run to completion and return all artifacts.
+
+        Raises DagFailure if any node failed (after independent branches finish).
+        On cancellation, returns the artifacts produced so far.
+        """
+        self.started_at = time.monotonic()
+        try:
+            while True:
+                if not self.cancelled:
+                    self._start_ready()
+                if not self.tasks:
+                    break
+                done, _ = await asyncio.wait(list(self.tasks.values()), return_when=asyncio.FIRST_COMPLETED)
+                for name, task in list(self.tasks.items()):
+                    if task in done:
+                        del self.tasks[name]
+                        self._settle(name, task)
+        except asyncio.CancelledError:
+            # Wait for running nodes to unwind so their cleanup finishes before we do
+            self.cancel()
+            running = list(self.tasks.items())
+            await asyncio.gather(*(task for _, task in running), return_exceptions=True)
+            for name, task in running:
+                del self.tasks[name]
+                self._settle(name, task)
+            self._close_pending()
+            raise
+        finally:
+            self.finished_at = time.monotonic()
+
+        self._close_pending()
+        if self.failures and not self.cancelled:
+            raise DagFailure(self.failures)
+        return self.artifacts
+
+    def cancel(self):
+        """Stop scheduling new nodes and cancel the running ones."""
+        self.cancelled = True
+        for task in self.tasks.values():
+            task.cancel()
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def critical_path(self) -> List[str]:
+        """The chain of nodes that determined the run's finish time.
+
+        Starting from the node that finished last, repeatedly step to the
+        dependency that finished last, i.e. the one that gated its start.
+        """
+        finished = [n for n in self.nodes.values() if n.finished_at is not None]
+        if not finished:
+            return []
+        node = max(finished, key=lambda n: n.finished_at)
+        path = [node.name]
+        while True:
+            deps = [self.nodes[d] for d in self.dependencies(node.name) if self.nodes[d].finished_at is not None]
+            if not deps:
+                break
+            node = max(deps, key=lambda n: n.finished_at)
+            path.append(node.name)
+        return list(reversed(path))
+
+    def timing(self) -> Dict[str, Any]:
+        """Per-node status and timing (seconds from run start) plus the critical path."""
+        origin = self.started_at or 0.0
+        nodes = {}
+        for node in self.nodes.values():
+            nodes[node.name] = {
+                "status": node.status.value,
+                "depends_on": sorted(self.dependencies(node.name)),
+                "started": round(node.started_at - origin, 3) if node.started_at is not None else None,
+                "finished": round(node.finished_at - origin, 3) if node.finished_at is not None else None,
+                "duration": round(node.duration, 3) if node.duration is not None else None,
+                "error": node.error,
+            }
+
+        path = self.critical_path()
+        return {
+            "wall_seconds": round((self.finished_at or time.monotonic()) - origin, 3) if self.started_at else None,
+            "critical_path": path,
+            "critical_path_seconds": round(sum(self.nodes[n].duration or 0.0 for n in path), 3),
+            "nodes": nodes,
+        }
@@ -1,39 +1,238 @@
 """DataForSEO API client for keyword research with real volume/CPC data."""
 
+import asyncio
 import base64
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, List, Optional, Tuple
 
 import httpx
 from app.config import settings, MARKETS
+from app.services.http_cassette import client_kwargs
+from app.services.usage_tracker import UsageRecord, usage_tracker
+from app.services.singleflight import dataforseo_flight, request_key
+from app.services.keyword_metrics_store import keyword_metrics_store, normalize_keyword
+from app.services.dataforseo_queue import QUEUE_ENDPOINTS, dataforseo_task_queue
 
 logger = logging.getLogger(__name__)
 
-API_BASE = "https://api.dataforseo.com"
+API_BASE = settings.DATAFORSEO_API_BASE.rstrip("/")
+
+KEYWORDS_FOR_SITE = "/v3/dataforseo_labs/google/keywords_for_site/live"
+RELATED_KEYWORDS = "/v3/dataforseo_labs/google/related_keywords/live"
+SEARCH_VOLUME = "/v3/keywords_data/google_ads/search_volume/live"
+
+# Google Ads search volume accepts at most 1000 keywords per task
+SEARCH_VOLUME_CHUNK = 1000
+
+# Shared across clients so concurrent projects respect one upstream limit
+_request_slots = asyncio.Semaphore(settings.DATAFORSEO_MAX_CONCURRENCY)
+
+
+class TaskBatcher:
+    """Gathers single tasks for one endpoint into multi-task POSTs.
+
+    A batch is sent when DATAFORSEO_BATCH_MAX_TASKS tasks are pending or
+    DATAFORSEO_BATCH_WINDOW_MS after the first one arrived, whichever comes
+    first. Each caller gets back its own entry of the response ``tasks`` array,
+    which DataForSEO returns in request order.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.pending: List[Tuple[Dict[str, Any], asyncio.Future, "DataForSEOClient"]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # In-flight POSTs and the futures of the callers still waiting on each
+        self._sending: Dict[asyncio.Task, List[asyncio.Future]] = {}
+        self.stats = {"posts": 0, "tasks": 0, "largest_batch": 0}
+
+    async def submit(self, client: "DataForSEOClient", task: Dict[str, Any]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((task, future, client))
+
+        if len(self.pending) >= settings.DATAFORSEO_BATCH_MAX_TASKS:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(settings.DATAFORSEO_BATCH_WINDOW_MS / 1000, self._flush)
+
+        try:
+            return await future
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+
+    def _abandon(self, future: asyncio.Future):
+        """Drop a cancelled caller's task: unsent tasks are removed, and a POST nobody awaits is aborted."""
+        self.pending = [entry for entry in self.pending if entry[1] is not future]
+        if not self.pending and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for task, futures in list(self._sending.items()):
+            if future in futures and all(f.done() for f in futures):
+                task.cancel()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending[task] = [future for _, future, _ in batch]
+            task.add_done_callback(lambda t: self._sending.pop(t, None))
+
+    async def _send(self, batch: List[Tuple[Dict[str, Any], asyncio.Future, "DataForSEOClient"]]):
+        self.stats["posts"] += 1
+        self.stats["tasks"] += len(batch)
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+
+        # Callers still awaiting have open clients; cancelled ones may be closing theirs
+        client = next((c for _, future, c in batch if not future.done()), batch[0][2])
+        try:
+            data = await client._send(self.endpoint, [task for task, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        results = data.get("tasks", [])
+        for i, (_, future, _) in enumerate(batch):
+            if not future.done():
+                future.set_result(results[i] if i < len(results) else {})
+
+
+_batchers: Dict[str, TaskBatcher] = {}
+
+
+def _batcher_for(endpoint: str) -> TaskBatcher:
+    if endpoint not in _batchers:
+        _batchers[endpoint] = TaskBatcher(endpoint)
+    return _batchers[endpoint]
+
+
+def batching_stats() -> Dict[str, Dict[str, int]]:
+    return {endpoint: dict(b.stats) for endpoint, b in _batchers.items()}
+
+
+def _labs_keywords(task_result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Flatten a DataForSEO Labs task result into keyword metric dicts."""
+    keywords = []
+    for result in task_result.get("result") or []:
+        for item in result.get("items") or []:
+            kw_data = item.get("keyword_data", {})
+            kw_info = kw_data.get("keyword_info", {})
+            keywords.append({
+                "keyword": kw_data.get("keyword", ""),
+                "search_volume": kw_info.get("search_volume"),
+                "cpc": kw_info.get("cpc"),
+                "competition": kw_info.get("competition"),
+                "monthly_searches": kw_info.get("monthly_searches"),
+            })
+    return keywords
+
+
+def _without_history(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in item.items() if k != "monthly_searches"}
+
+
+def auth_headers() -> Dict[str, str]:
+    credentials = f"{settings.DATAFORSEO_LOGIN}:{settings.DATAFORSEO_PASSWORD}"
+    encoded = base64.b64encode(credentials.encode()).decode()
+    return {
+        "Authorization": f"Basic {encoded}",
+        "Content-Type": "application/json",
+    }
+
+
+def client_options() -> Dict[str, Any]:
+    return {"timeout": 60.0, "headers": auth_headers()}
 
 
 class DataForSEOClient:
-    """Client for DataForSEO keyword research APIs."""
-
-    def __init__(self):
-        credentials = f"{settings.DATAFORSEO_LOGIN}:{settings.DATAFORSEO_PASSWORD}"
-        encoded = base64.b64encode(credentials.encode()).decode()
-        self.headers = {
-            "Authorization": f"Basic {encoded}",
-            "Content-Type": "application/json",
-        }
-        self.client: Optional[httpx.AsyncClient] = None
+    """Client for DataForSEO keyword research APIs.
+
+    ``use_queue`` selects the cheaper standard (task_post/tasks_ready) mode for
+    endpoints that support it; it defaults to DATAFORSEO_QUEUE_MODE. Interactive
+    runs should stay on the live endpoints.
+    """
+
+    def __init__(self, use_queue: Optional[bool] = None, client: Optional[httpx.AsyncClient] = None):
+        self.headers = auth_headers()
+        self.client: Optional[httpx.AsyncClient] = client
+        self.owns_client = client is None
+        self.use_queue = settings.DATAFORSEO_QUEUE_MODE if use_queue is None else use_queue
 
     async def _ensure_client(self):
         if self.client is None:
-            self.client = httpx.AsyncClient(
-                timeout=60.0,
-                headers=self.headers,
-            )
+            self.client = httpx.AsyncClient(**client_options(), **client_kwargs("dataforseo"))
 
     def _is_configured(self) -> bool:
         return bool(settings.DATAFORSEO_LOGIN and settings.DATAFORSEO_PASSWORD)
 
+    async def _submit_task(self, endpoint: str, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one task against ``endpoint`` and return its entry from the response.
+
+        Identical in-flight tasks are coalesced; distinct ones are batched.
+        """
+        return await dataforseo_flight.do(
+            request_key(endpoint, task),
+            lambda: self._run_task(endpoint, task),
+        )
+
+    async def _run_task(self, endpoint: str, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a task (queued or live) and record its usage and cost."""
+        started = time.monotonic()
+        result: Dict[str, Any] = {}
+        try:
+            if self.use_queue and endpoint in QUEUE_ENDPOINTS:
+                result = await dataforseo_task_queue.submit(endpoint, task, self._post_task, self.headers)
+            else:
+                result = await self._post_task(endpoint, task)
+            return result
+        finally:
+            usage_tracker.record(UsageRecord(
+                service="dataforseo",
+                operation=endpoint,
+                tasks=1,
+                cost=float(result.get("cost") or 0.0),
+                latency=time.monotonic() - started,
+                success=bool(result) and result.get("status_code", 20000) < 40000,
+            ))
+
+    async def _post_task(self, endpoint: str, task: Dict[str, Any]) -> Dict[str, Any]:
+        """POST one task (batched when enabled) and return its response entry."""
+        await self._ensure_client()
+        if settings.DATAFORSEO_BATCH_WINDOW_MS > 0 and settings.DATAFORSEO_BATCH_MAX_TASKS > 1:
+            return await _batcher_for(endpoint).submit(self, task)
+        data = await self._send(endpoint, [task])
+        return (data.get("tasks") or [{}])[0]
+
+    async def _send(self, endpoint: str, payload: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Wait for a request slot, then send."""
+        async with _request_slots:
+            return await self._send_now(endpoint, payload)
+
+    async def _send_now(self, endpoint: str, payload: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """POST a task array to ``endpoint``."""
+        response = await self.client.post(f"{API_BASE}{endpoint}", json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def _remember(
+        self,
+        items: List[Dict[str, Any]],
+        location_code: int,
+        language: str,
+    ) -> List[Dict[str, Any]]:
+        """Write fetched metrics through to the local store and strip history."""
+        try:
+            await keyword_metrics_store.put_many(items, location_code, language)
+        except Exception as e:
+            logger.warning(f"Failed to cache keyword metrics: {e}")
+        return [_without_history(item) for item in items]
+
     async def get_keywords_for_site(
         self,
         domain: str,
@@ -48,39 +247,19 @@ class DataForSEOClient:
 
         await self._ensure_client()
 
-        payload = [{
+        task = {
             "target": domain,
             "location_code": location_code,
             "language_code": language,
             "limit": limit,
             "include_serp_info": False,
             "include_seed_keyword": True,
-        }]
+        }
 
         try:
-            response = await self.client.post(
-                f"{API_BASE}/v3/dataforseo_labs/google/keywords_for_site/live",
-                json=payload,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            keywords = []
-            tasks = data.get("tasks", [])
-            if tasks and tasks[0].get("result"):
-                for result in tasks[0]["result"]:
-                    items = result.get("items", [])
-                    for item in items:
-                        kw_data = item.get("keyword_data", {})
-                        kw_info = kw_data.get("keyword_info", {})
-                        keywords.append({
-                            "keyword": kw_data.get("keyword", ""),
-                            "search_volume": kw_info.get("search_volume"),
-                            "cpc": kw_info.get("cpc"),
-                            "competition": kw_info.get("competition"),
-                        })
-
-            return keywords
+            task_result = await self._submit_task(KEYWORDS_FOR_SITE, task)
+
+            return await self._remember(_labs_keywords(task_result), location_code, language)
 
         except Exception as e:
             logger.error(f"DataForSEO keywords_for_site error: {e}")
@@ -99,38 +278,18 @@ class DataForSEOClient:
 
         await self._ensure_client()
 
-        payload = [{
+        task = {
             "keyword": seed_keyword,
             "location_code": location_code,
             "language_code": language,
             "limit": limit,
             "include_seed_keyword": True,
-        }]
+        }
 
         try:
-            response = await self.client.post(
-                f"{API_BASE}/v3/dataforseo_labs/google/related_keywords/live",
-                json=payload,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            keywords = []
-            tasks = data.get("tasks", [])
-            if tasks and tasks[0].get("result"):
-                for result in tasks[0]["result"]:
-                    items = result.get("items", [])
-                    for item in items:
-                        kw_data = item.get("keyword_data", {})
-                        kw_info = kw_data.get("keyword_info", {})
-                        keywords.append({
-                            "keyword": kw_data.get("keyword", ""),
-                            "search_volume": kw_info.get("search_volume"),
-                            "cpc": kw_info.get("cpc"),
-                            "competition": kw_info.get("competition"),
-                        })
-
-            return keywords
+            task_result = await self._submit_task(RELATED_KEYWORDS, task)
+
+            return await self._remember(_labs_keywords(task_result), location_code, language)
 
         except Exception as e:
             logger.error(f"DataForSEO related_keywords error: {e}")
@@ -142,43 +301,81 @@ class DataForSEOClient:
         location_code: int,
         language: str = "en",
     ) -> List[Dict[str, Any]]:
-        """Get search volume and CPC for a list of keywords."""
-        if not self._is_configured():
+        """Get search volume and CPC for a list of keywords.
+
+        Cached metrics are served first; misses are fetched in parallel chunks of
+        SEARCH_VOLUME_CHUNK keywords and written back to the cache.
+        """
+        unique = list(dict.fromkeys(normalize_keyword(kw) for kw in keywords if kw and kw.strip()))
+        if not unique:
             return []
 
-        await self._ensure_client()
+        try:
+            cached = await keyword_metrics_store.get_many(unique, location_code, language)
+        except Exception as e:
+            logger.warning(f"Keyword metrics cache unavailable: {e}")
+            cached = {}
+
+        misses = [kw for kw in unique if kw not in cached]
+        fetched: Dict[str, Dict[str, Any]] = {}
+
+        if misses and self._is_configured():
+            await self._ensure_client()
+            chunks = [
+                misses[i:i + SEARCH_VOLUME_CHUNK]
+                for i in range(0, len(misses), SEARCH_VOLUME_CHUNK)
+            ]
+            chunk_results = await asyncio.gather(*[
+                self._fetch_search_volume(chunk, location_code, language)
+                for chunk in chunks
+            ])
+            for items in chunk_results:
+                for item in await self._remember(items, location_code, language):
+                    fetched[normalize_keyword(item["keyword"])] = item
 
-        payload = [{
-            "keywords": keywords[:1000],
+        logger.info(
+            f"DataForSEO search_volume: {len(unique)} keywords, "
+            f"{len(cached)} cached, {len(fetched)} fetched"
+        )
+
+        results = []
+        for kw in unique:
+            item = cached.get(kw) or fetched.get(kw)
+            if item:
+                results.append(item)
+        return results
+
+    async def _fetch_search_volume(
+        self,
+        keywords: List[str],
+        location_code: int,
+        language: str,
+    ) -> List[Dict[str, Any]]:
+        """Fetch one chunk (at most SEARCH_VOLUME_CHUNK keywords) of search volume data."""
+        task = {
+            "keywords": keywords,
             "location_code": location_code,
             "language_code": language,
-        }]
+        }
 
         try:
-            response = await self.client.post(
-                f"{API_BASE}/v3/keywords_data/google_ads/search_volume/live",
-                json=payload,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            results = []
-            tasks = data.get("tasks", [])
-            if tasks and tasks[0].get("result"):
-                for item in tasks[0]["result"]:
-                    results.append({
-                        "keyword": item.get("keyword", ""),
-                        "search_volume": item.get("search_volume"),
-                        "cpc": item.get("cpc"),
-                        "competition": item.get("competition"),
-                    })
-
-            return results
+            task_result = await self._submit_task(SEARCH_VOLUME, task)
+
+            return [
+                {
+                    "keyword": item.get("keyword", ""),
+                    "search_volume": item.get("search_volume"),
+                    "cpc": item.get("cpc"),
+                    "competition": item.get("competition"),
+                    "monthly_searches": item.get("monthly_searches"),
+                }
+                for item in task_result.get("result") or []
+            ]
 
         except Exception as e:
             logger.error(f"DataForSEO search_volume error: {e}")
             return []
 
     async def close(self):
-        if self.client:
+        if self.client and self.owns_client:
             await self.client.aclose()
@@ -0,0 +1,283 @@
+"""
+DataForSEO standard (queued) task mode.
+
+Instead of holding a connection open on a ``/live`` endpoint, tasks are posted
+to ``task_post`` and a background scheduler polls ``tasks_ready`` with an
+adaptive interval, fetching finished results with ``task_get`` and resolving
+the callers awaiting them. Posted task IDs are persisted in SQLite, so a
+restart resumes polling and later identical submissions pick up the stored
+result instead of paying for the task again.
+
+Only endpoints that DataForSEO offers in standard mode are queued (see
+QUEUE_ENDPOINTS); everything else keeps using the live path. That excludes
+the DataForSEO Labs endpoints (keywords for site, related keywords) the
+pipeline calls, which are live-only.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+from app.config import settings
+from app.services.http_cassette import client_kwargs
+from app.services.singleflight import request_key
+
+logger = logging.getLogger(__name__)
+
+# Live endpoint -> standard-mode base path
+QUEUE_ENDPOINTS: Dict[str, str] = {
+    "/v3/keywords_data/google_ads/search_volume/live": "/v3/keywords_data/google_ads/search_volume",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dataforseo_queue_tasks (
+    task_id TEXT PRIMARY KEY,
+    request_key TEXT NOT NULL,
+    base_path TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    posted_at REAL NOT NULL,
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_dataforseo_queue_key ON dataforseo_queue_tasks (request_key);
+CREATE INDEX IF NOT EXISTS idx_dataforseo_queue_status ON dataforseo_queue_tasks (status);
+"""
+
+PostFn = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class QueueTaskStore:
+    """SQLite persistence for posted task IDs and their results."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or settings.DATAFORSEO_QUEUE_DB)
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _execute(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    async def execute(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        return await asyncio.to_thread(self._execute, sql, params)
+
+    async def add(self, task_id: str, key: str, base_path: str, task: Dict[str, Any]):
+        await self.execute(
+            "INSERT OR REPLACE INTO dataforseo_queue_tasks "
+            "(task_id, request_key, base_path, payload, status, posted_at) VALUES (?, ?, ?, ?, 'pending', ?)",
+            (task_id, key, base_path, json.dumps(task), time.time()),
+        )
+
+    async def finish(self, task_id: str, status: str, result: Dict[str, Any]):
+        await self.execute(
+            "UPDATE dataforseo_queue_tasks SET status = ?, result = ?, completed_at = ? WHERE task_id = ?",
+            (status, json.dumps(result), time.time(), task_id),
+        )
+
+    async def find(self, key: str) -> Optional[Tuple[str, str, Optional[str], float]]:
+        """Latest (task_id, status, result, completed_at) for a request key."""
+        rows = await self.execute(
+            "SELECT task_id, status, result, COALESCE(completed_at, posted_at) FROM dataforseo_queue_tasks "
+            "WHERE request_key = ? AND status != 'failed' ORDER BY posted_at DESC LIMIT 1",
+            (key,),
+        )
+        return rows[0] if rows else None
+
+    async def pending(self) -> List[Tuple[str, str, str, float]]:
+        """All (task_id, request_key, base_path, posted_at) still awaiting results."""
+        return await self.execute(
+            "SELECT task_id, request_key, base_path, posted_at FROM dataforseo_queue_tasks WHERE status = 'pending'"
+        )
+
+
+class DataForSEOTaskQueue:
+    """Posts queued tasks and resolves them from a single adaptive polling loop."""
+
+    def __init__(self, store: Optional[QueueTaskStore] = None):
+        self.store = store or QueueTaskStore()
+        self.http: Optional[httpx.AsyncClient] = None
+        # task_id -> (base_path, posted_at)
+        self.pending: Dict[str, Tuple[str, float]] = {}
+        self.waiters: Dict[str, List[asyncio.Future]] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self.stats = {"posted": 0, "reused": 0, "completed": 0, "failed": 0, "polls": 0}
+
+    def _ensure_http(self, headers: Dict[str, str]):
+        if self.http is None:
+            self.http = httpx.AsyncClient(
+                base_url=settings.DATAFORSEO_API_BASE.rstrip("/"),
+                timeout=60.0,
+                headers=headers,
+                **client_kwargs("dataforseo"),
+            )
+
+    def _ensure_poller(self):
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll_loop())
+        self._wakeup.set()
+
+    async def resume(self, headers: Dict[str, str]):
+        """Re-adopt tasks posted before a restart so their results get collected."""
+        rows = await self.store.pending()
+        if not rows:
+            return
+        self._ensure_http(headers)
+        for task_id, _, base_path, posted_at in rows:
+            self.pending.setdefault(task_id, (base_path, posted_at))
+        logger.info(f"DataForSEO queue resumed {len(rows)} in-flight task(s)")
+        self._ensure_poller()
+
+    async def submit(
+        self,
+        endpoint: str,
+        task: Dict[str, Any],
+        post: PostFn,
+        headers: Dict[str, str],
+    ) -> Dict[str, Any]:
+        """Queue ``task`` for live ``endpoint`` and wait for its task result.
+
+        ``post(path, task)`` sends one task and returns its response entry; the
+        client passes its batched sender so task_post calls are batched too.
+        """
+        base_path = QUEUE_ENDPOINTS[endpoint]
+        key = request_key(base_path, task)
+        self._ensure_http(headers)
+
+        existing = await self.store.find(key)
+        if existing:
+            task_id, status, result, finished_at = existing
+            fresh = time.time() - finished_at < settings.DATAFORSEO_QUEUE_RESULT_TTL_HOURS * 3600
+            if status == "done" and fresh:
+                self.stats["reused"] += 1
+                return json.loads(result)
+            if status == "pending":
+                self.stats["reused"] += 1
+                self.pending.setdefault(task_id, (base_path, finished_at))
+                return await self._wait(task_id)
+
+        posted = await post(f"{base_path}/task_post", task)
+        task_id = posted.get("id")
+        if not task_id or posted.get("status_code", 20100) >= 40000:
+            raise RuntimeError(f"DataForSEO task_post failed: {posted.get('status_message', 'no task id')}")
+
+        await self.store.add(task_id, key, base_path, task)
+        self.pending[task_id] = (base_path, time.time())
+        self.stats["posted"] += 1
+        return await self._wait(task_id)
+
+    async def _wait(self, task_id: str) -> Dict[str, Any]:
+        future = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(task_id, []).append(future)
+        self._ensure_poller()
+        return await future
+
+    def _resolve(self, task_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[Exception] = None):
+        self.pending.pop(task_id, None)
+        for future in self.waiters.pop(task_id, []):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def _poll_loop(self):
+        interval = settings.DATAFORSEO_QUEUE_POLL_MIN
+        while self.pending:
+            self._wakeup.clear()
+            try:
+                # New submissions wake the loop so short tasks aren't stuck behind a long back-off
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+                await asyncio.sleep(settings.DATAFORSEO_QUEUE_POLL_MIN)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                collected = await self._poll_once()
+            except Exception as e:
+                logger.warning(f"DataForSEO tasks_ready poll failed: {e}")
+                collected = 0
+
+            if collected:
+                interval = settings.DATAFORSEO_QUEUE_POLL_MIN
+            else:
+                interval = min(interval * 1.5, settings.DATAFORSEO_QUEUE_POLL_MAX)
+
+            self._expire_stale()
+
+    async def _poll_once(self) -> int:
+        """Check every queued base path once and collect whatever is ready."""
+        self.stats["polls"] += 1
+        bases: Set[str] = {base for base, _ in self.pending.values()}
+        ready: List[Tuple[str, str]] = []
+
+        for base_path in bases:
+            response = await self.http.get(f"{base_path}/tasks_ready")
+            response.raise_for_status()
+            for entry in response.json().get("tasks", []):
+                for item in entry.get("result") or []:
+                    if item.get("id") in self.pending:
+                        ready.append((item["id"], base_path))
+
+        await asyncio.gather(*[self._collect(task_id, base_path) for task_id, base_path in ready])
+        return len(ready)
+
+    async def _collect(self, task_id: str, base_path: str):
+        try:
+            response = await self.http.get(f"{base_path}/task_get/{task_id}")
+            response.raise_for_status()
+            tasks = response.json().get("tasks") or [{}]
+            result = tasks[0]
+        except Exception as e:
+            logger.warning(f"DataForSEO task_get {task_id} failed, will retry: {e}")
+            return
+
+        if result.get("status_code", 20000) >= 40000:
+            self.stats["failed"] += 1
+            await self.store.finish(task_id, "failed", result)
+            self._resolve(task_id, error=RuntimeError(
+                f"DataForSEO task {task_id} failed: {result.get('status_message', '')}"
+            ))
+            return
+
+        self.stats["completed"] += 1
+        await self.store.finish(task_id, "done", result)
+        self._resolve(task_id, result=result)
+
+    def _expire_stale(self):
+        cutoff = time.time() - settings.DATAFORSEO_QUEUE_TIMEOUT_HOURS * 3600
+        for task_id, (_, posted_at) in list(self.pending.items()):
+            if posted_at < cutoff:
+                self.stats["failed"] += 1
+                asyncio.ensure_future(self.store.finish(task_id, "failed", {"status_message": "timed out"}))
+                self._resolve(task_id, error=TimeoutError(f"DataForSEO task {task_id} timed out"))
+
+    async def close(self):
+        if self._poller is not None:
+            self._poller.cancel()
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+
+
+dataforseo_task_queue = DataForSEOTaskQueue()
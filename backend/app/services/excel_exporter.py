@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
 from openpyxl import Workbook
@@ -7,6 +7,7 @@ from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 
 from app.models.rsa import MediaPlan
+from app.services.negative_keywords import conflict_rows
 from app.config import MARKETS
 
 
@@ -61,6 +62,26 @@ def _auto_width(ws, min_width=10, max_width=40):
         ws.column_dimensions[col_letter].width = width
 
 
+def _new_workbook_path(output_folder: str, stem: str) -> Path:
+    output_path = Path(output_folder)
+    output_path.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return output_path / f"{stem}_{timestamp}.xlsx"
+
+
+def _ad_group_estimates(ag) -> Tuple[float, int, float]:
+    """(avg CPC, monthly search volume, estimated monthly budget) for an ad group plan."""
+    avg_cpc = ag.cpc_bid
+    if ag.keywords:
+        cpcs = [k.cpc for k in ag.keywords if k.cpc]
+        if cpcs:
+            avg_cpc = sum(cpcs) / len(cpcs)
+
+    total_volume = sum(k.monthly_volume or 0 for k in ag.keywords)
+    est_monthly = round(avg_cpc * total_volume * 0.03, 2) if total_volume else round(avg_cpc * len(ag.keywords) * 30, 2)
+    return avg_cpc, total_volume, est_monthly
+
+
 class ExcelExporter:
     """Exports media plans to Excel workbooks matching agency format."""
 
@@ -72,47 +93,120 @@ class ExcelExporter:
         brand_research: Dict[str, Any],
         output_folder: str,
     ) -> str:
-        output_path = Path(output_folder)
-        output_path.mkdir(parents=True, exist_ok=True)
+        filepath = _new_workbook_path(output_folder, "media_plan")
+        wb = Workbook()
+        wb.remove(wb.active)
+        self._add_plan_sheets(wb, media_plan, strategy, keyword_research, brand_research)
+        wb.save(str(filepath))
+        return str(filepath)
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"media_plan_{timestamp}.xlsx"
-        filepath = output_path / filename
+    async def export_combined(
+        self,
+        plans: List[Tuple[MediaPlan, Dict[str, Any], Dict[str, Any]]],
+        brand_research: Dict[str, Any],
+        output_folder: str,
+    ) -> str:
+        """One workbook for a multi-market run: an all-markets summary, then each market's sheets.
 
+        ``plans`` holds a (media_plan, strategy, keyword_research) tuple per market.
+        """
+        filepath = _new_workbook_path(output_folder, "media_plan_all_markets")
         wb = Workbook()
+        ws_summary = wb.active
+        ws_summary.title = "All Markets"
+        self._build_markets_summary_sheet(ws_summary, plans, brand_research.get("brand_name", "Brand"))
+        for media_plan, strategy, keyword_research in plans:
+            self._add_plan_sheets(
+                wb, media_plan, strategy, keyword_research, brand_research, prefix=media_plan.market.upper(),
+            )
+        wb.save(str(filepath))
+        return str(filepath)
 
+    def _add_plan_sheets(
+        self,
+        wb: Workbook,
+        media_plan: MediaPlan,
+        strategy: Dict[str, Any],
+        keyword_research: Dict[str, Any],
+        brand_research: Dict[str, Any],
+        prefix: str = "",
+    ):
+        """Media plan, keywords, RSA and strategy sheets for one market (titles prefixed in combined workbooks)."""
         market_config = MARKETS.get(media_plan.market, {})
         currency = market_config.get("currency", "USD")
         currency_symbol = market_config.get("currency_symbol", "$")
         market_name = market_config.get("name", media_plan.market)
         brand_name = brand_research.get("brand_name", "Brand")
         campaign_name = media_plan.campaign_name
+        titles = (
+            [f"{prefix} - Media Plan", f"{prefix} - Keywords", f"{prefix} - RSA Ads", f"{prefix} - Strategy"]
+            if prefix else ["SEM - Media Plan", "SEM - Keywords", "SEM - RSA Ads", "Strategy Overview"]
+        )
 
         # Sheet 1: Media Plan
-        ws_plan = wb.active
-        ws_plan.title = "SEM - Media Plan"
+        ws_plan = wb.create_sheet(titles[0])
         self._build_media_plan_sheet(
             ws_plan, media_plan, strategy, brand_name, campaign_name,
             market_name, currency, currency_symbol,
         )
 
         # Sheet 2: Keywords
-        ws_kw = wb.create_sheet("SEM - Keywords")
+        ws_kw = wb.create_sheet(titles[1])
         self._build_keywords_sheet(
             ws_kw, media_plan, keyword_research, campaign_name,
             currency, currency_symbol,
         )
 
         # Sheet 3: RSA Ads
-        ws_rsa = wb.create_sheet("SEM - RSA Ads")
+        ws_rsa = wb.create_sheet(titles[2])
         self._build_rsa_sheet(ws_rsa, media_plan, campaign_name)
 
         # Sheet 4: Strategy Overview
-        ws_strat = wb.create_sheet("Strategy Overview")
+        ws_strat = wb.create_sheet(titles[3])
         self._build_strategy_sheet(ws_strat, strategy, brand_name, market_name)
 
-        wb.save(str(filepath))
-        return str(filepath)
+    # ------------------------------------------------------------------
+    # Combined workbook: All Markets summary
+    # ------------------------------------------------------------------
+    def _build_markets_summary_sheet(self, ws, plans, brand_name):
+        ws.cell(row=1, column=1, value="Client").font = LABEL_FONT
+        ws.cell(row=1, column=2, value=brand_name).font = DATA_FONT
+        ws.cell(row=2, column=1, value="Date").font = LABEL_FONT
+        ws.cell(row=2, column=2, value=datetime.now().strftime("%d %b %Y")).font = DATA_FONT
+
+        row = 4
+        headers = [
+            "Market", "Currency", "Campaign Name", "Ad Groups", "Keywords",
+            "Monthly Search Volume", "Avg CPC", "Est. Monthly Budget",
+        ]
+        for col, h in enumerate(headers, 1):
+            ws.cell(row=row, column=col, value=h)
+        _style_header_row(ws, row, 1, len(headers))
+        row += 1
+
+        # Budgets stay in each market's own currency, so there is no cross-market total
+        for media_plan, _, _ in plans:
+            market_config = MARKETS.get(media_plan.market, {})
+            estimates = [_ad_group_estimates(ag) for ag in media_plan.ad_groups]
+            cpcs = [k.cpc for ag in media_plan.ad_groups for k in ag.keywords if k.cpc]
+            values = [
+                market_config.get("name", media_plan.market),
+                media_plan.currency,
+                media_plan.campaign_name,
+                len(media_plan.ad_groups),
+                sum(len(ag.keywords) for ag in media_plan.ad_groups),
+                sum(volume for _, volume, _ in estimates),
+                round(sum(cpcs) / len(cpcs), 2) if cpcs else None,
+                round(sum(monthly for _, _, monthly in estimates), 2),
+            ]
+            for col, v in enumerate(values, 1):
+                ws.cell(row=row, column=col, value=v)
+            _style_data_row(ws, row, 1, len(headers))
+            for col in (7, 8):
+                ws.cell(row=row, column=col).font = MONEY_FONT
+            row += 1
+
+        _auto_width(ws, min_width=12, max_width=45)
 
     # ------------------------------------------------------------------
     # Sheet 1: Media Plan
@@ -161,14 +255,7 @@ class ExcelExporter:
             if kw_count > 5:
                 kw_list += f" (+{kw_count - 5} more)"
 
-            avg_cpc = ag.cpc_bid
-            if ag.keywords:
-                cpcs = [k.cpc for k in ag.keywords if k.cpc]
-                if cpcs:
-                    avg_cpc = sum(cpcs) / len(cpcs)
-
-            total_volume = sum(k.monthly_volume or 0 for k in ag.keywords)
-            est_monthly = round(avg_cpc * total_volume * 0.03, 2) if total_volume else round(avg_cpc * kw_count * 30, 2)
+            avg_cpc, total_volume, est_monthly = _ad_group_estimates(ag)
             est_daily = round(est_monthly / 30, 2)
 
             values = [
@@ -384,6 +471,29 @@ class ExcelExporter:
                 row += 1
             row += 1
 
+        # Negatives that block positive keywords
+        conflicts = conflict_rows(strategy.get("negative_keyword_conflicts"))
+        if conflicts:
+            ws.cell(row=row, column=1, value="Negative Keyword Conflicts").font = Font(bold=True, color="C00000", size=12)
+            row += 1
+
+            conflict_headers = ["Ad Group", "Keyword", "Match Type", "Negative", "Negative Match", "Source", "Severity"]
+            for col, h in enumerate(conflict_headers, 1):
+                ws.cell(row=row, column=col, value=h)
+            _style_header_row(ws, row, 1, len(conflict_headers))
+            row += 1
+
+            for c in conflicts:
+                values = [
+                    c["ad_group"], c["keyword"], c["match_type"].capitalize(), c["negative"],
+                    c["negative_match_type"].capitalize(), c["source"], c["severity"],
+                ]
+                for col, v in enumerate(values, 1):
+                    ws.cell(row=row, column=col, value=v)
+                _style_data_row(ws, row, 1, len(conflict_headers))
+                row += 1
+            row += 1
+
         # Ad Group strategy details
         ws.cell(row=row, column=1, value="Ad Group Strategies").font = Font(bold=True, color="1F4E79", size=12)
         row += 1
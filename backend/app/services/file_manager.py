@@ -1,5 +1,8 @@
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+from datetime import datetime
+import json
+import os
 import aiofiles
 
 
@@ -89,6 +92,10 @@ TITLES = {
 }
 
 
+# Bump when the checkpoint envelope or stage output shapes change incompatibly
+CHECKPOINT_VERSION = 1
+
+
 class FileManager:
     """Manages file operations for project data."""
 
@@ -99,6 +106,7 @@ class FileManager:
     def _ensure_structure(self):
         (self.project_folder / "research").mkdir(parents=True, exist_ok=True)
         (self.project_folder / "ads").mkdir(parents=True, exist_ok=True)
+        (self.project_folder / "checkpoints").mkdir(parents=True, exist_ok=True)
 
     async def save_research(self, filename: str, data: Dict[str, Any]) -> str:
         """Save research output as .md only."""
@@ -118,5 +126,53 @@ class FileManager:
             await f.write(md_content)
         return str(md_path)
 
+    async def save_usage(self, summary: Dict[str, Any]) -> str:
+        """Save the run's usage summary as .json next to the research files."""
+        json_path = self.project_folder / "research" / "usage.json"
+        async with aiofiles.open(json_path, "w", encoding="utf-8") as f:
+            await f.write(json.dumps(summary, indent=2, ensure_ascii=False))
+        return str(json_path)
+
+    async def save_run_report(self, report: Dict[str, Any]) -> str:
+        """Save the run report (stage timing, critical path) as .json next to the research files."""
+        json_path = self.project_folder / "research" / "run_report.json"
+        async with aiofiles.open(json_path, "w", encoding="utf-8") as f:
+            await f.write(json.dumps(report, indent=2, ensure_ascii=False))
+        return str(json_path)
+
+    async def save_checkpoint(self, stage: str, artifact: str, input_hash: str, data: Any) -> str:
+        """Save a stage's structured output as versioned JSON, keyed by the hash of its inputs.
+
+        Written to a temp file and renamed, so a crash never leaves a torn checkpoint.
+        """
+        envelope = {
+            "checkpoint_version": CHECKPOINT_VERSION,
+            "stage": stage,
+            "artifact": artifact,
+            "input_hash": input_hash,
+            "saved_at": datetime.utcnow().isoformat(),
+            "data": data,
+        }
+        json_path = self.project_folder / "checkpoints" / f"{artifact}.json"
+        tmp_path = json_path.with_suffix(".json.tmp")
+        async with aiofiles.open(tmp_path, "w", encoding="utf-8") as f:
+            await f.write(json.dumps(envelope, indent=2, ensure_ascii=False, default=str))
+        os.replace(tmp_path, json_path)
+        return str(json_path)
+
+    async def load_checkpoint(self, artifact: str, input_hash: str) -> Optional[Any]:
+        """A stage's saved output, if it exists, is current-version and was computed from the same inputs."""
+        json_path = self.project_folder / "checkpoints" / f"{artifact}.json"
+        if not json_path.exists():
+            return None
+        try:
+            async with aiofiles.open(json_path, "r", encoding="utf-8") as f:
+                envelope = json.loads(await f.read())
+        except (OSError, ValueError):
+            return None
+        if envelope.get("checkpoint_version") != CHECKPOINT_VERSION or envelope.get("input_hash") != input_hash:
+            return None
+        return envelope.get("data")
+
     def get_project_path(self) -> Path:
         return self.project_folder
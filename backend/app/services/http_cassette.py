@@ -0,0 +1,169 @@
+"""
+HTTP record/replay support for offline benchmarking.
+
+In ``record`` mode every exchange made by KimiClient, DataForSEOClient and the
+scrapers is appended to a per-service JSONL cassette. In ``replay`` mode the
+same clients are wired to in-process stand-in servers (see replay_server.py)
+that serve those cassettes back without touching the network.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiofiles
+import httpx
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Services whose cassettes are matched on the full URL rather than the path.
+# API stand-ins run on a different host than the real API, web pages do not.
+HOST_MATCHED_SERVICES = {"web"}
+
+ORIGINAL_URL_HEADER = "x-original-url"
+
+# Response headers worth keeping; everything else is transport noise.
+KEPT_RESPONSE_HEADERS = {"content-type", "retry-after"}
+
+# Headers describing the wire encoding. Bodies are stored and served decoded,
+# so passing these on would make httpx decode (or length-check) them again.
+ENCODING_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def decoded_headers(items: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """Response headers minus the ones that no longer match a decoded body."""
+    return [(k, v) for k, v in items if k.lower() not in ENCODING_HEADERS]
+
+
+def canonical_body(content: bytes) -> str:
+    """Normalize a request body so semantically equal JSON hashes the same."""
+    if not content:
+        return ""
+    try:
+        return json.dumps(json.loads(content), sort_keys=True, separators=(",", ":"))
+    except (ValueError, UnicodeDecodeError):
+        return hashlib.sha1(content).hexdigest()
+
+
+def exchange_key(service: str, method: str, url: str, content: bytes) -> str:
+    """Build the cassette lookup key for a request."""
+    parsed = httpx.URL(url)
+    if service in HOST_MATCHED_SERVICES:
+        target = str(parsed.copy_with(fragment=None))
+    else:
+        target = parsed.raw_path.decode("ascii")
+    raw = f"{method.upper()} {target}\n{canonical_body(content)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def cassette_path(service: str) -> Path:
+    return Path(settings.HTTP_CASSETTE_DIR) / f"{service}.jsonl"
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Transport that forwards requests and appends each exchange to a cassette."""
+
+    def __init__(self, service: str, wrapped: Optional[httpx.AsyncBaseTransport] = None):
+        self.service = service
+        self.wrapped = wrapped or httpx.AsyncHTTPTransport()
+        self.path = cassette_path(service)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = asyncio.Lock()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        started = time.monotonic()
+        response = await self.wrapped.handle_async_request(request)
+        content = await response.aread()
+        elapsed = time.monotonic() - started
+
+        entry = {
+            "service": self.service,
+            "key": exchange_key(self.service, request.method, str(request.url), body),
+            "method": request.method,
+            "url": str(request.url),
+            "request_body": canonical_body(body),
+            "status": response.status_code,
+            "headers": {
+                k: v for k, v in response.headers.items()
+                if k.lower() in KEPT_RESPONSE_HEADERS
+            },
+            "body": content.decode("utf-8", errors="replace"),
+            "elapsed": round(elapsed, 4),
+        }
+
+        try:
+            async with self._lock:
+                async with aiofiles.open(self.path, "a", encoding="utf-8") as f:
+                    await f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.warning(f"Failed to record {self.service} exchange: {e}")
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=decoded_headers(response.headers.multi_items()),
+            content=content,
+            request=request,
+        )
+
+    async def aclose(self):
+        await self.wrapped.aclose()
+
+
+class StandInTransport(httpx.AsyncBaseTransport):
+    """Transport that redirects every request to a stand-in server.
+
+    The original URL travels in a header so host-matched cassettes (web pages)
+    can still be looked up after the host has been rewritten.
+    """
+
+    def __init__(self, standin_url: str, wrapped: Optional[httpx.AsyncBaseTransport] = None):
+        self.standin = httpx.URL(standin_url)
+        self.wrapped = wrapped or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        original = str(request.url)
+        request.url = request.url.copy_with(
+            scheme=self.standin.scheme,
+            host=self.standin.host,
+            port=self.standin.port,
+        )
+        request.headers["host"] = self.standin.netloc.decode("ascii")
+        request.headers[ORIGINAL_URL_HEADER] = original
+        return await self.wrapped.handle_async_request(request)
+
+    async def aclose(self):
+        await self.wrapped.aclose()
+
+
+def get_transport(service: str) -> Optional[httpx.AsyncBaseTransport]:
+    """Return the transport a client for ``service`` should use, or None for default.
+
+    ``service`` is one of "kimi", "dataforseo" or "web".
+    """
+    mode = settings.HTTP_CASSETTE_MODE.lower()
+
+    if mode == "record":
+        return RecordingTransport(service)
+
+    if mode == "replay":
+        from app.services.replay_server import ReplayConfig, create_replay_app
+
+        app = create_replay_app(service, cassette_path(service), ReplayConfig.from_settings())
+        return httpx.ASGITransport(app=app)
+
+    if service == "web" and settings.SCRAPER_STANDIN_URL:
+        return StandInTransport(settings.SCRAPER_STANDIN_URL)
+
+    return None
+
+
+def client_kwargs(service: str) -> Dict[str, Any]:
+    """Extra httpx.AsyncClient kwargs for ``service`` (empty when not benchmarking)."""
+    transport = get_transport(service)
+    return {"transport": transport} if transport is not None else {}
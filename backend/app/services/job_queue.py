@@ -0,0 +1,367 @@
+"""
+Durable pipeline job queue.
+
+The API enqueues pipeline runs as jobs; worker processes (``python -m
+app.worker``, or the worker embedded in the API process) claim them under a
+time-limited lease and extend the lease with heartbeats while they run. The
+queue holds scheduling state only; workers record run progress and outputs
+in the project store (app.services.project_store). A job whose worker dies stops
+heartbeating, its lease expires and another worker reclaims it, resuming
+from the stage checkpoints. Failures are retried with exponential back-off
+up to JOB_MAX_ATTEMPTS.
+
+Claims enforce concurrency limits: at most one live job per project and at
+most JOB_MAX_RUNNING live jobs across all workers (0 = unlimited).
+
+The storage backend is pluggable: JOB_QUEUE_BACKEND is "sqlite" (the
+default, WAL-mode file shared by every process on the host or on a shared
+volume) or a "package.module:ClassName" implementing JobBackend.
+"""
+
+import asyncio
+import importlib
+import json
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+@dataclass
+class Job:
+    id: str
+    project_id: str
+    payload: Dict[str, Any]
+    status: str = QUEUED
+    attempts: int = 0
+    max_attempts: int = 1
+    worker_id: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+    cancel_requested: bool = False
+    error: Optional[str] = None
+    created_at: float = 0.0
+    available_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+
+class JobBackend(ABC):
+    """Job storage. ``claim`` must be atomic across every worker process that shares the backend."""
+
+    @abstractmethod
+    async def enqueue(self, project_id: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> Job:
+        pass
+
+    @abstractmethod
+    async def claim(self, worker_id: str, lease_seconds: float, max_running: int = 0) -> Optional[Job]:
+        """Lease the oldest runnable job, or return None if none is runnable under the limits."""
+        pass
+
+    @abstractmethod
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """Extend the lease. None means the lease was lost to another worker."""
+        pass
+
+    @abstractmethod
+    async def finish(self, job_id: str, worker_id: str, status: str, error: Optional[str] = None) -> bool:
+        pass
+
+    @abstractmethod
+    async def retry(
+        self, job_id: str, worker_id: str, error: str, delay: float, count_attempt: bool = True,
+    ) -> bool:
+        """Put a leased job back in the queue after ``delay`` seconds (``count_attempt=False`` on shutdown)."""
+        pass
+
+    @abstractmethod
+    async def request_cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued job outright, or flag a running one for its worker to abort."""
+        pass
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    async def latest(self, project_id: str) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    async def get_many(self, job_ids: List[str]) -> Dict[str, Job]:
+        pass
+
+    @abstractmethod
+    async def counts(self) -> Dict[str, int]:
+        pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pipeline_jobs (
+    id TEXT PRIMARY KEY,
+    project_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    worker_id TEXT,
+    lease_expires_at REAL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_pipeline_jobs_status ON pipeline_jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_pipeline_jobs_project ON pipeline_jobs (project_id, created_at);
+"""
+
+# Stay well under SQLite's bound-parameter limit
+_QUERY_CHUNK = 500
+
+_COLUMNS = (
+    "id, project_id, payload, status, attempts, max_attempts, worker_id, lease_expires_at, cancel_requested, "
+    "error, created_at, available_at, started_at, finished_at"
+)
+
+
+def _row_to_job(row: Tuple) -> Job:
+    (job_id, project_id, payload, status, attempts, max_attempts, worker_id, lease_expires_at, cancel_requested,
+     error, created_at, available_at, started_at, finished_at) = row
+    return Job(
+        id=job_id,
+        project_id=project_id,
+        payload=json.loads(payload),
+        status=status,
+        attempts=attempts,
+        max_attempts=max_attempts,
+        worker_id=worker_id,
+        lease_expires_at=lease_expires_at,
+        cancel_requested=bool(cancel_requested),
+        error=error,
+        created_at=created_at,
+        available_at=available_at,
+        started_at=started_at,
+        finished_at=finished_at,
+    )
+
+
+class SQLiteJobBackend(JobBackend):
+    """SQLite (WAL) job store; all I/O runs off the event loop."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or settings.JOB_QUEUE_DB)
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode so claims can take the write lock up front with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _transaction(self, fn, *args):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = fn(conn, *args)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return value
+        finally:
+            conn.close()
+
+    async def _run(self, fn, *args):
+        return await asyncio.to_thread(self._transaction, fn, *args)
+
+    @staticmethod
+    def _fetch(conn: sqlite3.Connection, job_id: str) -> Optional[Job]:
+        row = conn.execute(f"SELECT {_COLUMNS} FROM pipeline_jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    async def enqueue(self, project_id: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> Job:
+        now = time.time()
+        job = Job(
+            id=uuid.uuid4().hex[:12],
+            project_id=project_id,
+            payload=payload,
+            max_attempts=max(1, max_attempts or settings.JOB_MAX_ATTEMPTS),
+            created_at=now,
+            available_at=now,
+        )
+
+        def insert(conn):
+            conn.execute(
+                "INSERT INTO pipeline_jobs (id, project_id, payload, status, max_attempts, created_at, available_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.id, project_id, json.dumps(payload, default=str), QUEUED, job.max_attempts, now, now),
+            )
+
+        await self._run(insert)
+        return job
+
+    def _claim(self, conn: sqlite3.Connection, worker_id: str, lease_seconds: float, max_running: int):
+        now = time.time()
+        # Expired leases whose worker died: retry them, or close them once cancelled or out of attempts
+        conn.execute(
+            "UPDATE pipeline_jobs SET status = CASE WHEN cancel_requested = 1 THEN ? ELSE ? END, "
+            "finished_at = ?, lease_expires_at = NULL, error = COALESCE(error, 'Worker lease expired') "
+            "WHERE status = ? AND lease_expires_at < ? AND (attempts >= max_attempts OR cancel_requested = 1)",
+            (CANCELLED, FAILED, now, RUNNING, now),
+        )
+        conn.execute(
+            "UPDATE pipeline_jobs SET status = ?, worker_id = NULL, lease_expires_at = NULL "
+            "WHERE status = ? AND lease_expires_at < ?",
+            (QUEUED, RUNNING, now),
+        )
+
+        if max_running > 0:
+            running = conn.execute("SELECT COUNT(*) FROM pipeline_jobs WHERE status = ?", (RUNNING,)).fetchone()[0]
+            if running >= max_running:
+                return None
+
+        row = conn.execute(
+            f"SELECT id FROM pipeline_jobs WHERE status = ? AND available_at <= ? "
+            f"AND project_id NOT IN (SELECT project_id FROM pipeline_jobs WHERE status = ?) "
+            f"ORDER BY available_at, created_at LIMIT 1",
+            (QUEUED, now, RUNNING),
+        ).fetchone()
+        if row is None:
+            return None
+
+        conn.execute(
+            "UPDATE pipeline_jobs SET status = ?, worker_id = ?, lease_expires_at = ?, attempts = attempts + 1, "
+            "started_at = COALESCE(started_at, ?) WHERE id = ?",
+            (RUNNING, worker_id, now + lease_seconds, now, row[0]),
+        )
+        return self._fetch(conn, row[0])
+
+    async def claim(self, worker_id: str, lease_seconds: float, max_running: int = 0) -> Optional[Job]:
+        return await self._run(self._claim, worker_id, lease_seconds, max_running)
+
+    async def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        def beat(conn):
+            updated = conn.execute(
+                "UPDATE pipeline_jobs SET lease_expires_at = ? WHERE id = ? AND worker_id = ? AND status = ?",
+                (time.time() + lease_seconds, job_id, worker_id, RUNNING),
+            ).rowcount
+            return self._fetch(conn, job_id) if updated else None
+
+        return await self._run(beat)
+
+    async def finish(self, job_id: str, worker_id: str, status: str, error: Optional[str] = None) -> bool:
+        def update(conn):
+            return conn.execute(
+                "UPDATE pipeline_jobs SET status = ?, error = ?, finished_at = ?, lease_expires_at = NULL "
+                "WHERE id = ? AND worker_id = ? AND status = ?",
+                (status, error, time.time(), job_id, worker_id, RUNNING),
+            ).rowcount > 0
+
+        return await self._run(update)
+
+    async def retry(
+        self, job_id: str, worker_id: str, error: str, delay: float, count_attempt: bool = True,
+    ) -> bool:
+        def update(conn):
+            return conn.execute(
+                "UPDATE pipeline_jobs SET status = ?, worker_id = NULL, lease_expires_at = NULL, error = ?, "
+                "available_at = ?, attempts = attempts - ? WHERE id = ? AND worker_id = ? AND status = ?",
+                (QUEUED, error, time.time() + delay, 0 if count_attempt else 1, job_id, worker_id, RUNNING),
+            ).rowcount > 0
+
+        return await self._run(update)
+
+    async def request_cancel(self, job_id: str) -> Optional[Job]:
+        def update(conn):
+            conn.execute(
+                "UPDATE pipeline_jobs SET status = ?, cancel_requested = 1, finished_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED),
+            )
+            conn.execute(
+                "UPDATE pipeline_jobs SET cancel_requested = 1 WHERE id = ? AND status = ?",
+                (job_id, RUNNING),
+            )
+            return self._fetch(conn, job_id)
+
+        return await self._run(update)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self._run(self._fetch, job_id)
+
+    async def latest(self, project_id: str) -> Optional[Job]:
+        def fetch(conn):
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM pipeline_jobs WHERE project_id = ? ORDER BY created_at DESC LIMIT 1",
+                (project_id,),
+            ).fetchone()
+            return _row_to_job(row) if row else None
+
+        return await self._run(fetch)
+
+    async def get_many(self, job_ids: List[str]) -> Dict[str, Job]:
+        def fetch(conn):
+            found = {}
+            for i in range(0, len(job_ids), _QUERY_CHUNK):
+                chunk = job_ids[i:i + _QUERY_CHUNK]
+                rows = conn.execute(
+                    f"SELECT {_COLUMNS} FROM pipeline_jobs WHERE id IN ({','.join('?' * len(chunk))})", chunk,
+                ).fetchall()
+                for row in rows:
+                    job = _row_to_job(row)
+                    found[job.id] = job
+            return found
+
+        return await self._run(fetch)
+
+    async def counts(self) -> Dict[str, int]:
+        def fetch(conn):
+            return dict(conn.execute("SELECT status, COUNT(*) FROM pipeline_jobs GROUP BY status").fetchall())
+
+        return await self._run(fetch)
+
+
+def load_backend(spec: Optional[str] = None) -> JobBackend:
+    """Build the backend named by ``spec`` (default JOB_QUEUE_BACKEND)."""
+    spec = spec or settings.JOB_QUEUE_BACKEND
+    if spec == "sqlite":
+        return SQLiteJobBackend()
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"JOB_QUEUE_BACKEND must be 'sqlite' or 'module:Class', got {spec!r}")
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(backend_class, type) and issubclass(backend_class, JobBackend)):
+        raise TypeError(f"JOB_QUEUE_BACKEND {spec!r} is not a JobBackend subclass")
+    # Instantiating fails here if any JobBackend method is left unimplemented
+    return backend_class()
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential back-off before the next attempt."""
+    return settings.JOB_RETRY_DELAY * (2 ** max(attempts - 1, 0))
+
+
+job_queue: JobBackend = load_backend()
@@ -0,0 +1,80 @@
+"""
+Incremental extraction of array elements from a streaming JSON object.
+
+A streamed LLM response such as ``{"campaign_name": ..., "ad_groups": [{...},
+{...}], ...}`` is only parseable once it has fully arrived, but each element
+of ``ad_groups`` is complete as soon as its closing brace streams in.
+JsonArrayStream scans the text as it is fed, tracking string and nesting
+state, and returns every object element of one top-level array the moment it
+closes, so consumers can start work on the first element while the rest are
+still being generated.
+"""
+
+import json
+from typing import Any, List, Optional
+
+
+class JsonArrayStream:
+    """Yields the object elements of the top-level array ``key`` as text is fed in."""
+
+    def __init__(self, key: str):
+        self.key = json.dumps(key)
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.last_key_end: Optional[int] = None  # End of the last depth-1 string matching ``key``
+        self.array_depth: Optional[int] = None  # Depth of the array's elements while inside it
+        self.element_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, text: str) -> List[Any]:
+        """Consume ``text`` and return the elements completed by it, in order."""
+        self.buffer += text
+        completed = []
+        buffer = self.buffer
+        for pos in range(self.pos, len(buffer)):
+            ch = buffer[pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1 and buffer[self.string_start:pos + 1] == self.key:
+                        self.last_key_end = pos + 1
+                continue
+
+            if ch == '"':
+                self.in_string = True
+                self.string_start = pos
+            elif ch in "{[":
+                if self.array_depth is not None and self.depth == self.array_depth and ch == "{":
+                    self.element_start = pos
+                elif ch == "[" and self.depth == 1 and not self.done and self._follows_key(pos):
+                    self.array_depth = 2
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.array_depth is None:
+                    continue
+                if self.depth == self.array_depth and self.element_start is not None:
+                    try:
+                        completed.append(json.loads(buffer[self.element_start:pos + 1]))
+                    except ValueError:
+                        pass
+                    self.element_start = None
+                elif self.depth < self.array_depth:
+                    self.array_depth = None
+                    self.done = True
+        self.pos = len(buffer)
+        return completed
+
+    def _follows_key(self, pos: int) -> bool:
+        """True if the ``[`` at ``pos`` is the value of ``key`` (only a colon in between)."""
+        if self.last_key_end is None:
+            return False
+        return self.buffer[self.last_key_end:pos].strip() == ":"
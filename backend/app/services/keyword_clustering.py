@@ -0,0 +1,313 @@
+"""
+Local keyword clustering engine.
+
+Keywords are embedded as hashed character/word n-gram vectors (NumPy, L2
+normalized) and grouped by cosine similarity with a blocked leader pass
+followed by a few nearest-centroid refinement passes. This scales to tens of
+thousands of keywords in seconds, so the LLM is only needed to name and
+describe the resulting clusters from small samples.
+"""
+
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Whole-word features count for more than individual character n-grams
+WORD_WEIGHT = 2.0
+CHAR_WEIGHT = 1.0
+
+
+@dataclass
+class KeywordClusterGroup:
+    """A locally built cluster: member indices ordered by descending volume."""
+
+    members: List[int]
+    total_volume: int = 0
+    top_terms: List[str] = field(default_factory=list)
+
+
+def _features(keyword: str, ngram: int) -> List[tuple]:
+    """(feature, weight) pairs: word tokens plus padded character n-grams per word."""
+    feats = []
+    for word in _WORD_RE.findall(keyword.lower()):
+        feats.append(("w:" + word, WORD_WEIGHT))
+        padded = f" {word} "
+        if len(padded) <= ngram:
+            feats.append(("c:" + padded, CHAR_WEIGHT))
+        else:
+            feats.extend(("c:" + padded[i:i + ngram], CHAR_WEIGHT) for i in range(len(padded) - ngram + 1))
+    return feats
+
+
+def vectorize(keywords: List[str], dim: int = 512, ngram: int = 3) -> np.ndarray:
+    """Embed keywords as L2-normalized signed feature-hashing vectors (n x dim, float32)."""
+    rows, cols, vals = [], [], []
+    for i, keyword in enumerate(keywords):
+        for feat, weight in _features(keyword, ngram):
+            h = zlib.crc32(feat.encode("utf-8"))
+            rows.append(i)
+            cols.append(h % dim)
+            # Signed hashing keeps collisions from always adding up
+            vals.append(weight if (h >> 31) & 1 else -weight)
+
+    matrix = np.zeros((len(keywords), dim), dtype=np.float32)
+    if rows:
+        np.add.at(matrix, (np.asarray(rows), np.asarray(cols)), np.asarray(vals, dtype=np.float32))
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _leader_pass(vectors: np.ndarray, order: np.ndarray, threshold: float, block: int) -> np.ndarray:
+    """Assign each vector to the first leader it is similar enough to, else make it a leader.
+
+    Rows are processed in blocks: each block is matched against existing
+    centroids with one matrix product, and only the unmatched rows are walked
+    one by one against the leaders created inside the block.
+    """
+    n, dim = vectors.shape
+    assign = np.full(n, -1, dtype=np.int64)
+    sums = np.zeros((max(16, n // 8), dim), dtype=np.float32)
+    centroids = np.zeros_like(sums)
+    k = 0
+
+    for start in range(0, n, block):
+        idx = order[start:start + block]
+        rows = vectors[idx]
+
+        unmatched = np.ones(len(idx), dtype=bool)
+        if k:
+            sims = rows @ centroids[:k].T
+            best = sims.argmax(axis=1)
+            hit = sims[np.arange(len(idx)), best] >= threshold
+            assign[idx[hit]] = best[hit]
+            np.add.at(sums, best[hit], rows[hit])
+            unmatched = ~hit
+
+        block_start = k
+        for j in np.nonzero(unmatched)[0]:
+            vec = rows[j]
+            if k > block_start:
+                local = centroids[block_start:k] @ vec
+                best_local = int(local.argmax())
+                if local[best_local] >= threshold:
+                    c = block_start + best_local
+                    assign[idx[j]] = c
+                    sums[c] += vec
+                    continue
+            if k == len(sums):
+                sums = np.vstack([sums, np.zeros_like(sums)])
+                centroids = np.vstack([centroids, np.zeros_like(centroids)])
+            assign[idx[j]] = k
+            sums[k] = vec
+            centroids[k] = vec
+            k += 1
+
+        centroids[:k] = _normalize_rows(sums[:k])
+
+    return assign
+
+
+def _refine(vectors: np.ndarray, assign: np.ndarray, iterations: int, block: int) -> np.ndarray:
+    """A few k-means style passes: recompute centroids, reassign to the nearest one."""
+    for _ in range(iterations):
+        labels, assign = np.unique(assign, return_inverse=True)
+        sums = np.zeros((len(labels), vectors.shape[1]), dtype=np.float32)
+        np.add.at(sums, assign, vectors)
+        centroids = _normalize_rows(sums)
+
+        new_assign = np.empty_like(assign)
+        for start in range(0, len(vectors), block):
+            new_assign[start:start + block] = (vectors[start:start + block] @ centroids.T).argmax(axis=1)
+
+        if np.array_equal(new_assign, assign):
+            break
+        assign = new_assign
+    return assign
+
+
+def _top_terms(keywords: List[str], members: List[int], limit: int = 5) -> List[str]:
+    counts: Dict[str, int] = {}
+    for i in members:
+        for word in set(_WORD_RE.findall(keywords[i].lower())):
+            counts[word] = counts.get(word, 0) + 1
+    return [w for w, _ in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]]
+
+
+def cluster_keywords(
+    keywords: List[str],
+    volumes: Optional[List[Optional[int]]] = None,
+    threshold: float = 0.45,
+    max_clusters: int = 30,
+    min_similarity: float = 0.2,
+    dim: int = 512,
+    refine_iterations: int = 3,
+    block: int = 1024,
+) -> Dict[str, Any]:
+    """Cluster ``keywords`` locally.
+
+    Returns {"clusters": [KeywordClusterGroup, ...], "unclustered": [indices]}.
+    Clusters are ordered by total volume; at most ``max_clusters`` are kept and
+    members of dropped clusters join their nearest kept cluster when at least
+    ``min_similarity`` similar, otherwise they are reported as unclustered.
+    Results are deterministic for a given input order.
+    """
+    n = len(keywords)
+    if n == 0:
+        return {"clusters": [], "unclustered": []}
+
+    vol = np.array([v or 0 for v in (volumes or [0] * n)], dtype=np.float64)
+    vectors = vectorize(keywords, dim=dim)
+
+    # High-volume keywords become leaders, so clusters form around head terms
+    order = np.argsort(-vol, kind="stable")
+    assign = _leader_pass(vectors, order, threshold, block)
+    assign = _refine(vectors, assign, refine_iterations, block)
+
+    labels, assign = np.unique(assign, return_inverse=True)
+    totals = np.bincount(assign, weights=vol, minlength=len(labels))
+    sizes = np.bincount(assign, minlength=len(labels))
+    ranking = np.lexsort((-sizes, -totals))  # by volume, then size
+    kept = ranking[:max_clusters]
+
+    unclustered: List[int] = []
+    if len(labels) > max_clusters:
+        sums = np.zeros((len(labels), dim), dtype=np.float32)
+        np.add.at(sums, assign, vectors)
+        kept_centroids = _normalize_rows(sums[kept])
+        dropped = np.nonzero(~np.isin(assign, kept))[0]
+        if len(dropped):
+            sims = vectors[dropped] @ kept_centroids.T
+            nearest = sims.argmax(axis=1)
+            ok = sims[np.arange(len(dropped)), nearest] >= min_similarity
+            assign[dropped[ok]] = kept[nearest[ok]]
+            assign[dropped[~ok]] = -1
+            unclustered = sorted(dropped[~ok].tolist(), key=lambda i: (-vol[i], i))
+
+    groups = []
+    for label in kept:
+        members = np.nonzero(assign == label)[0].tolist()
+        if not members:
+            continue
+        members.sort(key=lambda i: (-vol[i], i))
+        groups.append(KeywordClusterGroup(
+            members=members,
+            total_volume=int(vol[members].sum()),
+            top_terms=_top_terms(keywords, members),
+        ))
+
+    groups.sort(key=lambda g: (-g.total_volume, -len(g.members), g.members[0]))
+    return {"clusters": groups, "unclustered": unclustered}
+
+
+def _name_tokens(name: str) -> set:
+    return set(_WORD_RE.findall((name or "").lower()))
+
+
+def merge_shard_clusters(
+    shard_clusters: List[List[Dict[str, Any]]],
+    name_similarity: float = 0.6,
+    member_similarity: float = 0.6,
+    dim: int = 512,
+) -> List[Dict[str, Any]]:
+    """Reconcile clusters produced independently per shard.
+
+    Two clusters are merged when their names share at least ``name_similarity``
+    of their words (Jaccard) or their member keyword centroids are at least
+    ``member_similarity`` cosine-similar. Merges are transitive. The merged
+    cluster keeps the name and theme of its highest-volume part, and keywords
+    are de-duplicated case-insensitively and ordered by volume.
+    """
+    clusters = [c for shard in shard_clusters for c in shard if c.get("keywords")]
+    n = len(clusters)
+    if n == 0:
+        return []
+
+    names = [_name_tokens(c.get("cluster_name", "")) for c in clusters]
+    members = [[kw.get("keyword", "") for kw in c["keywords"]] for c in clusters]
+    volumes = [sum(kw.get("search_volume") or 0 for kw in c["keywords"]) for c in clusters]
+
+    rows = vectorize([kw for group in members for kw in group], dim=dim)
+    owner = np.repeat(np.arange(n), [len(group) for group in members])
+    sums = np.zeros((n, dim), dtype=np.float32)
+    np.add.at(sums, owner, rows)
+    member_sims = _normalize_rows(sums) @ _normalize_rows(sums).T
+
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(n):
+        for j in range(i + 1, n):
+            union = names[i] | names[j]
+            name_sim = len(names[i] & names[j]) / len(union) if union else 0.0
+            if name_sim >= name_similarity or member_sims[i, j] >= member_similarity:
+                parent[find(j)] = find(i)
+
+    components: Dict[int, List[int]] = {}
+    for i in range(n):
+        components.setdefault(find(i), []).append(i)
+
+    merged = []
+    for parts in components.values():
+        lead = clusters[max(parts, key=lambda i: (volumes[i], -i))]
+        seen = set()
+        keywords = []
+        for i in parts:
+            for kw in clusters[i]["keywords"]:
+                key = (kw.get("keyword") or "").lower().strip()
+                if key and key not in seen:
+                    seen.add(key)
+                    keywords.append(kw)
+        keywords.sort(key=lambda kw: -(kw.get("search_volume") or 0))
+        merged.append({
+            **lead,
+            "keywords": keywords,
+        })
+
+    merged.sort(key=lambda c: -sum(kw.get("search_volume") or 0 for kw in c["keywords"]))
+    return merged
+
+
+
+def cluster_digest(clusters: List[Dict[str, Any]], keywords_per_cluster: int) -> str:
+    """One line per cluster for prompts: name, theme, totals and the top keywords by volume.
+
+    Local clustering puts every keyword in a cluster, so a single cluster can hold
+    thousands of keywords; a prompt built from the raw clusters would be cut off
+    inside the first one.
+    """
+    lines = []
+    for cluster in clusters:
+        keywords = sorted(
+            (kw for kw in cluster.get("keywords", []) if kw.get("keyword")),
+            key=lambda kw: -(kw.get("search_volume") or 0),
+        )
+        top = ", ".join(
+            f"{kw['keyword']} ({kw.get('search_volume') or 0}/mo"
+            + (f", cpc {kw['cpc']}" if kw.get("cpc") else "")
+            + ")"
+            for kw in keywords[:keywords_per_cluster]
+        )
+        lines.append(
+            f"- {cluster.get('cluster_name', '')} | theme: {cluster.get('theme', '')} | "
+            f"{len(keywords)} keywords, {sum(kw.get('search_volume') or 0 for kw in keywords)} searches/mo | "
+            f"top: {top}"
+        )
+    return "\n".join(lines)
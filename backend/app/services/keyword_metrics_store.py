@@ -0,0 +1,150 @@
+"""
+Local SQLite cache of DataForSEO keyword metrics.
+
+Volume, CPC and competition change monthly at most, so metrics are cached per
+(keyword, location_code, language) for KEYWORD_METRICS_TTL_DAYS and reused
+across runs and projects. Monthly search history is kept in its own table and
+grows as newer months are fetched.
+"""
+
+import asyncio
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.config import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS keyword_metrics (
+    keyword TEXT NOT NULL,
+    location_code INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    search_volume INTEGER,
+    cpc REAL,
+    competition REAL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (keyword, location_code, language)
+);
+CREATE TABLE IF NOT EXISTS keyword_monthly_searches (
+    keyword TEXT NOT NULL,
+    location_code INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    search_volume INTEGER,
+    PRIMARY KEY (keyword, location_code, language, year, month)
+);
+"""
+
+# Stay well under SQLite's bound-parameter limit
+_QUERY_CHUNK = 500
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join(keyword.lower().split())
+
+
+class KeywordMetricsStore:
+    """SQLite-backed keyword metrics cache; all I/O runs off the event loop."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or settings.KEYWORD_METRICS_DB)
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _get_many(self, keywords: List[str], location_code: int, language: str) -> Dict[str, Dict[str, Any]]:
+        cutoff = time.time() - settings.KEYWORD_METRICS_TTL_DAYS * 86400
+        found: Dict[str, Dict[str, Any]] = {}
+        conn = self._connect()
+        try:
+            for i in range(0, len(keywords), _QUERY_CHUNK):
+                chunk = keywords[i:i + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT keyword, search_volume, cpc, competition FROM keyword_metrics "
+                    f"WHERE location_code = ? AND language = ? AND fetched_at >= ? "
+                    f"AND keyword IN ({placeholders})",
+                    [location_code, language, cutoff, *chunk],
+                ).fetchall()
+                for keyword, volume, cpc, competition in rows:
+                    found[keyword] = {
+                        "keyword": keyword,
+                        "search_volume": volume,
+                        "cpc": cpc,
+                        "competition": competition,
+                    }
+        finally:
+            conn.close()
+        return found
+
+    def _put_many(self, items: Iterable[Dict[str, Any]], location_code: int, language: str):
+        now = time.time()
+        metrics_rows = []
+        history_rows = []
+        for item in items:
+            keyword = normalize_keyword(item.get("keyword") or "")
+            if not keyword:
+                continue
+            metrics_rows.append((
+                keyword, location_code, language,
+                item.get("search_volume"), item.get("cpc"), item.get("competition"), now,
+            ))
+            for month in item.get("monthly_searches") or []:
+                if month.get("year") and month.get("month"):
+                    history_rows.append((
+                        keyword, location_code, language,
+                        month["year"], month["month"], month.get("search_volume"),
+                    ))
+
+        if not metrics_rows:
+            return
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO keyword_metrics VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    metrics_rows,
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO keyword_monthly_searches VALUES (?, ?, ?, ?, ?, ?)",
+                    history_rows,
+                )
+        finally:
+            conn.close()
+
+    def _history(self, keyword: str, location_code: int, language: str) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT year, month, search_volume FROM keyword_monthly_searches "
+                "WHERE keyword = ? AND location_code = ? AND language = ? ORDER BY year, month",
+                (normalize_keyword(keyword), location_code, language),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [{"year": y, "month": m, "search_volume": v} for y, m, v in rows]
+
+    async def get_many(self, keywords: List[str], location_code: int, language: str) -> Dict[str, Dict[str, Any]]:
+        """Fresh cached metrics for ``keywords`` (normalized), keyed by normalized keyword."""
+        return await asyncio.to_thread(self._get_many, keywords, location_code, language)
+
+    async def put_many(self, items: List[Dict[str, Any]], location_code: int, language: str):
+        """Upsert metrics (and any ``monthly_searches`` history) for ``items``."""
+        await asyncio.to_thread(self._put_many, items, location_code, language)
+
+    async def monthly_history(self, keyword: str, location_code: int, language: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._history, keyword, location_code, language)
+
+
+keyword_metrics_store = KeywordMetricsStore()
@@ -0,0 +1,223 @@
+"""
+Keyword normalization and variant grouping.
+
+"running shoes men", "men running shoes" and "men's running shoe" are the same
+search for ad group purposes. Each keyword is reduced to a signature (Unicode
+folded, possessives/plurals stemmed, stopwords dropped, tokens sorted) and a
+hash index groups variants under one canonical keyword with aggregated
+metrics. Stemming and stopwords are per language for the MARKETS languages
+(en, ms, id, th, zh); Thai and Chinese are folded but not stemmed.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+_TOKEN_RE = re.compile(r"[\w'’]+", re.UNICODE)
+_ZERO_WIDTH_RE = re.compile("[​‌‍⁠﻿]")
+_REDUPLICATION_RE = re.compile(r"^(\w+)-\1$", re.UNICODE)
+
+STOPWORDS: Dict[str, set] = {
+    "en": {"a", "an", "the", "for", "of", "to", "in", "on", "with", "and", "&"},
+    "ms": {"yang", "dan", "di", "ke", "dari", "untuk", "dengan", "the", "for", "of", "and"},
+    "id": {"yang", "dan", "di", "ke", "dari", "untuk", "dengan", "the", "for", "of", "and"},
+    "th": set(),
+    "zh": {"的"},
+}
+
+# Words where stripping a trailing "s" would be wrong
+_S_EXCEPTIONS = {
+    "news", "bus", "gas", "lens", "plus", "yes", "this", "its", "is", "was", "has",
+    "us", "vs", "series", "species", "always", "perhaps", "canvas", "atlas", "christmas",
+    "analysis", "basis", "crisis", "diagnosis", "physics", "mathematics", "economics",
+    "glasses", "pants", "jeans", "shorts", "scissors", "headphones", "earphones",
+}
+# Singular nouns ending in "ie", whose "-ies" plural must not become "-y"
+_IE_WORDS = {
+    "movie", "cookie", "hoodie", "beanie", "brownie", "smoothie", "selfie", "rookie", "zombie",
+    "calorie", "lingerie", "freebie", "goalie", "newbie", "prairie", "genie", "pixie", "cutie",
+    "indie", "foodie", "veggie", "birdie", "collie", "auntie", "bookie", "techie", "hippie",
+    "boogie", "budgie", "bootie", "onesie", "sortie", "kiddie", "doggie", "goodie", "junkie",
+    "groupie", "quickie", "rotisserie", "patisserie", "brasserie", "charcuterie", "walkie", "talkie",
+}
+_IRREGULAR = {
+    "men": "man", "women": "woman", "children": "child", "kids": "kid", "feet": "foot",
+    "teeth": "tooth", "mice": "mouse", "people": "person", "geese": "goose",
+    "mens": "man", "womens": "woman", "childrens": "child",
+}
+
+
+def fold(text: str) -> str:
+    """Unicode-fold ``text``: NFKC width folding, casefold, Latin diacritics removed.
+
+    Combining marks are only stripped from Latin letters; Thai vowels and tone
+    marks are combining characters that change meaning and are preserved.
+    """
+    if text.isascii():
+        return " ".join(text.lower().split())
+    text = unicodedata.normalize("NFKC", text)
+    text = _ZERO_WIDTH_RE.sub("", text).casefold()
+
+    out = []
+    previous_latin = False
+    for ch in unicodedata.normalize("NFD", text):
+        if unicodedata.combining(ch):
+            if previous_latin:
+                continue
+        else:
+            previous_latin = ch.isascii() or "LATIN" in unicodedata.name(ch, "")
+        out.append(ch)
+    return " ".join(unicodedata.normalize("NFC", "".join(out)).split())
+
+
+def _stem_en(token: str) -> str:
+    token = re.sub(r"['’]s?$", "", token)
+    if token in _IRREGULAR:
+        return _IRREGULAR[token]
+    if len(token) <= 3 or token in _S_EXCEPTIONS or token.endswith(("ss", "us", "is")):
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-1] if token[:-1] in _IE_WORDS else token[:-3] + "y"
+    if token.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return token[:-2]
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+# Google Ads reports competition as a level; DataForSEO Labs as a 0-1 index.
+# Levels map to the middle of their index range.
+COMPETITION_LEVELS = {"low": 0.17, "medium": 0.5, "high": 0.83}
+
+
+def competition_value(value: Any) -> Optional[float]:
+    """Competition as a 0-1 float, whether given as an index or a LOW/MEDIUM/HIGH level."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        level = COMPETITION_LEVELS.get(value.strip().lower())
+        if level is not None:
+            return level
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _stem_malay(token: str) -> str:
+    # Malay/Indonesian plurals are formed by reduplication: "buku-buku" -> "buku"
+    match = _REDUPLICATION_RE.match(token)
+    return match.group(1) if match else token
+
+
+def tokens(keyword: str, language: str = "en") -> List[str]:
+    """Folded, stemmed, stopword-free tokens of ``keyword``."""
+    folded = fold(keyword)
+    stop = STOPWORDS.get(language, STOPWORDS["en"])
+
+    if language in ("ms", "id"):
+        raw = [_stem_malay(t) for t in folded.replace("’", "'").split()]
+        raw = [t for part in raw for t in _TOKEN_RE.findall(part)]
+        # English loanwords are common in these markets
+        stemmed = [_stem_en(t) for t in raw]
+    elif language in ("th", "zh"):
+        # No reliable word boundaries: keep whitespace-separated runs as tokens
+        stemmed = [t.strip("'’") for t in folded.split()]
+    else:
+        stemmed = [_stem_en(t) for t in _TOKEN_RE.findall(folded)]
+
+    return [t for t in stemmed if t and t not in stop]
+
+
+def signature(keyword: str, language: str = "en") -> str:
+    """Order-invariant variant signature: sorted unique normalized tokens."""
+    toks = tokens(keyword, language)
+    if not toks:
+        return fold(keyword)
+    return " ".join(sorted(set(toks)))
+
+
+@dataclass
+class KeywordVariantGroup:
+    signature: str
+    items: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def canonical(self) -> Dict[str, Any]:
+        """The highest-volume variant (ties: shortest, then first seen)."""
+        return min(
+            enumerate(self.items),
+            key=lambda pair: (-(pair[1].get("search_volume") or 0), len(pair[1].get("keyword", "")), pair[0]),
+        )[1]
+
+    def merged(self) -> Dict[str, Any]:
+        """Canonical keyword with metrics aggregated across variants.
+
+        Google reports close variants with largely overlapping volume, so
+        ``search_volume`` is the maximum across variants (the sum is kept as
+        ``variant_volume_total``). CPC is volume-weighted; competition is the max,
+        after normalizing LOW/MEDIUM/HIGH levels to the 0-1 index.
+        """
+        canonical = self.canonical
+        volumes = [item.get("search_volume") for item in self.items]
+        known_volumes = [v for v in volumes if v is not None]
+
+        cpc_pairs = [(item.get("cpc"), item.get("search_volume") or 0) for item in self.items if item.get("cpc") is not None]
+        weight = sum(w for _, w in cpc_pairs)
+        if cpc_pairs:
+            cpc = sum(c * w for c, w in cpc_pairs) / weight if weight else sum(c for c, _ in cpc_pairs) / len(cpc_pairs)
+            cpc = round(cpc, 2)
+        else:
+            cpc = None
+
+        competitions = [c for c in (competition_value(item.get("competition")) for item in self.items) if c is not None]
+
+        merged = dict(canonical)
+        merged["search_volume"] = max(known_volumes) if known_volumes else None
+        merged["cpc"] = cpc
+        merged["competition"] = max(competitions) if competitions else None
+        variants = [item.get("keyword", "") for item in self.items if item is not canonical]
+        if variants:
+            merged["variants"] = sorted(set(variants) - {canonical.get("keyword", "")})
+            merged["variant_volume_total"] = sum(known_volumes)
+        return merged
+
+
+class KeywordVariantIndex:
+    """Hash index grouping keyword dicts by variant signature, in first-seen order."""
+
+    def __init__(self, language: str = "en"):
+        self.language = language
+        self.groups: Dict[str, KeywordVariantGroup] = {}
+
+    def add(self, item: Dict[str, Any]) -> Optional[str]:
+        text = (item.get("keyword") or "").strip()
+        if not text:
+            return None
+        sig = signature(text, self.language)
+        group = self.groups.get(sig)
+        if group is None:
+            group = self.groups[sig] = KeywordVariantGroup(signature=sig)
+        group.items.append(item)
+        return sig
+
+    def add_all(self, items: Iterable[Dict[str, Any]]):
+        for item in items:
+            self.add(item)
+
+    def merged(self) -> List[Dict[str, Any]]:
+        return [group.merged() for group in self.groups.values()]
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+
+def dedupe_keywords(items: Iterable[Dict[str, Any]], language: str = "en") -> List[Dict[str, Any]]:
+    """Collapse keyword variants to one canonical entry each, preserving first-seen order."""
+    index = KeywordVariantIndex(language)
+    index.add_all(items)
+    return index.merged()
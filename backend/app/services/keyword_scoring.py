@@ -0,0 +1,165 @@
+"""
+Vectorized keyword opportunity scoring.
+
+Keyword metrics are loaded once into NumPy arrays; scoring is then a handful
+of array operations and top-N selection uses ``np.argpartition``, so ranking
+50k keywords takes milliseconds. Scores combine search volume, CPC,
+competition, an intent heuristic and overlap with brand terms, with weights
+configurable per market via KEYWORD_SCORE_WEIGHTS.
+"""
+
+import re
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.services.keyword_normalizer import competition_value
+
+# Modifiers signalling purchase intent / research intent, across market languages.
+# Thai and Chinese are unsegmented, so their modifiers are matched as substrings.
+_TRANSACTIONAL_WORDS = frozenset(
+    "buy price prices pricing cost cheap deal deals discount sale shop order best review reviews "
+    "vs compare quote hire booking book near "
+    "beli harga murah diskaun diskon promo kedai toko jual terbaik tempah pesan".split()
+)
+_INFORMATIONAL_WORDS = frozenset(
+    "what how why who when meaning definition ideas tutorial guide diy free "
+    "apa bagaimana cara kenapa mengapa maksud apakah".split()
+)
+_TRANSACTIONAL_PHRASES = ("ราคา", "ซื้อ", "ถูก", "โปรโมชั่น", "ร้าน", "价格", "价钱", "购买", "便宜", "优惠", "折扣", "推荐")
+_INFORMATIONAL_PHRASES = ("อะไร", "อย่างไร", "วิธี", "ทำไม", "什么", "如何", "怎么", "为什么", "教程")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+INTENT_TRANSACTIONAL = 1.0
+INTENT_NEUTRAL = 0.5
+INTENT_INFORMATIONAL = 0.15
+
+
+@dataclass(frozen=True)
+class ScoringWeights:
+    volume: float = 0.35
+    cpc: float = 0.2
+    competition: float = 0.15  # applied to (1 - competition): easier keywords score higher
+    intent: float = 0.15
+    relevance: float = 0.15
+
+
+def weights_for_market(market_key: str) -> ScoringWeights:
+    """Default weights overridden by KEYWORD_SCORE_WEIGHTS["default"] and then [market_key]."""
+    weights = ScoringWeights()
+    known = {f.name for f in fields(ScoringWeights)}
+    for key in ("default", market_key):
+        overrides = settings.KEYWORD_SCORE_WEIGHTS.get(key) or {}
+        weights = replace(weights, **{k: float(v) for k, v in overrides.items() if k in known})
+    return weights
+
+
+def _text_features(text: str, terms: set, non_ascii_terms: List[str]) -> Tuple[float, float]:
+    """(intent, brand relevance) for one lowercased keyword."""
+    words = _WORD_RE.findall(text)
+    word_set = set(words)
+    ascii_only = text.isascii()
+
+    if not word_set.isdisjoint(_TRANSACTIONAL_WORDS) or (
+        not ascii_only and any(p in text for p in _TRANSACTIONAL_PHRASES)
+    ):
+        intent = INTENT_TRANSACTIONAL
+    elif not word_set.isdisjoint(_INFORMATIONAL_WORDS) or (
+        not ascii_only and any(p in text for p in _INFORMATIONAL_PHRASES)
+    ):
+        intent = INTENT_INFORMATIONAL
+    else:
+        intent = INTENT_NEUTRAL
+
+    relevance = 0.0
+    if terms and words:
+        hits = sum(1 for w in words if w in terms)
+        relevance = hits / len(words)
+        # Unsegmented scripts (th/zh): fall back to substring containment
+        if not hits and not ascii_only and any(t in text for t in non_ascii_terms):
+            relevance = 0.5
+    return intent, relevance
+
+
+def brand_terms(*sources: Any) -> set:
+    """Lowercased word tokens from brand names, products and seed keywords."""
+    terms = set()
+    for source in sources:
+        if isinstance(source, str):
+            source = [source]
+        for value in source or []:
+            if isinstance(value, dict):
+                value = value.get("name") or value.get("keyword") or ""
+            terms.update(w for w in _WORD_RE.findall(str(value).lower()) if len(w) > 2 or not w.isascii())
+    return terms
+
+
+class KeywordArrays:
+    """Column arrays of keyword metrics and text features, built in one pass."""
+
+    def __init__(self, keywords: List[Dict[str, Any]], terms: Optional[Iterable[str]] = None):
+        terms = set(terms or ())
+        non_ascii_terms = [t for t in terms if not t.isascii()]
+        self.volume = np.array([kw.get("search_volume") or 0 for kw in keywords], dtype=np.float64)
+        self.cpc = np.array([kw.get("cpc") or 0 for kw in keywords], dtype=np.float64)
+        competitions = [competition_value(kw.get("competition")) for kw in keywords]
+        self.competition = np.array([0.5 if c is None else c for c in competitions], dtype=np.float64)
+
+        features = [
+            _text_features((kw.get("keyword") or "").lower(), terms, non_ascii_terms)
+            for kw in keywords
+        ]
+        self.intent = np.array([f[0] for f in features], dtype=np.float64)
+        self.relevance = np.array([f[1] for f in features], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.volume)
+
+
+def _log_scaled(values: np.ndarray) -> np.ndarray:
+    scaled = np.log1p(np.clip(values, 0, None))
+    peak = scaled.max() if len(scaled) else 0.0
+    return scaled / peak if peak > 0 else scaled
+
+
+def score(arrays: KeywordArrays, weights: ScoringWeights) -> np.ndarray:
+    """Opportunity score per keyword in [0, 1] (when weights sum to 1)."""
+    competition = np.clip(arrays.competition, 0.0, 1.0)
+    return (
+        weights.volume * _log_scaled(arrays.volume)
+        + weights.cpc * _log_scaled(arrays.cpc)
+        + weights.competition * (1.0 - competition)
+        + weights.intent * arrays.intent
+        + weights.relevance * arrays.relevance
+    )
+
+
+def top_n(scores: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the ``n`` highest scores, best first (ties keep input order)."""
+    total = len(scores)
+    if n <= 0 or total == 0:
+        return np.empty(0, dtype=np.int64)
+    if n < total:
+        candidates = np.argpartition(-scores, n - 1)[:n]
+    else:
+        candidates = np.arange(total)
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def rank_keywords(
+    keywords: List[Dict[str, Any]],
+    market_key: str,
+    terms: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Score ``keywords`` for ``market_key`` and return the best ``limit`` (all if None), best first.
+
+    Each returned dict is a copy carrying an ``opportunity_score``.
+    """
+    if not keywords:
+        return []
+    scores = score(KeywordArrays(keywords, terms), weights_for_market(market_key))
+    order = top_n(scores, len(keywords) if limit is None else limit)
+    return [{**keywords[i], "opportunity_score": round(float(scores[i]), 4)} for i in order]
@@ -1,10 +1,17 @@
 from openai import AsyncOpenAI
+import httpx
 from app.config import settings
-from typing import Dict, Any, Optional, List
+from app.services.http_cassette import get_transport
+from app.services.usage_tracker import UsageRecord, kimi_cost, usage_tracker
+from app.services.singleflight import kimi_flight, request_key
+from app.services.semantic_cache import semantic_cache
+from typing import Callable, Dict, Any, Optional, List
 import json
 import asyncio
 import re
+import time
 import logging
+from types import SimpleNamespace
 
 logger = logging.getLogger(__name__)
 
@@ -72,12 +79,49 @@ def repair_json(text: str) -> str:
 class KimiClient:
     """Client for Kimi API (Moonshot AI) - OpenAI compatible."""
 
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        """``http_client`` is a shared pooled client (see client_registry); by default one is created."""
+        if http_client is None:
+            transport = get_transport("kimi")
+            http_client = httpx.AsyncClient(transport=transport) if transport else None
         self.client = AsyncOpenAI(
             api_key=settings.KIMI_API_KEY,
             base_url=settings.KIMI_API_BASE,
+            http_client=http_client,
         )
 
+    def _record_usage(
+        self,
+        model: str,
+        usage: Any,
+        started: float,
+        retry_wait: float,
+        attempts: int,
+        success: bool,
+    ):
+        """Report token usage, latency and retries for one chat call."""
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        # Moonshot reports cache hits at the top level; OpenAI-style responses nest them
+        cached_tokens = getattr(usage, "cached_tokens", None)
+        if cached_tokens is None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached_tokens = getattr(details, "cached_tokens", 0) if details else 0
+        cached_tokens = cached_tokens or 0
+
+        usage_tracker.record(UsageRecord(
+            service="kimi",
+            operation=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            cost=kimi_cost(prompt_tokens, completion_tokens, cached_tokens),
+            latency=time.monotonic() - started - retry_wait,
+            retry_wait=retry_wait,
+            attempts=attempts,
+            success=success,
+        ))
+
     async def chat(
         self,
         prompt: str,
@@ -101,6 +145,35 @@ class KimiClient:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
+        # Near-duplicate prompts from agents with a semantic cache tier reuse a stored response
+        cached, signature = await semantic_cache.lookup(model, messages)
+        if cached is not None:
+            return cached
+
+        # Identical concurrent requests (e.g. several projects for one brand) share a call
+        key = request_key("chat", model, messages, temperature, top_p, extra_body, response_format)
+        result = await kimi_flight.do(
+            key,
+            lambda: self._complete(model, messages, temperature, top_p, extra_body, response_format, max_retries),
+        )
+
+        if signature is not None:
+            await semantic_cache.store(model, signature, result)
+        return result
+
+    async def _complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        top_p: Optional[float],
+        extra_body: Optional[Dict[str, Any]],
+        response_format: str,
+        max_retries: int,
+    ) -> Dict[str, Any]:
+        """Run one chat completion with retries and parse the response."""
+        started = time.monotonic()
+        retry_wait = 0.0
         last_error = None
         for attempt in range(max_retries):
             try:
@@ -117,34 +190,94 @@ class KimiClient:
                     kwargs["extra_body"] = extra_body
 
                 response = await self.client.chat.completions.create(**kwargs)
+                self._record_usage(model, response.usage, started, retry_wait, attempt + 1, True)
 
                 content = response.choices[0].message.content
 
                 if response_format == "json":
-                    parse_attempts = [
-                        lambda c: json.loads(c),
-                        lambda c: json.loads(repair_json(c)),
-                    ]
-
-                    for parse_fn in parse_attempts:
-                        try:
-                            return parse_fn(content)
-                        except (json.JSONDecodeError, ValueError):
-                            continue
-
-                    logger.warning(f"Failed to parse JSON response. Content preview: {content[:300]}...")
-                    return {}
+                    return self._parse_json(content)
 
                 return {"text": content}
 
             except Exception as e:
                 last_error = e
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(settings.RETRY_DELAY * (2 ** attempt))
+                    wait_time = settings.RETRY_DELAY * (2 ** attempt)
+                    retry_wait += wait_time
+                    await asyncio.sleep(wait_time)
                 continue
 
+        self._record_usage(model, None, started, retry_wait, max_retries, False)
         raise last_error
 
+    def _parse_json(self, content: str) -> Dict[str, Any]:
+        parse_attempts = [
+            lambda c: json.loads(c),
+            lambda c: json.loads(repair_json(c)),
+        ]
+
+        for parse_fn in parse_attempts:
+            try:
+                return parse_fn(content)
+            except (json.JSONDecodeError, ValueError):
+                continue
+
+        logger.warning(f"Failed to parse JSON response. Content preview: {content[:300]}...")
+        return {}
+
+    async def chat_stream(
+        self,
+        prompt: str,
+        on_text: Callable[[str], None],
+        system_prompt: Optional[str] = None,
+        use_large_model: bool = False,
+        temperature: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Streamed JSON chat completion: text deltas go to ``on_text`` as they arrive.
+
+        Returns the parsed response. Streams are neither retried, coalesced nor
+        semantically cached, since ``on_text`` has already seen partial output;
+        callers fall back to chat() when a stream fails.
+        """
+        model = settings.KIMI_MODEL_THINKING if use_large_model else settings.KIMI_MODEL_STANDARD
+        if temperature is None:
+            temperature = 1.0 if use_large_model else 0.7
+
+        messages: List[Dict[str, str]] = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+
+        started = time.monotonic()
+        parts: List[str] = []
+        usage = None
+        try:
+            stream = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                response_format={"type": "json_object"},
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                for choice in chunk.choices:
+                    # Moonshot reports usage on the final choice rather than the chunk
+                    choice_usage = getattr(choice, "usage", None)
+                    if isinstance(choice_usage, dict):
+                        usage = SimpleNamespace(**choice_usage)
+                    delta = choice.delta.content if choice.delta else None
+                    if delta:
+                        parts.append(delta)
+                        on_text(delta)
+        except Exception:
+            self._record_usage(model, None, started, 0.0, 1, False)
+            raise
+        self._record_usage(model, usage, started, 0.0, 1, True)
+
+        return self._parse_json("".join(parts))
+
     async def chat_with_context(
         self,
         messages: List[Dict[str, str]],
@@ -157,10 +290,16 @@ class KimiClient:
         if use_large_model:
             temperature = 1.0
 
-        response = await self.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-        )
+        started = time.monotonic()
+        try:
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+            )
+        except Exception:
+            self._record_usage(model, None, started, 0.0, 1, False)
+            raise
+        self._record_usage(model, response.usage, started, 0.0, 1, True)
 
         return response.choices[0].message.content
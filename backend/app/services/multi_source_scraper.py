@@ -13,6 +13,7 @@ from enum import Enum
 
 import httpx
 from app.config import settings
+from app.services.http_cassette import client_kwargs
 
 
 class ResearchSource(Enum):
@@ -37,30 +38,37 @@ class DiscussionResult:
     tags: Optional[List[str]] = None
 
 
+CLIENT_OPTIONS = {
+    "timeout": 30.0,
+    "follow_redirects": True,
+    # No Connection header: httpx keeps connections alive, and HTTP/2 forbids it
+    "headers": {
+        "User-Agent": (
+            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+        ),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.5",
+        "Accept-Encoding": "gzip, deflate",
+    },
+}
+
+
 class MultiSourceScraper:
-    """Scraper for multiple research sources."""
+    """Scraper for multiple research sources.
+
+    Pass a shared ``client`` (see client_registry) to reuse pooled connections.
+    """
 
-    def __init__(self):
-        self.client: Optional[httpx.AsyncClient] = None
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client: Optional[httpx.AsyncClient] = client
+        self.owns_client = client is None
         self._lock = asyncio.Lock()
 
     async def _ensure_client(self):
         async with self._lock:
             if self.client is None:
-                self.client = httpx.AsyncClient(
-                    timeout=30.0,
-                    follow_redirects=True,
-                    headers={
-                        "User-Agent": (
-                            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                        ),
-                        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                        "Accept-Language": "en-US,en;q=0.5",
-                        "Accept-Encoding": "gzip, deflate",
-                        "Connection": "keep-alive",
-                    }
-                )
+                self.client = httpx.AsyncClient(**CLIENT_OPTIONS, **client_kwargs("web"))
 
     async def search_all_sources(
         self,
@@ -374,6 +382,6 @@ class MultiSourceScraper:
         return "\n".join(sections)
 
     async def close(self):
-        """Close the HTTP client."""
-        if self.client:
+        """Close the HTTP client (a borrowed one is left open)."""
+        if self.client and self.owns_client:
             await self.client.aclose()
@@ -0,0 +1,254 @@
+"""
+Negative keyword conflict detection.
+
+Negatives suggested by the clustering and strategy prompts can block positive
+keywords they were never checked against. All negatives are compiled into one
+Aho-Corasick automaton over folded text, and every positive keyword is scanned
+once, so a check is linear in the total keyword text plus matches.
+
+Negative match types follow Google Ads semantics (negatives do not match
+close variants):
+    broad   ``running``      every term appears in the keyword, any order
+    phrase  ``"running"``    the terms appear contiguously, in order
+    exact   ``[running]``    the keyword is exactly the terms
+
+Word boundaries are only enforced for scripts written with spaces; Thai and
+CJK negatives match anywhere inside the keyword.
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.services.keyword_normalizer import fold
+
+
+@dataclass(frozen=True)
+class NegativeKeyword:
+    text: str
+    match_type: str  # broad | phrase | exact
+    source: str
+    normalized: str
+
+
+def parse_negative(raw: Any, source: str) -> Optional[NegativeKeyword]:
+    """Parse ``word``, ``"phrase"``, ``[exact]`` (or a dict with keyword/match_type) into a NegativeKeyword."""
+    match_type = None
+    if isinstance(raw, dict):
+        match_type = (raw.get("match_type") or "").lower() or None
+        raw = raw.get("keyword") or raw.get("text") or ""
+    text = str(raw).strip().lstrip("-").strip()
+
+    if text.startswith("[") and text.endswith("]"):
+        text, match_type = text[1:-1], match_type or "exact"
+    elif len(text) > 1 and text[0] in "\"“" and text[-1] in "\"”":
+        text, match_type = text[1:-1], match_type or "phrase"
+
+    if match_type not in ("broad", "phrase", "exact"):
+        match_type = "broad"
+    normalized = fold(text)
+    if not normalized:
+        return None
+    return NegativeKeyword(text=text, match_type=match_type, source=source, normalized=normalized)
+
+
+def _unsegmented(ch: str) -> bool:
+    """True for scripts written without spaces between words (Thai, Lao, Myanmar, Khmer, CJK)."""
+    o = ord(ch)
+    return (
+        0x0E00 <= o <= 0x0EFF
+        or 0x1000 <= o <= 0x109F
+        or 0x1780 <= o <= 0x17FF
+        or (o >= 0x2E80 and not 0xAC00 <= o <= 0xD7AF)
+    )
+
+
+_WORD_SPAN_RE = re.compile(r"[\w'’]+", re.UNICODE)
+
+
+def _boundaries(text: str) -> Tuple[Set[int], Set[int]]:
+    """Positions where a match may start and end: word edges, or any position inside unsegmented script."""
+    starts: Set[int] = set()
+    ends: Set[int] = set()
+    for m in _WORD_SPAN_RE.finditer(text):
+        starts.add(m.start())
+        ends.add(m.end())
+    if not text.isascii():
+        for i, ch in enumerate(text):
+            if _unsegmented(ch):
+                starts.update((i, i + 1))
+                ends.update((i, i + 1))
+    return starts, ends
+
+
+class _AhoCorasick:
+    """Character-level Aho-Corasick automaton mapping patterns to payloads."""
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[Tuple[int, Any]]] = [[]]
+
+    def add(self, pattern: str, payload: Any):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append((len(pattern), payload))
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def scan(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """Yield (start, end, payload) for every pattern occurrence in ``text``."""
+        node = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, payload in out[node]:
+                yield i + 1 - length, i + 1, payload
+
+
+class NegativeKeywordIndex:
+    """All negatives compiled for single-pass matching against positive keywords."""
+
+    def __init__(self, negatives: Iterable[NegativeKeyword]):
+        self.negatives: List[NegativeKeyword] = []
+        self.exact: Dict[str, List[int]] = {}
+        # Broad negatives: number of distinct terms that must all be found
+        self.broad_terms: Dict[int, int] = {}
+        self.automaton = _AhoCorasick()
+
+        seen = set()
+        for neg in negatives:
+            key = (neg.normalized, neg.match_type)
+            if key in seen:
+                continue
+            seen.add(key)
+            nid = len(self.negatives)
+            self.negatives.append(neg)
+            if neg.match_type == "exact":
+                self.exact.setdefault(neg.normalized, []).append(nid)
+            elif neg.match_type == "phrase":
+                self.automaton.add(neg.normalized, (nid, 0))
+            else:
+                terms = sorted(set(neg.normalized.split()))
+                self.broad_terms[nid] = len(terms)
+                for t, term in enumerate(terms):
+                    self.automaton.add(term, (nid, t))
+        self.automaton.build()
+
+    def __len__(self) -> int:
+        return len(self.negatives)
+
+    def matches(self, keyword: str) -> List[NegativeKeyword]:
+        """Negatives that would block ``keyword`` if it were searched verbatim."""
+        text = fold(keyword)
+        if not text:
+            return []
+
+        hits: List[int] = list(self.exact.get(text, ()))
+        broad_found: Dict[int, Set[int]] = {}
+        starts, ends = _boundaries(text)
+        for start, end, (nid, term) in self.automaton.scan(text):
+            if start not in starts or end not in ends:
+                continue
+            if nid in self.broad_terms:
+                found = broad_found.setdefault(nid, set())
+                found.add(term)
+                if len(found) == self.broad_terms[nid]:
+                    hits.append(nid)
+            else:
+                hits.append(nid)
+
+        unique = list(dict.fromkeys(hits))
+        return [self.negatives[nid] for nid in unique]
+
+
+def _severity(keyword_match_type: str, negative: NegativeKeyword) -> str:
+    # "blocked": the keyword never serves. "partial": an exact negative only
+    # removes the keyword's verbatim query; broad and phrase keywords keep
+    # serving on their other queries.
+    if negative.match_type == "exact" and keyword_match_type in ("broad", "phrase"):
+        return "partial"
+    return "blocked"
+
+
+def _positive_keywords(strategy: Dict[str, Any], keyword_research: Dict[str, Any]) -> Iterator[Tuple[str, str, str]]:
+    """(ad group, keyword, match type) from strategy ad groups, else from keyword clusters."""
+    ad_groups = [ag for ag in strategy.get("ad_groups") or [] if isinstance(ag, dict)]
+    if ad_groups:
+        for ag in ad_groups:
+            match_types = ag.get("match_types") if isinstance(ag.get("match_types"), dict) else {}
+            for kw in ag.get("keywords") or []:
+                if isinstance(kw, dict):
+                    text = kw.get("keyword") or kw.get("text") or ""
+                    match_type = kw.get("match_type") or match_types.get(text) or "broad"
+                else:
+                    text, match_type = str(kw), match_types.get(kw, "broad")
+                yield ag.get("name", ""), text, str(match_type).lower()
+        return
+
+    for cluster in keyword_research.get("clusters") or []:
+        for kw in cluster.get("keywords") or []:
+            yield cluster.get("cluster_name", ""), kw.get("keyword", ""), str(kw.get("recommended_match_type") or "broad").lower()
+
+
+def find_negative_conflicts(strategy: Dict[str, Any], keyword_research: Dict[str, Any]) -> Dict[str, Any]:
+    """Check every campaign negative against every positive keyword, grouped by ad group."""
+    negatives = [
+        neg for neg in (
+            [parse_negative(n, "strategy") for n in strategy.get("negative_keywords") or []]
+            + [parse_negative(n, "keyword_research") for n in keyword_research.get("negative_keywords") or []]
+        )
+        if neg is not None
+    ]
+    index = NegativeKeywordIndex(negatives)
+
+    by_ad_group: Dict[str, List[Dict[str, Any]]] = {}
+    checked = 0
+    for ad_group, keyword, match_type in _positive_keywords(strategy, keyword_research):
+        checked += 1
+        for neg in index.matches(keyword):
+            by_ad_group.setdefault(ad_group, []).append({
+                "ad_group": ad_group,
+                "keyword": keyword,
+                "match_type": match_type,
+                "negative": neg.text,
+                "negative_match_type": neg.match_type,
+                "source": neg.source,
+                "severity": _severity(match_type, neg),
+            })
+
+    return {
+        "total": sum(len(c) for c in by_ad_group.values()),
+        "negatives_checked": len(index),
+        "keywords_checked": checked,
+        "by_ad_group": by_ad_group,
+    }
+
+
+def conflict_rows(conflicts: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten find_negative_conflicts output into rows for exports."""
+    if not conflicts:
+        return []
+    return [row for rows in (conflicts.get("by_ad_group") or {}).values() for row in rows]
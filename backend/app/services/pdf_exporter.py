@@ -13,6 +13,7 @@ from reportlab.platypus import (
 )
 
 from app.config import MARKETS
+from app.services.negative_keywords import conflict_rows
 
 
 # Brand colors
@@ -502,6 +503,22 @@ class PDFExporter:
             self.story.append(Paragraph("Negative Keywords", self.styles["SubHeading"]))
             self._add_bullet_list(neg)
 
+        conflicts = conflict_rows(strategy.get("negative_keyword_conflicts"))
+        if conflicts:
+            self.story.append(Paragraph("Negative Keyword Conflicts", self.styles["SubHeading"]))
+            self._add_body(
+                f"{len(conflicts)} positive keyword(s) are blocked by campaign negatives. "
+                "Remove or narrow these negatives before launch."
+            )
+            rows = [
+                [c["ad_group"], c["keyword"], c["negative"], c["negative_match_type"].capitalize(), c["severity"].capitalize()]
+                for c in conflicts
+            ]
+            self.story.append(self._data_table(
+                ["Ad Group", "Keyword", "Negative", "Neg. Match", "Severity"], rows,
+                [page_width * 0.22, page_width * 0.3, page_width * 0.22, page_width * 0.13, page_width * 0.13],
+            ))
+
         self.story.append(PageBreak())
 
     # ------------------------------------------------------------------
@@ -1,5 +1,6 @@
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, List, Optional, Callable, Awaitable
 import asyncio
+import copy
 import logging
 from datetime import datetime
 
@@ -7,13 +8,19 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from app.models import AgentProgress, AgentStatus
-from app.config import MARKETS
+from app.models.rsa import MediaPlan
+from app.config import MARKETS, settings
 from app.services.kimi_client import KimiClient
 from app.services.scraper import WebScraper
 from app.services.multi_source_scraper import MultiSourceScraper
 from app.services.dataforseo_client import DataForSEOClient
+from app.services.client_registry import client_registry
 from app.services.excel_exporter import ExcelExporter
+from app.services.csv_exporter import CSVExporter
 from app.services.file_manager import FileManager
+from app.services.negative_keywords import find_negative_conflicts
+from app.services.usage_tracker import usage_tracker
+from app.services.dag_scheduler import DagNode, DagScheduler, NodeStatus
 
 from app.agents.landing_page_agent import LandingPageAgent
 from app.agents.competitor_agent import CompetitorAgent
@@ -23,20 +30,55 @@ from app.agents.synthesis_agent import SynthesisAgent
 from app.agents.strategy_agent import StrategyAgent
 from app.agents.rsa_agent import RSAAgent
 
+# Artifacts that depend on the target market. In a multi-market run the agents
+# reading or producing them run once per market, on ``artifact@market``.
+MARKET_ARTIFACTS = {
+    "market", "market_name", "currency",
+    "persona_research", "keyword_research", "synthesis", "strategy", "rsas",
+}
+
+
+def _scope(artifact: str, market: Optional[str]) -> str:
+    """The artifact name for ``market`` (unchanged for shared artifacts and single-market runs)."""
+    if market is None or artifact not in MARKET_ARTIFACTS:
+        return artifact
+    return f"{artifact}@{market}"
+
 
 class PipelineOrchestrator:
-    """Orchestrates the 6-stage, 7-agent pipeline."""
+    """Orchestrates the 7-agent pipeline as a dependency graph."""
 
-    def __init__(self, project_id: str, project_folder: str, status_callback: Optional[Callable] = None):
+    def __init__(
+        self,
+        project_id: str,
+        project_folder: str,
+        status_callback: Optional[Callable] = None,
+        run_deadline: Optional[float] = None,
+        stage_deadlines: Optional[Dict[str, float]] = None,
+    ):
         self.project_id = project_id
         self.project_folder = project_folder
-        self.kimi_client = KimiClient()
-        self.scraper = WebScraper()
-        self.multi_source_scraper = MultiSourceScraper()
-        self.dataforseo_client = DataForSEOClient()
+        # Clients borrow the process-wide connection pools
+        self.kimi_client = KimiClient(http_client=client_registry.client("kimi"))
+        self.scraper = WebScraper(client=client_registry.client("web"))
+        self.multi_source_scraper = MultiSourceScraper(client=client_registry.client("sources"))
+        self.dataforseo_client = DataForSEOClient(client=client_registry.client("dataforseo"))
         self.excel_exporter = ExcelExporter()
         self.file_manager = FileManager(project_folder)
         self.cancelled = False
+        self.scheduler: Optional[DagScheduler] = None
+        self.task: Optional[asyncio.Task] = None
+        self.resume = False
+        self.force = False
+        self.reused: List[str] = []
+        self.agents: Dict[str, Any] = {}
+        self.markets: List[str] = []
+        self.market_files: Dict[str, FileManager] = {}
+        # Time budgets in seconds (0 = none); stage budgets keyed by agent name or "default"
+        self.run_deadline_seconds = settings.PIPELINE_RUN_DEADLINE if run_deadline is None else run_deadline
+        self.stage_deadlines = settings.PIPELINE_STAGE_DEADLINES if stage_deadlines is None else stage_deadlines
+        self.run_deadline: Optional[float] = None
+        self.degraded: Dict[str, List[str]] = {}
         self.status_callback = status_callback
 
     def _update_agent(self, agent: str, status: str, message: str = "", progress: int = 0):
@@ -47,200 +89,336 @@ class PipelineOrchestrator:
                 progress=progress,
                 message=message,
                 started_at=datetime.utcnow() if status == "running" else None,
-                completed_at=datetime.utcnow() if status in ["completed", "failed"] else None,
+                completed_at=datetime.utcnow() if status in ["completed", "failed", "cancelled"] else None,
             )
             self.status_callback(agent_progress)
 
+    def _build_graph(self) -> List[DagNode]:
+        """One node per agent, wired by the agents' declared inputs and outputs.
+
+        In a multi-market run, brand and competitor research are shared and the
+        market-dependent agents get one copy per market, named ``Agent[market]``
+        and reading and writing ``artifact@market``. Every node works on its own
+        copy of the shared artifacts, so markets cannot leak into each other.
+        """
+
+        def node(
+            agent,
+            start_message: str,
+            finish: Callable[[Dict, Dict], Awaitable[str]],
+            prepare: Optional[Callable[[Dict], None]] = None,
+        ) -> DagNode:
+            async def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
+                input_hash = agent.cache_key(input_data)
+                if self.resume or (settings.PIPELINE_MEMOIZE and not self.force):
+                    saved = await self.file_manager.load_checkpoint(agent.output, input_hash)
+                    if saved is not None:
+                        logger.info(f"[{self.project_id}] {agent.agent_name} reused (inputs unchanged)")
+                        self.reused.append(agent.agent_name)
+                        message = await finish(saved, input_data)
+                        self._update_agent(agent.agent_name, "completed", f"{message} (reused)", 100)
+                        return saved
+
+                logger.info(f"[{self.project_id}] Starting {agent.agent_name}")
+                self._update_agent(agent.agent_name, "running", start_message, 10)
+                if prepare is not None:
+                    prepare(input_data)
+                result = await self._run_within_deadline(agent, input_data)
+                message = await finish(result, input_data)
+                if agent.agent_name in self.degraded:
+                    # Degraded output is not checkpointed, so the next run recomputes it in full
+                    message = f"{message} (degraded)"
+                else:
+                    await self.file_manager.save_checkpoint(agent.agent_name, agent.output, input_hash, result)
+                self._update_agent(agent.agent_name, "completed", message, 100)
+                return result
+            self.agents[agent.agent_name] = agent
+            return DagNode.for_agent(agent, run)
+
+        async def brand_done(brand_research, _):
+            await self.file_manager.save_research("brand_research", brand_research)
+            return f"Brand: {brand_research.get('brand_name', 'Unknown')}"
+
+        async def competitors_done(competitor_research, _):
+            await self.file_manager.save_research("competitor_research", competitor_research)
+            return f"Analyzed {len(competitor_research.get('competitors', []))} competitor(s)"
+
+        nodes = [
+            node(LandingPageAgent(self.project_id, self.kimi_client, self.scraper),
+                 "Crawling landing page URL(s)...", brand_done),
+            node(CompetitorAgent(self.project_id, self.kimi_client, self.scraper),
+                 "Analyzing competitors...", competitors_done),
+        ]
+        for market in self.markets:
+            nodes.extend(self._market_nodes(market if self.multi_market else None, node))
+        return nodes
+
+    def _market_nodes(self, market: Optional[str], node: Callable[..., DagNode]) -> List[DagNode]:
+        """Nodes for the market-dependent agents; ``market`` is None in a single-market run."""
+        files = self.file_manager if market is None else self.market_files[market]
+
+        async def personas_done(persona_research, _):
+            await files.save_research("persona_research", persona_research)
+            return f"Created {len(persona_research.get('personas', []))} persona(s)"
+
+        async def keywords_done(keyword_research, _):
+            await files.save_research("keyword_research", keyword_research)
+            kw_count = keyword_research.get("total_keywords", 0)
+            return f"{kw_count} keywords in {len(keyword_research.get('clusters', []))} clusters"
+
+        async def synthesis_done(synthesis, _):
+            await files.save_research("synthesis", synthesis)
+            return "Research synthesis complete"
+
+        async def strategy_done(strategy, input_data):
+            strategy["negative_keyword_conflicts"] = find_negative_conflicts(strategy, input_data["keyword_research"])
+            await files.save_research("strategy", strategy)
+            conflict_count = strategy["negative_keyword_conflicts"]["total"]
+            if conflict_count:
+                logger.warning(f"[{self.project_id}] {conflict_count} negative keyword conflict(s) in strategy")
+            return (
+                f"Strategy: {len(strategy.get('ad_groups', []))} ad groups, "
+                f"{conflict_count} negative keyword conflict(s)"
+            )
+
+        async def rsas_done(rsas, _):
+            await files.save_ads("rsa_ads.json", rsas)
+            total_headlines = sum(len(ag.get("headlines", [])) for ag in rsas.get("ad_group_rsas", []))
+            return f"{total_headlines} headlines generated"
+
+        def scoped(agent):
+            if market is not None:
+                agent.agent_name = f"{agent.agent_name}[{market}]"
+                agent.inputs = {key: _scope(artifact, market) for key, artifact in agent.inputs.items()}
+                agent.output = _scope(agent.output, market)
+            return agent
+
+        strategy_agent = scoped(StrategyAgent(self.project_id, self.kimi_client))
+        rsa_agent = scoped(RSAAgent(self.project_id, self.kimi_client))
+
+        def speculate_rsas(input_data):
+            # RSAs for each ad group start as it streams out of StrategyAgent; RSAAgent
+            # reconciles them against the final strategy. Brand research and currency
+            # exist by now, since synthesis depends on them.
+            if not settings.RSA_SPECULATIVE:
+                return
+            # This market's copy of the shared brand research, like the copies its nodes get
+            brand_research = copy.deepcopy(self.scheduler.artifacts["brand_research"])
+            currency = self.scheduler.artifacts[_scope("currency", market)]
+            strategy_agent.on_ad_group = lambda ad_group: rsa_agent.speculate(
+                ad_group, input_data["synthesis"], brand_research, currency,
+            )
+
+        return [
+            node(scoped(PersonaAgent(self.project_id, self.kimi_client, self.multi_source_scraper)),
+                 "Researching audience personas...", personas_done),
+            node(scoped(KeywordAgent(self.project_id, self.kimi_client, self.dataforseo_client)),
+                 "Fetching keyword data from DataForSEO...", keywords_done),
+            node(scoped(SynthesisAgent(self.project_id, self.kimi_client)),
+                 "Synthesizing all research...", synthesis_done),
+            node(strategy_agent, "Building paid search strategy...", strategy_done, speculate_rsas),
+            node(rsa_agent, "Generating RSAs...", rsas_done),
+        ]
+
+    def _stage_budget(self, agent_name: str) -> Optional[float]:
+        """Seconds this stage may run: its own deadline, capped by what is left of the run's.
+
+        Per-market copies (``Agent[market]``) fall back to the deadline of ``Agent``.
+        """
+        limits = []
+        base_name = agent_name.partition("[")[0]
+        stage = self.stage_deadlines.get(
+            agent_name, self.stage_deadlines.get(base_name, self.stage_deadlines.get("default", 0)),
+        )
+        if stage and stage > 0:
+            limits.append(float(stage))
+        if self.run_deadline is not None:
+            limits.append(max(0.0, self.run_deadline - asyncio.get_running_loop().time()))
+        return min(limits) if limits else None
+
+    async def _run_within_deadline(self, agent, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Run ``agent``, switching to its fallback output if the stage budget runs out."""
+        loop = asyncio.get_running_loop()
+        budget = self._stage_budget(agent.agent_name)
+        agent.deadline = None if budget is None else loop.time() + budget
+        agent.degradations = []
+        try:
+            result = await asyncio.wait_for(agent.run_with_retry(input_data), budget)
+        except asyncio.TimeoutError:
+            if agent.deadline is None or loop.time() < agent.deadline:
+                raise  # An upstream timeout, not the stage deadline
+            result = await agent.fallback(input_data)
+            if result is None:
+                raise TimeoutError(f"{agent.agent_name} missed its {budget:.1f}s deadline and has no fallback")
+            agent.degrade(f"deadline of {budget:.1f}s passed; used fallback output")
+
+        if agent.degradations:
+            self.degraded[agent.agent_name] = list(agent.degradations)
+            logger.warning(f"[{self.project_id}] {agent.agent_name} degraded: {'; '.join(agent.degradations)}")
+        return result
+
+    def _on_node_status(self, node: DagNode):
+        # Running/completed updates carry agent-specific messages and are sent by the node itself
+        if node.status == NodeStatus.FAILED:
+            self._update_agent(node.name, "failed", f"Failed: {node.error}", 0)
+        elif node.status == NodeStatus.SKIPPED:
+            self._update_agent(node.name, "skipped", f"Skipped: {node.error or 'not run'}", 0)
+        elif node.status == NodeStatus.CANCELLED:
+            message = "Cancelled while running" if node.started_at is not None else "Cancelled before start"
+            self._update_agent(node.name, "cancelled", message, 0)
+
     async def run(
         self,
         landing_page_urls: List[str],
         market: str,
         competitor_urls: List[str],
+        resume: bool = False,
+        force: bool = False,
+        markets: Optional[List[str]] = None,
     ) -> Dict[str, Any]:
         """
-        Execute the full 6-stage pipeline.
-
-        Stage 1: LandingPageAgent (sequential)
-        Stage 2: CompetitorAgent + PersonaAgent (parallel)
-        Stage 3: KeywordAgent (sequential)
-        Stage 4: SynthesisAgent (sequential)
-        Stage 5: StrategyAgent (sequential)
-        Stage 6: RSAAgent (sequential)
+        Execute the agent graph. Each agent starts as soon as its inputs exist.
+        Agents whose checkpoint matches their cache key (inputs, prompt version,
+        model and relevant settings) are reused instead of re-run, so a re-run
+        only recomputes stages downstream of what changed, and a failed or
+        cancelled run continues from its first incomplete stage. ``force``
+        recomputes every stage (``resume`` always reuses, even when
+        PIPELINE_MEMOIZE is off).
+
+        LandingPageAgent -> CompetitorAgent, PersonaAgent
+        PersonaAgent -> KeywordAgent (overlaps CompetitorAgent)
+        Competitor + Persona + Keyword -> SynthesisAgent -> StrategyAgent -> RSAAgent
+
+        ``markets`` adds further markets to fan out to. Brand and competitor
+        research then run once, every market-dependent agent runs once per
+        market in parallel, and each market is exported on its own plus in a
+        combined workbook. The results keep the first market's outputs at the
+        top level and every market's under ``markets``.
         """
-        results = {}
-        market_config = MARKETS.get(market, MARKETS["us"])
-        market_name = market_config["name"]
-        currency = market_config["currency"]
-
-        logger.info(f"[{self.project_id}] Starting pipeline for market: {market_name}")
+        self.markets = list(dict.fromkeys([market, *(markets or [])]))
+        self.market_files = {
+            key: FileManager(str(self.file_manager.get_project_path() / "markets" / key))
+            for key in self.markets if self.multi_market
+        }
+        market_names = ", ".join(MARKETS.get(key, MARKETS["us"])["name"] for key in self.markets)
+
+        logger.info(f"[{self.project_id}] {'Resuming' if resume else 'Starting'} pipeline for market: {market_names}")
+        self.task = asyncio.current_task()
+        self.degraded = {}
+        self.run_deadline = (
+            asyncio.get_running_loop().time() + self.run_deadline_seconds if self.run_deadline_seconds > 0 else None
+        )
+        self.resume = resume
+        self.force = force
+        self.reused = []
+        usage_tracker.start_run(self.project_id)
         self._update_agent("Pipeline", "running", "Pipeline started", 0)
 
-        try:
-            # ==========================================
-            # Stage 1: Landing Page Agent
-            # ==========================================
-            logger.info(f"[{self.project_id}] Stage 1: LandingPageAgent")
-            self._update_agent("LandingPageAgent", "running", f"Crawling {len(landing_page_urls)} URL(s)...", 5)
-
-            lp_agent = LandingPageAgent(self.project_id, self.kimi_client, self.scraper)
-            brand_research = await lp_agent.run_with_retry({
-                "landing_page_urls": landing_page_urls,
-            })
-
-            brand_name = brand_research.get("brand_name", "Unknown")
-            results["brand_research"] = brand_research
-            await self.file_manager.save_research("brand_research", brand_research)
-            self._update_agent("LandingPageAgent", "completed", f"Brand: {brand_name}", 100)
-
-            if self.cancelled:
-                return results
-
-            # ==========================================
-            # Stage 2: Competitor + Persona (parallel)
-            # ==========================================
-            logger.info(f"[{self.project_id}] Stage 2: CompetitorAgent + PersonaAgent (parallel)")
-            self._update_agent("CompetitorAgent", "running", "Analyzing competitors...", 10)
-            self._update_agent("PersonaAgent", "running", "Researching audience personas...", 10)
-
-            competitor_agent = CompetitorAgent(self.project_id, self.kimi_client, self.scraper)
-            persona_agent = PersonaAgent(self.project_id, self.kimi_client, self.multi_source_scraper)
-
-            competitor_task = competitor_agent.run_with_retry({
-                "brand_research": brand_research,
-                "competitor_urls": competitor_urls,
-            })
-
-            persona_task = persona_agent.run_with_retry({
-                "brand_research": brand_research,
-                "market": market_name,
-            })
-
-            competitor_research, persona_research = await asyncio.gather(
-                competitor_task, persona_task
-            )
-
-            results["competitor_research"] = competitor_research
-            results["persona_research"] = persona_research
-            await self.file_manager.save_research("competitor_research", competitor_research)
-            await self.file_manager.save_research("persona_research", persona_research)
-
-            comp_count = len(competitor_research.get("competitors", []))
-            persona_count = len(persona_research.get("personas", []))
-            self._update_agent("CompetitorAgent", "completed", f"Analyzed {comp_count} competitor(s)", 100)
-            self._update_agent("PersonaAgent", "completed", f"Created {persona_count} persona(s)", 100)
-
-            if self.cancelled:
-                return results
-
-            # ==========================================
-            # Stage 3: Keyword Agent
-            # ==========================================
-            logger.info(f"[{self.project_id}] Stage 3: KeywordAgent")
-            self._update_agent("KeywordAgent", "running", "Fetching keyword data from DataForSEO...", 10)
-
-            keyword_agent = KeywordAgent(self.project_id, self.kimi_client, self.dataforseo_client)
-            keyword_research = await keyword_agent.run_with_retry({
-                "brand_research": brand_research,
-                "persona_research": persona_research,
-                "market": market,
-                "landing_page_urls": landing_page_urls,
-            })
-
-            results["keyword_research"] = keyword_research
-            await self.file_manager.save_research("keyword_research", keyword_research)
-
-            kw_count = keyword_research.get("total_keywords", 0)
-            cluster_count = len(keyword_research.get("clusters", []))
-            self._update_agent("KeywordAgent", "completed", f"{kw_count} keywords in {cluster_count} clusters", 100)
-
-            if self.cancelled:
-                return results
-
-            # ==========================================
-            # Stage 4: Synthesis Agent
-            # ==========================================
-            logger.info(f"[{self.project_id}] Stage 4: SynthesisAgent")
-            self._update_agent("SynthesisAgent", "running", "Synthesizing all research...", 20)
-
-            synthesis_agent = SynthesisAgent(self.project_id, self.kimi_client)
-            synthesis = await synthesis_agent.run_with_retry({
-                "brand_research": brand_research,
-                "competitor_research": competitor_research,
-                "persona_research": persona_research,
-                "keyword_research": keyword_research,
-                "market": market_name,
-            })
-
-            results["synthesis"] = synthesis
-            await self.file_manager.save_research("synthesis", synthesis)
-            self._update_agent("SynthesisAgent", "completed", "Research synthesis complete", 100)
-
-            if self.cancelled:
-                return results
-
-            # ==========================================
-            # Stage 5: Strategy Agent
-            # ==========================================
-            logger.info(f"[{self.project_id}] Stage 5: StrategyAgent")
-            self._update_agent("StrategyAgent", "running", "Building paid search strategy...", 20)
-
-            strategy_agent = StrategyAgent(self.project_id, self.kimi_client)
-            strategy = await strategy_agent.run_with_retry({
-                "synthesis": synthesis,
-                "keyword_research": keyword_research,
-                "persona_research": persona_research,
-                "market": market,
-            })
+        inputs: Dict[str, Any] = {"landing_page_urls": landing_page_urls, "competitor_urls": competitor_urls}
+        for key in self.markets:
+            scope = key if self.multi_market else None
+            market_config = MARKETS.get(key, MARKETS["us"])
+            inputs[_scope("market", scope)] = key
+            inputs[_scope("market_name", scope)] = market_config["name"]
+            inputs[_scope("currency", scope)] = market_config["currency"]
 
-            results["strategy"] = strategy
-            await self.file_manager.save_research("strategy", strategy)
+        nodes = self._build_graph()
+        self.scheduler = DagScheduler(nodes, artifacts=inputs, on_status=self._on_node_status)
+        if self.cancelled:
+            self.scheduler.cancel()
 
-            ag_count = len(strategy.get("ad_groups", []))
-            self._update_agent("StrategyAgent", "completed", f"Strategy: {ag_count} ad groups", 100)
+        results: Dict[str, Any] = {}
+        try:
+            artifacts = await self.scheduler.run()
+            results = self._collect(artifacts, nodes)
 
             if self.cancelled:
-                return results
-
-            # ==========================================
-            # Stage 6: RSA Agent
-            # ==========================================
-            logger.info(f"[{self.project_id}] Stage 6: RSAAgent")
-            self._update_agent("RSAAgent", "running", f"Generating RSAs for {ag_count} ad group(s)...", 10)
-
-            rsa_agent = RSAAgent(self.project_id, self.kimi_client)
-            rsas = await rsa_agent.run_with_retry({
-                "strategy": strategy,
-                "synthesis": synthesis,
-                "brand_research": brand_research,
-                "market": market,
-                "currency": currency,
-            })
-
-            results["rsas"] = rsas
-            await self.file_manager.save_ads("rsa_ads.json", rsas)
+                return self._cancelled(results)
 
-            total_headlines = sum(
-                len(ag.get("headlines", []))
-                for ag in rsas.get("ad_group_rsas", [])
-            )
-            self._update_agent("RSAAgent", "completed", f"{total_headlines} headlines generated", 100)
-
-            # Export Excel
-            await self._export_excel(rsas, strategy, keyword_research, brand_research, landing_page_urls, brand_name, market, currency)
+            await self._export(results, landing_page_urls)
 
             logger.info(f"[{self.project_id}] Pipeline COMPLETE!")
-            self._update_agent("Pipeline", "completed", "All agents finished successfully", 100)
+            if self.degraded:
+                message = f"All agents finished; degraded to meet deadlines: {', '.join(self.degraded)}"
+            else:
+                message = "All agents finished successfully"
+            self._update_agent("Pipeline", "completed", message, 100)
 
             return results
 
+        except asyncio.CancelledError:
+            # cancel() aborts the run task itself once the agent graph is done (e.g. mid-export)
+            if not self.cancelled:
+                raise
+            return self._cancelled(results)
+
         except Exception as e:
             logger.error(f"[{self.project_id}] Pipeline FAILED: {str(e)}")
             self._update_agent("Pipeline", "failed", f"Pipeline failed: {str(e)}", 0)
             raise
 
         finally:
+            for agent in self._rsa_agents().values():
+                agent.discard_speculation()
+            await self._save_run_report()
+            await self._save_usage()
             await self._cleanup()
 
+    @property
+    def multi_market(self) -> bool:
+        return len(self.markets) > 1
+
+    def _rsa_agents(self) -> Dict[str, RSAAgent]:
+        return {name: agent for name, agent in self.agents.items() if isinstance(agent, RSAAgent)}
+
+    def _collect(self, artifacts: Dict[str, Any], nodes: List[DagNode]) -> Dict[str, Any]:
+        """Stage outputs by artifact; in a multi-market run, per-market outputs go under ``markets``."""
+        results = {node.output: artifacts[node.output] for node in nodes if node.output in artifacts}
+        if not self.multi_market:
+            return results
+
+        per_market: Dict[str, Dict[str, Any]] = {key: {} for key in self.markets}
+        for name in list(results):
+            artifact, _, key = name.partition("@")
+            if key:
+                per_market[key][artifact] = results.pop(name)
+        # The first market stays at the top level, where single-market consumers look
+        results.update(per_market[self.markets[0]])
+        results["markets"] = per_market
+        return results
+
+    async def _export(self, results: Dict[str, Any], landing_page_urls: List[str]):
+        """Excel exports: one workbook, or one per market plus a combined workbook."""
+        brand_research = results["brand_research"]
+        brand_name = brand_research.get("brand_name", "Unknown")
+        if not self.multi_market:
+            market = self.markets[0]
+            await self._export_excel(
+                results["rsas"], results["strategy"], results["keyword_research"], brand_research,
+                landing_page_urls, brand_name, market, MARKETS.get(market, MARKETS["us"])["currency"],
+            )
+            return
+
+        plans = []
+        for key in self.markets:
+            outputs = results["markets"][key]
+            media_plan = await self._export_excel(
+                outputs["rsas"], outputs["strategy"], outputs["keyword_research"], brand_research,
+                landing_page_urls, brand_name, key, MARKETS.get(key, MARKETS["us"])["currency"],
+                output_folder=str(self.market_files[key].get_project_path()),
+            )
+            plans.append((media_plan, outputs["strategy"], outputs["keyword_research"]))
+
+        combined_path = await self.excel_exporter.export_combined(
+            plans, brand_research, str(self.file_manager.get_project_path()),
+        )
+        logger.info(f"[{self.project_id}] Combined Excel exported: {combined_path}")
+
+    def _cancelled(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        logger.info(f"[{self.project_id}] Pipeline CANCELLED with {len(results)} stage output(s)")
+        self._update_agent("Pipeline", "cancelled", f"Pipeline cancelled; kept {len(results)} stage output(s)", 0)
+        return results
+
     async def _export_excel(
         self,
         rsas: Dict,
@@ -251,9 +429,10 @@ class PipelineOrchestrator:
         brand_name: str,
         market: str,
         currency: str,
-    ):
-        """Export results to Excel workbook."""
-        from app.models.rsa import MediaPlan, AdGroupPlan, KeywordWithMatch
+        output_folder: Optional[str] = None,
+    ) -> MediaPlan:
+        """Export results to Excel workbook (in the project folder unless ``output_folder`` is given)."""
+        from app.models.rsa import AdGroupPlan, KeywordWithMatch
 
         ad_group_plans = []
         for ag_rsa in rsas.get("ad_group_rsas", []):
@@ -283,12 +462,70 @@ class PipelineOrchestrator:
             ad_groups=ad_group_plans,
         )
 
-        output_folder = str(self.file_manager.get_project_path())
+        output_folder = output_folder or str(self.file_manager.get_project_path())
         excel_path = await self.excel_exporter.export(
             media_plan, strategy, keyword_research, brand_research, output_folder,
         )
         logger.info(f"[{self.project_id}] Excel exported: {excel_path}")
 
+        conflicts_path = await CSVExporter().export_negative_conflicts(
+            strategy.get("negative_keyword_conflicts"), output_folder,
+        )
+        if conflicts_path:
+            logger.info(f"[{self.project_id}] Negative keyword conflicts exported: {conflicts_path}")
+        return media_plan
+
+    def _speculation_report(self) -> Optional[Dict[str, Any]]:
+        rsa_agents = self._rsa_agents()
+        if not self.multi_market:
+            return next((agent.reconciliation for agent in rsa_agents.values()), None)
+        return {name: agent.reconciliation for name, agent in rsa_agents.items()}
+
+    async def _save_run_report(self):
+        if self.scheduler is None:
+            return
+        try:
+            timing = self.scheduler.timing()
+            await self.file_manager.save_run_report({
+                "resumed": self.resume,
+                "forced": self.force,
+                "cancelled": self.cancelled,
+                "deadlines": {"run": self.run_deadline_seconds or None, "stages": self.stage_deadlines},
+                "degraded": self.degraded,
+                "markets": self.markets,
+                "speculative_rsa": self._speculation_report(),
+                "reused": self.reused,
+                "recomputed": [
+                    name for name, node in timing["nodes"].items()
+                    if node["status"] == NodeStatus.COMPLETED.value and name not in self.reused
+                ],
+                "prompt_versions": {
+                    name: self.agents[name].prompt_version() for name in timing["nodes"] if name in self.agents
+                },
+                "timing": timing,
+            })
+            logger.info(
+                f"[{self.project_id}] Wall time {timing['wall_seconds']}s, critical path "
+                f"{' -> '.join(timing['critical_path'])} ({timing['critical_path_seconds']}s)"
+            )
+        except Exception as e:
+            logger.warning(f"[{self.project_id}] Failed to save run report: {e}")
+
+    async def _save_usage(self):
+        try:
+            summary = usage_tracker.summarize(self.project_id)
+            await self.file_manager.save_usage(summary)
+            total = summary["total"]
+            logger.info(
+                f"[{self.project_id}] Usage: {total['calls']} calls, "
+                f"{total['prompt_tokens']}+{total['completion_tokens']} tokens, "
+                f"{total['tasks']} DataForSEO tasks, ${total['cost']:.4f}"
+            )
+        except Exception as e:
+            logger.warning(f"[{self.project_id}] Failed to save usage summary: {e}")
+        finally:
+            usage_tracker.end_run(self.project_id)
+
     async def _cleanup(self):
         try:
             await self.scraper.close()
@@ -304,4 +541,11 @@ class PipelineOrchestrator:
             pass
 
     def cancel(self):
+        """Abort the run: running agents are cancelled mid-call and nothing new starts."""
         self.cancelled = True
+        if self.scheduler is None:
+            return
+        if self.scheduler.finished_at is None:
+            self.scheduler.cancel()
+        elif self.task is not None and not self.task.done():
+            self.task.cancel()
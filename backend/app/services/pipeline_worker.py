@@ -0,0 +1,214 @@
+"""
+Pipeline worker: claims jobs from the job queue and runs their pipelines.
+
+Each worker runs up to ``concurrency`` pipelines at once, each under a lease
+that a heartbeat task extends every JOB_HEARTBEAT_INTERVAL seconds. The
+heartbeat also writes agent progress to the project store (at most every
+JOB_PROGRESS_INTERVAL seconds) and picks up cancellation requests from the
+API. Outputs and the final status go to the project store too; the queue
+only learns how the job ended. A worker that loses a lease aborts that pipeline, since another worker
+has reclaimed the job.
+
+On shutdown, running pipelines are aborted and handed back to the queue
+without counting an attempt; the next worker resumes them from their stage
+checkpoints.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.models import AgentProgress, AgentStatus, PipelineStatus
+from app.services import job_queue as jobs
+from app.services.job_queue import Job, JobBackend
+from app.services.pipeline_orchestrator import PipelineOrchestrator
+from app.services.project_store import ProjectStore, project_store
+
+logger = logging.getLogger(__name__)
+
+
+def apply_progress(status: PipelineStatus, progress: AgentProgress):
+    """Insert or replace an agent's progress entry."""
+    for i, agent in enumerate(status.agents):
+        if agent.agent == progress.agent:
+            status.agents[i] = progress
+            return
+    status.agents.append(progress)
+
+
+class JobRun:
+    """One claimed job: its orchestrator, live progress and how it ended."""
+
+    def __init__(self, job: Job, orchestrator: PipelineOrchestrator):
+        self.job = job
+        self.orchestrator = orchestrator
+        self.status = PipelineStatus(
+            project_id=job.project_id,
+            status=AgentStatus.RUNNING,
+            agents=[],
+            started_at=datetime.utcnow(),
+        )
+        self.changed = asyncio.Event()
+        self.lease_lost = False
+        self.released = False  # Handed back to the queue by a shutting-down worker
+
+    def on_progress(self, progress: AgentProgress):
+        apply_progress(self.status, progress)
+        self.changed.set()
+
+
+class PipelineWorker:
+    """Claims and runs pipeline jobs until stopped."""
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        queue: Optional[JobBackend] = None,
+        store: Optional[ProjectStore] = None,
+    ):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = max(1, concurrency or settings.WORKER_CONCURRENCY)
+        self.queue = queue or jobs.job_queue
+        self.store = store or project_store
+        self.runs: Dict[str, JobRun] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    def stop(self):
+        """Stop claiming jobs and hand running ones back to the queue."""
+        self._stopping.set()
+        self._wakeup.set()
+
+    async def run(self):
+        logger.info(f"Pipeline worker {self.worker_id} started (concurrency {self.concurrency})")
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            while len(self.tasks) < self.concurrency and not self._stopping.is_set():
+                try:
+                    job = await self.queue.claim(self.worker_id, settings.JOB_LEASE_SECONDS, settings.JOB_MAX_RUNNING)
+                except Exception as e:
+                    logger.warning(f"Worker {self.worker_id} failed to claim a job: {e}")
+                    job = None
+                if job is None:
+                    break
+                self.tasks[job.id] = asyncio.ensure_future(self._execute(job))
+                self.tasks[job.id].add_done_callback(lambda _, job_id=job.id: self._finished(job_id))
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+        for run in self.runs.values():
+            run.released = True
+            run.orchestrator.cancel()
+        if self.tasks:
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        logger.info(f"Pipeline worker {self.worker_id} stopped")
+
+    def _finished(self, job_id: str):
+        self.tasks.pop(job_id, None)
+        self.runs.pop(job_id, None)
+        self._wakeup.set()
+
+    async def _execute(self, job: Job):
+        payload = job.payload
+        config = payload["config"]
+        project_folder = payload["project_folder"]
+        os.makedirs(project_folder, exist_ok=True)
+
+        orchestrator = PipelineOrchestrator(job.project_id, project_folder)
+        run = JobRun(job, orchestrator)
+        orchestrator.status_callback = run.on_progress
+        self.runs[job.id] = run
+        # Retries pick up from the stages the failed attempt finished
+        retrying = job.attempts > 1
+        logger.info(f"Worker {self.worker_id} running job {job.id} for {job.project_id} (attempt {job.attempts})")
+
+        heartbeat = asyncio.ensure_future(self._heartbeat(run))
+        try:
+            await self.store.create_run(job.id, job.project_id, datetime.utcfromtimestamp(job.created_at))
+            results = await orchestrator.run(
+                landing_page_urls=config["landing_page_urls"],
+                market=config["market"],
+                competitor_urls=config.get("competitor_urls", []),
+                resume=payload.get("resume", False) or retrying,
+                force=payload.get("force", False) and not retrying,
+                markets=config.get("markets"),
+            )
+            error = None
+        except Exception as e:
+            results, error = None, e
+        finally:
+            heartbeat.cancel()
+
+        try:
+            await self._settle(run, results, error)
+        except Exception as e:
+            # The lease will expire and the job will be retried elsewhere
+            logger.error(f"Worker {self.worker_id} failed to record job {job.id}: {e}")
+
+    async def _settle(self, run: JobRun, results: Optional[Dict[str, Any]], error: Optional[Exception]):
+        job, status = run.job, run.status
+
+        if run.lease_lost:
+            logger.warning(f"Job {job.id} lease lost; result discarded")
+        elif run.released:
+            status.status = AgentStatus.PENDING
+            await self.store.save_progress(job.id, status)
+            await self.queue.retry(job.id, self.worker_id, "Worker shut down", 0, count_attempt=False)
+            logger.info(f"Job {job.id} handed back to the queue")
+        elif error is not None and job.attempts < job.max_attempts:
+            delay = jobs.retry_delay(job.attempts)
+            status.status = AgentStatus.PENDING
+            await self.store.save_progress(job.id, status)
+            await self.queue.retry(job.id, self.worker_id, str(error), delay)
+            logger.info(f"Job {job.id} failed (attempt {job.attempts}/{job.max_attempts}), retrying in {delay:.0f}s")
+        else:
+            if error is not None:
+                outcome = jobs.FAILED
+            elif run.orchestrator.cancelled:
+                # A cancelled run keeps the outputs of the stages that finished
+                outcome = jobs.CANCELLED
+            else:
+                outcome = jobs.COMPLETED
+            message = str(error) if error is not None else None
+            # Record the run before closing the job, so a finished job always has its outputs stored
+            await self.store.save_progress(job.id, status)
+            await self.store.finish_run(job.id, outcome, results, message, job.payload["project_folder"])
+            await self.queue.finish(job.id, self.worker_id, outcome, error=message)
+
+    async def _heartbeat(self, run: JobRun):
+        """Extend the lease, publish progress and pick up cancellation requests."""
+        while True:
+            try:
+                await asyncio.wait_for(run.changed.wait(), timeout=settings.JOB_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            run.changed.clear()
+
+            try:
+                job = await self.queue.heartbeat(run.job.id, self.worker_id, settings.JOB_LEASE_SECONDS)
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {run.job.id} failed: {e}")
+                job = run.job
+            if job is None:
+                run.lease_lost = True
+                run.orchestrator.cancel()
+                return
+            try:
+                await self.store.save_progress(job.id, run.status)
+            except Exception as e:
+                logger.warning(f"Progress write for job {job.id} failed: {e}")
+            if job.cancel_requested and not run.orchestrator.cancelled:
+                logger.info(f"Job {job.id} cancellation requested")
+                run.orchestrator.cancel()
+
+            # Throttle progress writes; a burst of agent updates becomes one write
+            await asyncio.sleep(settings.JOB_PROGRESS_INTERVAL)
@@ -0,0 +1,365 @@
+"""
+SQLite (WAL) persistence for projects, pipeline runs, agent progress,
+artifacts and batches.
+
+Every API process and pipeline worker shares one database file, so state
+survives restarts and several uvicorn workers see the same projects. Workers
+write run progress and outputs here as they go; the API reads them behind
+the project, pipeline, export and batch routes. All I/O runs off the event
+loop.
+
+The schema is versioned with ``PRAGMA user_version``: MIGRATIONS is applied
+in order on first connect, so an existing database is brought up to date by
+adding the next entry rather than editing earlier ones.
+"""
+
+import asyncio
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.models import AgentProgress, AgentStatus, PipelineStatus, ProjectStatus
+
+MIGRATIONS: List[str] = [
+    # 1: initial schema
+    """
+    CREATE TABLE IF NOT EXISTS projects (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        status TEXT NOT NULL,
+        config TEXT,
+        project_folder TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_projects_created ON projects (created_at);
+    CREATE TABLE IF NOT EXISTS runs (
+        id TEXT PRIMARY KEY,
+        project_id TEXT NOT NULL REFERENCES projects (id),
+        status TEXT NOT NULL,
+        error TEXT,
+        created_at TEXT NOT NULL,
+        started_at TEXT,
+        completed_at TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_runs_project ON runs (project_id, created_at);
+    CREATE TABLE IF NOT EXISTS agent_progress (
+        run_id TEXT NOT NULL REFERENCES runs (id),
+        agent TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        progress INTEGER NOT NULL DEFAULT 0,
+        message TEXT NOT NULL DEFAULT '',
+        started_at TEXT,
+        completed_at TEXT,
+        error TEXT,
+        PRIMARY KEY (run_id, agent)
+    );
+    CREATE TABLE IF NOT EXISTS artifacts (
+        run_id TEXT NOT NULL REFERENCES runs (id),
+        name TEXT NOT NULL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (run_id, name)
+    );
+    CREATE TABLE IF NOT EXISTS batches (
+        id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        project_id TEXT NOT NULL REFERENCES projects (id),
+        run_id TEXT NOT NULL REFERENCES runs (id),
+        name TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        PRIMARY KEY (id, position)
+    );
+    """,
+]
+
+RUN_PROJECT_STATUS = {
+    AgentStatus.PENDING.value: ProjectStatus.RUNNING,
+    AgentStatus.RUNNING.value: ProjectStatus.RUNNING,
+    AgentStatus.COMPLETED.value: ProjectStatus.COMPLETED,
+    AgentStatus.FAILED.value: ProjectStatus.FAILED,
+    AgentStatus.CANCELLED.value: ProjectStatus.CANCELLED,
+}
+
+FINISHED_RUN_STATUSES = (AgentStatus.COMPLETED.value, AgentStatus.FAILED.value, AgentStatus.CANCELLED.value)
+
+_PROJECT_COLUMNS = "id, name, status, config, project_folder, created_at, updated_at"
+
+# Stay well under SQLite's bound-parameter limit
+_QUERY_CHUNK = 500
+
+
+def _ts(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _dt(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _row_to_project(row: Tuple) -> Dict[str, Any]:
+    project_id, name, status, config, project_folder, created_at, updated_at = row
+    return {
+        "id": project_id,
+        "name": name,
+        "status": ProjectStatus(status),
+        "config": json.loads(config) if config else None,
+        "project_folder": project_folder,
+        "created_at": _dt(created_at),
+        "updated_at": _dt(updated_at),
+    }
+
+
+def _row_to_progress(row: Tuple) -> AgentProgress:
+    agent, status, progress, message, started_at, completed_at, error = row
+    return AgentProgress(
+        agent=agent,
+        status=AgentStatus(status),
+        progress=progress,
+        message=message,
+        started_at=_dt(started_at),
+        completed_at=_dt(completed_at),
+        error=error,
+    )
+
+
+class ProjectStore:
+    """SQLite-backed project and run state shared by every process."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or settings.PROJECT_DB)
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._migrate(conn)
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        """Apply pending migrations under a write lock, so concurrent processes apply each one once."""
+        conn.isolation_level = None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in filter(str.strip, script.split(";")):
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.isolation_level = ""
+
+    def _call(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        conn = self._connect()
+        try:
+            with conn:
+                return fn(conn)
+        finally:
+            conn.close()
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        return await asyncio.to_thread(self._call, fn)
+
+    # -- Projects --
+
+    async def create_project(self, project: Dict[str, Any]):
+        await self._run(lambda conn: conn.execute(
+            f"INSERT INTO projects ({_PROJECT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                project["id"], project["name"], ProjectStatus(project["status"]).value,
+                json.dumps(project["config"]) if project.get("config") else None,
+                project.get("project_folder"), _ts(project["created_at"]), _ts(project["updated_at"]),
+            ),
+        ))
+
+    async def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        row = await self._run(lambda conn: conn.execute(
+            f"SELECT {_PROJECT_COLUMNS} FROM projects WHERE id = ?", (project_id,),
+        ).fetchone())
+        return _row_to_project(row) if row else None
+
+    async def list_projects(self) -> List[Dict[str, Any]]:
+        rows = await self._run(lambda conn: conn.execute(
+            f"SELECT {_PROJECT_COLUMNS} FROM projects ORDER BY created_at",
+        ).fetchall())
+        return [_row_to_project(row) for row in rows]
+
+    async def update_project(self, project_id: str, **fields: Any):
+        """Update ``status``, ``config`` and/or ``project_folder``; ``updated_at`` is set automatically."""
+        if "config" in fields and fields["config"] is not None:
+            fields["config"] = json.dumps(fields["config"])
+        if "status" in fields:
+            fields["status"] = ProjectStatus(fields["status"]).value
+        fields["updated_at"] = _ts(datetime.utcnow())
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        await self._run(lambda conn: conn.execute(
+            f"UPDATE projects SET {assignments} WHERE id = ?", (*fields.values(), project_id),
+        ))
+
+    # -- Runs --
+
+    async def create_run(self, run_id: str, project_id: str, created_at: datetime):
+        """Record a run (a no-op if it exists) and mark its project running."""
+        def insert(conn):
+            conn.execute(
+                "INSERT OR IGNORE INTO runs (id, project_id, status, created_at) VALUES (?, ?, ?, ?)",
+                (run_id, project_id, AgentStatus.PENDING.value, _ts(created_at)),
+            )
+            conn.execute(
+                "UPDATE projects SET status = ?, updated_at = ? WHERE id = ?",
+                (ProjectStatus.RUNNING.value, _ts(datetime.utcnow()), project_id),
+            )
+
+        await self._run(insert)
+
+    async def save_progress(self, run_id: str, status: PipelineStatus):
+        """Replace an open run's status and agent progress; finished runs are left alone."""
+        def write(conn):
+            updated = conn.execute(
+                f"UPDATE runs SET status = ?, started_at = COALESCE(started_at, ?) "
+                f"WHERE id = ? AND status NOT IN ({','.join('?' * len(FINISHED_RUN_STATUSES))})",
+                (status.status.value, _ts(status.started_at), run_id, *FINISHED_RUN_STATUSES),
+            ).rowcount
+            if not updated:
+                return
+            conn.execute("DELETE FROM agent_progress WHERE run_id = ?", (run_id,))
+            conn.executemany(
+                "INSERT INTO agent_progress "
+                "(run_id, agent, position, status, progress, message, started_at, completed_at, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, agent.agent, position, agent.status.value, agent.progress, agent.message,
+                     _ts(agent.started_at), _ts(agent.completed_at), agent.error)
+                    for position, agent in enumerate(status.agents)
+                ],
+            )
+
+        await self._run(write)
+
+    async def finish_run(
+        self,
+        run_id: str,
+        status: str,
+        outputs: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        project_folder: Optional[str] = None,
+    ) -> bool:
+        """Close an open run, store its outputs as artifacts and carry its outcome over to the project.
+
+        Returns False when the run is unknown or already finished.
+        """
+        now = _ts(datetime.utcnow())
+
+        def write(conn):
+            row = conn.execute("SELECT project_id, status FROM runs WHERE id = ?", (run_id,)).fetchone()
+            if row is None or row[1] in FINISHED_RUN_STATUSES:
+                return False
+            conn.execute(
+                "UPDATE runs SET status = ?, error = ?, completed_at = ? WHERE id = ?",
+                (status, error, now, run_id),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO artifacts (run_id, name, data) VALUES (?, ?, ?)",
+                [(run_id, name, json.dumps(data, default=str)) for name, data in (outputs or {}).items()],
+            )
+            conn.execute(
+                "UPDATE projects SET status = ?, project_folder = COALESCE(?, project_folder), updated_at = ? "
+                "WHERE id = ?",
+                (RUN_PROJECT_STATUS[status].value, project_folder, now, row[0]),
+            )
+            return True
+
+        return await self._run(write)
+
+    async def latest_run(self, project_id: str) -> Optional[Dict[str, Any]]:
+        row = await self._run(lambda conn: conn.execute(
+            "SELECT id, status, error, started_at, completed_at FROM runs "
+            "WHERE project_id = ? ORDER BY created_at DESC LIMIT 1",
+            (project_id,),
+        ).fetchone())
+        if row is None:
+            return None
+        run_id, status, error, started_at, completed_at = row
+        return {
+            "id": run_id, "status": status, "error": error,
+            "started_at": _dt(started_at), "completed_at": _dt(completed_at),
+        }
+
+    async def pipeline_status(self, project_id: str, with_outputs: bool = True) -> Optional[PipelineStatus]:
+        """The project's latest run as a PipelineStatus, with its artifacts as outputs."""
+        run = await self.latest_run(project_id)
+        if run is None:
+            return None
+        agents = (await self.agent_progress([run["id"]])).get(run["id"], [])
+        outputs = await self.artifacts(run["id"]) if with_outputs else {}
+        return PipelineStatus(
+            project_id=project_id,
+            status=AgentStatus(run["status"]),
+            agents=agents,
+            started_at=run["started_at"],
+            completed_at=run["completed_at"],
+            outputs=outputs,
+        )
+
+    async def agent_progress(self, run_ids: List[str]) -> Dict[str, List[AgentProgress]]:
+        """Agent progress entries per run, in the order the agents first reported."""
+        def fetch(conn):
+            found: Dict[str, List[AgentProgress]] = {}
+            for i in range(0, len(run_ids), _QUERY_CHUNK):
+                chunk = run_ids[i:i + _QUERY_CHUNK]
+                rows = conn.execute(
+                    f"SELECT run_id, agent, status, progress, message, started_at, completed_at, error "
+                    f"FROM agent_progress WHERE run_id IN ({','.join('?' * len(chunk))}) ORDER BY run_id, position",
+                    chunk,
+                ).fetchall()
+                for run_id, *rest in rows:
+                    found.setdefault(run_id, []).append(_row_to_progress(tuple(rest)))
+            return found
+
+        return await self._run(fetch)
+
+    async def artifacts(self, run_id: str) -> Dict[str, Any]:
+        rows = await self._run(lambda conn: conn.execute(
+            "SELECT name, data FROM artifacts WHERE run_id = ?", (run_id,),
+        ).fetchall())
+        return {name: json.loads(data) for name, data in rows}
+
+    # -- Batches --
+
+    async def create_batch(self, batch_id: str, entries: List[Dict[str, str]]) -> datetime:
+        created_at = datetime.utcnow()
+        await self._run(lambda conn: conn.executemany(
+            "INSERT INTO batches (id, position, project_id, run_id, name, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (batch_id, position, entry["project_id"], entry["job_id"], entry["name"], _ts(created_at))
+                for position, entry in enumerate(entries)
+            ],
+        ))
+        return created_at
+
+    async def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._run(lambda conn: conn.execute(
+            "SELECT project_id, run_id, name, created_at FROM batches WHERE id = ? ORDER BY position", (batch_id,),
+        ).fetchall())
+        if not rows:
+            return None
+        return {
+            "id": batch_id,
+            "created_at": _dt(rows[0][3]),
+            "projects": [{"project_id": pid, "name": name, "job_id": run_id} for pid, run_id, name, _ in rows],
+        }
+
+
+project_store = ProjectStore()
@@ -0,0 +1,243 @@
+"""
+Local stand-in servers that replay recorded HTTP cassettes.
+
+Each stand-in is a small ASGI app serving one service's cassette (kimi,
+dataforseo or web) with configurable latency, injected errors and a token
+bucket rate limit. They run in-process when HTTP_CASSETTE_MODE=replay, or as
+standalone servers the clients are pointed at through KIMI_API_BASE,
+DATAFORSEO_API_BASE and SCRAPER_STANDIN_URL:
+
+    python -m app.services.replay_server kimi --port 9001 --latency lognormal:-0.5,0.4
+    python -m app.services.replay_server dataforseo --port 9002 --error-rate 0.02
+    python -m app.services.replay_server web --port 9003 --rate-limit 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from app.config import settings
+from app.services.http_cassette import (
+    HOST_MATCHED_SERVICES,
+    ORIGINAL_URL_HEADER,
+    cassette_path,
+    decoded_headers,
+    exchange_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayConfig:
+    # "recorded", "fixed:<s>", "uniform:<lo>,<hi>", "lognormal:<mu>,<sigma>" or "none"
+    latency: str = "recorded"
+    latency_scale: float = 1.0
+    error_rate: float = 0.0
+    rate_limit: float = 0.0  # requests per second, 0 disables
+    burst: int = 10
+    seed: int = 0
+    strict: bool = False  # 404 on unmatched requests instead of path fallback
+
+    @classmethod
+    def from_settings(cls) -> "ReplayConfig":
+        return cls(
+            latency=settings.REPLAY_LATENCY,
+            latency_scale=settings.REPLAY_LATENCY_SCALE,
+            error_rate=settings.REPLAY_ERROR_RATE,
+            rate_limit=settings.REPLAY_RATE_LIMIT,
+            burst=settings.REPLAY_BURST,
+            seed=settings.REPLAY_SEED,
+            strict=settings.REPLAY_STRICT,
+        )
+
+
+class LatencyModel:
+    """Draws response delays from the configured distribution."""
+
+    def __init__(self, spec: str, scale: float, rng: random.Random):
+        self.kind, _, params = spec.partition(":")
+        self.params = [float(p) for p in params.split(",") if p]
+        self.scale = scale
+        self.rng = rng
+
+    def sample(self, recorded: float) -> float:
+        if self.kind == "none":
+            delay = 0.0
+        elif self.kind == "fixed":
+            delay = self.params[0]
+        elif self.kind == "uniform":
+            delay = self.rng.uniform(self.params[0], self.params[1])
+        elif self.kind == "lognormal":
+            delay = self.rng.lognormvariate(self.params[0], self.params[1])
+        else:
+            delay = recorded
+        return max(0.0, delay * self.scale)
+
+
+class TokenBucket:
+    """Simple token bucket used to emulate upstream rate limits."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> Tuple[bool, float]:
+        """Take a token. Returns (allowed, seconds until the next token)."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True, 0.0
+        return False, (1 - self.tokens) / self.rate
+
+
+class Cassette:
+    """Recorded exchanges indexed by exact key, with per-path fallback."""
+
+    def __init__(self, service: str, path: Path):
+        self.service = service
+        self.by_key: Dict[str, List[dict]] = defaultdict(list)
+        self.by_path: Dict[str, List[dict]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    entry = json.loads(line)
+                    self.by_key[entry["key"]].append(entry)
+                    self.by_path[self._path_of(entry["method"], entry["url"])].append(entry)
+        else:
+            logger.warning(f"Cassette not found for {service}: {path}")
+
+        logger.info(f"Loaded {sum(len(v) for v in self.by_key.values())} {service} exchange(s) from {path}")
+
+    @staticmethod
+    def _path_of(method: str, url: str) -> str:
+        from httpx import URL
+
+        return f"{method.upper()} {URL(url).path}"
+
+    def _next(self, bucket: str, entries: List[dict]) -> dict:
+        # Cycle through repeated recordings in order so replays stay deterministic
+        i = self._cursor[bucket]
+        self._cursor[bucket] = i + 1
+        return entries[i % len(entries)]
+
+    def lookup(self, method: str, url: str, body: bytes, strict: bool) -> Optional[dict]:
+        key = exchange_key(self.service, method, url, body)
+        if key in self.by_key:
+            return self._next(key, self.by_key[key])
+        if strict or self.service in HOST_MATCHED_SERVICES:
+            return None
+        path = self._path_of(method, url)
+        if path in self.by_path:
+            return self._next(path, self.by_path[path])
+        return None
+
+
+def create_replay_app(service: str, path: Path, config: Optional[ReplayConfig] = None) -> FastAPI:
+    """Build an ASGI stand-in for ``service`` serving the cassette at ``path``."""
+    config = config or ReplayConfig()
+    rng = random.Random(config.seed)
+    cassette = Cassette(service, path)
+    latency = LatencyModel(config.latency, config.latency_scale, rng)
+    bucket = TokenBucket(config.rate_limit, config.burst) if config.rate_limit > 0 else None
+
+    app = FastAPI(title=f"SEM Manager replay stand-in ({service})")
+    app.state.stats = {"served": 0, "missed": 0, "errors_injected": 0, "rate_limited": 0}
+
+    @app.api_route(
+        "/{full_path:path}",
+        methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"],
+    )
+    async def replay(request: Request, full_path: str):
+        stats = app.state.stats
+
+        if bucket is not None:
+            allowed, wait = bucket.take()
+            if not allowed:
+                stats["rate_limited"] += 1
+                return JSONResponse(
+                    {"error": "rate limited by replay stand-in"},
+                    status_code=429,
+                    headers={"Retry-After": str(max(1, math.ceil(wait)))},
+                )
+
+        if config.error_rate > 0 and rng.random() < config.error_rate:
+            stats["errors_injected"] += 1
+            await asyncio.sleep(latency.sample(0.0))
+            return JSONResponse({"error": "error injected by replay stand-in"}, status_code=503)
+
+        url = request.headers.get(ORIGINAL_URL_HEADER) or str(request.url)
+        body = await request.body()
+        entry = cassette.lookup(request.method, url, body, config.strict)
+
+        if entry is None:
+            stats["missed"] += 1
+            return JSONResponse(
+                {"error": f"no recorded {service} exchange for {request.method} {url}"},
+                status_code=404,
+            )
+
+        stats["served"] += 1
+        await asyncio.sleep(latency.sample(entry.get("elapsed", 0.0)))
+        return Response(
+            content=entry["body"].encode("utf-8"),
+            status_code=entry["status"],
+            headers=dict(decoded_headers(entry.get("headers", {}).items())),
+        )
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a cassette replay stand-in server.")
+    parser.add_argument("service", choices=["kimi", "dataforseo", "web"])
+    parser.add_argument("--cassette", help="Cassette file (default: HTTP_CASSETTE_DIR/<service>.jsonl)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency", default=settings.REPLAY_LATENCY)
+    parser.add_argument("--latency-scale", type=float, default=settings.REPLAY_LATENCY_SCALE)
+    parser.add_argument("--error-rate", type=float, default=settings.REPLAY_ERROR_RATE)
+    parser.add_argument("--rate-limit", type=float, default=settings.REPLAY_RATE_LIMIT)
+    parser.add_argument("--burst", type=int, default=settings.REPLAY_BURST)
+    parser.add_argument("--seed", type=int, default=settings.REPLAY_SEED)
+    parser.add_argument("--strict", action="store_true", default=settings.REPLAY_STRICT)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = ReplayConfig(
+        latency=args.latency,
+        latency_scale=args.latency_scale,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        seed=args.seed,
+        strict=args.strict,
+    )
+    path = Path(args.cassette) if args.cassette else cassette_path(args.service)
+    uvicorn.run(create_replay_app(args.service, path, config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -6,26 +6,35 @@ import asyncio
 
 import httpx
 from app.config import settings
+from app.services.http_cassette import client_kwargs
+
+
+CLIENT_OPTIONS = {
+    "timeout": 30.0,
+    "follow_redirects": True,
+    "headers": {
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+    },
+}
 
 
 class WebScraper:
-    """Simple web scraper using HTTP requests."""
+    """Simple web scraper using HTTP requests.
+
+    Pass a shared ``client`` (see client_registry) to reuse pooled connections;
+    otherwise the scraper creates its own and closes it in close().
+    """
 
-    def __init__(self):
-        self.client: Optional[httpx.AsyncClient] = None
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client: Optional[httpx.AsyncClient] = client
+        self.owns_client = client is None
         self._lock = asyncio.Lock()
 
     async def _ensure_client(self):
         """Ensure HTTP client is initialized."""
         async with self._lock:
             if self.client is None:
-                self.client = httpx.AsyncClient(
-                    timeout=30.0,
-                    follow_redirects=True,
-                    headers={
-                        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-                    }
-                )
+                self.client = httpx.AsyncClient(**CLIENT_OPTIONS, **client_kwargs("web"))
 
     async def crawl_site(
         self,
@@ -148,6 +157,6 @@ class WebScraper:
         return h1.get_text(strip=True) if h1 else ""
 
     async def close(self):
-        """Close the HTTP client."""
-        if self.client:
+        """Close the HTTP client (a borrowed one is left open)."""
+        if self.client and self.owns_client:
             await self.client.aclose()
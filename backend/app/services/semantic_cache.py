@@ -0,0 +1,235 @@
+"""
+Near-duplicate LLM response reuse based on MinHash prompt signatures.
+
+Projects that differ only slightly (same brand, one extra landing URL) produce
+prompts that an exact-hash cache misses. For agents listed in
+SEMANTIC_CACHE_AGENTS, prompts are indexed by MinHash signature with LSH
+banding, and a stored response is reused when the estimated Jaccard similarity
+of the prompts' word shingles is at or above that agent's threshold. Every
+lookup decision is appended to an audit log.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import aiofiles
+from app.config import settings
+from app.services.usage_tracker import usage_context
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _shingles(text: str, size: int) -> Set[int]:
+    """Hash the word ``size``-grams of ``text`` to 32-bit integers."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if len(tokens) < size:
+        tokens = tokens + [""] * (size - len(tokens))
+    return {
+        int.from_bytes(
+            hashlib.blake2b(" ".join(tokens[i:i + size]).encode("utf-8"), digest_size=4).digest(),
+            "little",
+        )
+        for i in range(len(tokens) - size + 1)
+    }
+
+
+class MinHasher:
+    """Computes fixed-length MinHash signatures with universal hashing."""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingles: Set[int]) -> List[int]:
+        return [
+            min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+            for a, b in self.perms
+        ]
+
+
+def estimated_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Fraction of agreeing signature slots (an estimate of Jaccard similarity)."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class SemanticCache:
+    """MinHash/LSH index over stored prompts, scoped per (agent, model)."""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or settings.SEMANTIC_CACHE_DIR)
+        self.num_perm = settings.SEMANTIC_CACHE_NUM_PERM
+        self.bands = settings.SEMANTIC_CACHE_BANDS
+        self.rows = max(1, self.num_perm // self.bands)
+        self.hasher = MinHasher(self.num_perm)
+
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[str]] = defaultdict(set)
+        self.stats = {"lookups": 0, "reused": 0, "misses": 0, "stored": 0}
+        self._lock = asyncio.Lock()
+        self._loaded = False
+
+    @property
+    def entries_path(self) -> Path:
+        return self.cache_dir / "entries.jsonl"
+
+    @property
+    def audit_path(self) -> Path:
+        return self.cache_dir / "audit.jsonl"
+
+    def threshold_for(self, agent: str) -> Optional[float]:
+        return settings.SEMANTIC_CACHE_AGENTS.get(agent)
+
+    def _scope(self, agent: str, model: str) -> str:
+        return f"{agent}|{model}"
+
+    def _band_keys(self, scope: str, signature: List[int]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield (scope, band, tuple(signature[start:start + self.rows]))
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry["created"] > settings.SEMANTIC_CACHE_TTL_HOURS * 3600
+
+    def _index(self, entry: Dict[str, Any]):
+        self.entries[entry["id"]] = entry
+        for key in self._band_keys(entry["scope"], entry["signature"]):
+            self.buckets[key].add(entry["id"])
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.entries_path.exists():
+            return
+        with open(self.entries_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if len(entry.get("signature", [])) == self.num_perm and not self._expired(entry):
+                    self._index(entry)
+        logger.info(f"Semantic cache loaded {len(self.entries)} entries from {self.entries_path}")
+
+    def _signature(self, messages: List[Dict[str, str]]) -> List[int]:
+        text = "\n".join(m.get("content", "") for m in messages)
+        return self.hasher.signature(_shingles(text, settings.SEMANTIC_CACHE_SHINGLE_SIZE))
+
+    async def _append(self, path: Path, record: Dict[str, Any]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        async with aiofiles.open(path, "a", encoding="utf-8") as f:
+            await f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    async def lookup(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[List[int]]]:
+        """Return (reused response or None, prompt signature) for the current agent.
+
+        The signature is None when the current agent has no semantic cache tier.
+        """
+        project_id, agent = usage_context.get()
+        threshold = self.threshold_for(agent)
+        if threshold is None:
+            return None, None
+
+        signature = await asyncio.to_thread(self._signature, messages)
+        scope = self._scope(agent, model)
+
+        async with self._lock:
+            self._load()
+            self.stats["lookups"] += 1
+
+            candidates: Set[str] = set()
+            for key in self._band_keys(scope, signature):
+                candidates |= self.buckets.get(key, set())
+
+            best_id, best_score = None, 0.0
+            for entry_id in candidates:
+                entry = self.entries.get(entry_id)
+                if entry is None or self._expired(entry):
+                    continue
+                score = estimated_similarity(signature, entry["signature"])
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+
+            reused = best_id is not None and best_score >= threshold
+            self.stats["reused" if reused else "misses"] += 1
+
+            await self._append(self.audit_path, {
+                "timestamp": datetime.utcnow().isoformat(),
+                "decision": "reuse" if reused else "miss",
+                "project_id": project_id,
+                "agent": agent,
+                "model": model,
+                "threshold": threshold,
+                "similarity": round(best_score, 4),
+                "candidates": len(candidates),
+                "matched_entry": best_id,
+                "matched_project": self.entries[best_id]["project_id"] if best_id else None,
+            })
+
+        if reused:
+            logger.info(
+                f"[{project_id}] {agent} reused cached response {best_id} "
+                f"(similarity {best_score:.2f} >= {threshold})"
+            )
+            return copy.deepcopy(self.entries[best_id]["response"]), signature
+
+        return None, signature
+
+    async def store(
+        self,
+        model: str,
+        signature: List[int],
+        response: Dict[str, Any],
+    ):
+        """Index a fresh response under the current agent."""
+        if not response:
+            return
+        project_id, agent = usage_context.get()
+        entry = {
+            "id": uuid.uuid4().hex[:12],
+            "scope": self._scope(agent, model),
+            "project_id": project_id,
+            "created": time.time(),
+            "signature": signature,
+            "response": copy.deepcopy(response),
+        }
+        async with self._lock:
+            self._load()
+            self._index(entry)
+            self.stats["stored"] += 1
+            await self._append(self.entries_path, entry)
+
+    async def audit_trail(self, limit: int = 100) -> List[Dict[str, Any]]:
+        if not self.audit_path.exists():
+            return []
+        async with aiofiles.open(self.audit_path, "r", encoding="utf-8") as f:
+            lines = (await f.read()).splitlines()
+        return [json.loads(line) for line in lines[-limit:] if line.strip()]
+
+
+semantic_cache = SemanticCache()
@@ -0,0 +1,88 @@
+"""
+Request coalescing for identical in-flight upstream calls.
+
+Concurrent projects for the same brand or market often issue byte-identical
+Kimi prompts and DataForSEO tasks. A SingleFlight group lets the first caller
+for a key do the work while later callers with the same key await its result.
+Groups are process-wide so coalescing works across orchestrators.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+def request_key(*parts: Any) -> str:
+    """Canonical hash of a request's parts (dict keys sorted, unknown types stringified)."""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0, "in_flight": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` unless an identical call is in flight, then share its result.
+
+        Followers receive a deep copy so callers can mutate results freely.
+        """
+        if not settings.SINGLEFLIGHT_ENABLED:
+            return await fn()
+
+        self.stats["calls"] += 1
+
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self.stats["coalesced"] += 1
+            try:
+                result = await asyncio.shield(existing)
+            except asyncio.CancelledError:
+                # The leader was cancelled (e.g. its pipeline was); run it ourselves
+                if existing.cancelled():
+                    self.stats["coalesced"] -= 1
+                    self.stats["calls"] -= 1
+                    return await self.do(key, fn)
+                raise
+            return copy.deepcopy(result)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.stats["executions"] += 1
+        self.stats["in_flight"] = len(self._inflight)
+
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody was waiting
+            raise
+        else:
+            # Snapshot before the leader's caller can mutate the result
+            future.set_result(copy.deepcopy(result))
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            self.stats["in_flight"] = len(self._inflight)
+
+
+kimi_flight = SingleFlight("kimi")
+dataforseo_flight = SingleFlight("dataforseo")
+
+
+def singleflight_stats() -> Dict[str, Dict[str, int]]:
+    return {group.name: dict(group.stats) for group in (kimi_flight, dataforseo_flight)}
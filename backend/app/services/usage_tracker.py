@@ -0,0 +1,162 @@
+"""
+Usage accounting for Kimi and DataForSEO calls.
+
+Clients report one UsageRecord per logical call (tokens, DataForSEO tasks,
+cost, latency, retries). The project and agent are picked up from a context
+variable set by BaseAgent, so agents don't need to thread them through.
+"""
+
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from app.config import settings
+
+# (project_id, agent_name) of the code currently running
+usage_context: contextvars.ContextVar[Tuple[str, str]] = contextvars.ContextVar(
+    "usage_context", default=("", "")
+)
+
+
+@contextmanager
+def usage_scope(project_id: str, agent: str):
+    """Attribute every call made inside the block to ``project_id``/``agent``."""
+    token = usage_context.set((project_id, agent))
+    try:
+        yield
+    finally:
+        usage_context.reset(token)
+
+
+@dataclass
+class UsageRecord:
+    service: str  # "kimi" or "dataforseo"
+    operation: str  # model name or endpoint
+    project_id: str = ""
+    agent: str = ""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    tasks: int = 0
+    cost: float = 0.0
+    latency: float = 0.0
+    retry_wait: float = 0.0
+    attempts: int = 1
+    success: bool = True
+    timestamp: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+
+def kimi_cost(prompt_tokens: int, completion_tokens: int, cached_tokens: int) -> float:
+    """Estimate Kimi cost in USD from token counts and configured prices."""
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (
+        uncached * settings.KIMI_PRICE_INPUT_PER_M
+        + cached_tokens * settings.KIMI_PRICE_CACHED_INPUT_PER_M
+        + completion_tokens * settings.KIMI_PRICE_OUTPUT_PER_M
+    ) / 1_000_000
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {
+        "calls": 0,
+        "failures": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cached_tokens": 0,
+        "tasks": 0,
+        "cost": 0.0,
+        "latency": 0.0,
+        "retry_wait": 0.0,
+        "retries": 0,
+    }
+
+
+def _add(totals: Dict[str, Any], record: UsageRecord):
+    totals["calls"] += 1
+    totals["failures"] += 0 if record.success else 1
+    totals["prompt_tokens"] += record.prompt_tokens
+    totals["completion_tokens"] += record.completion_tokens
+    totals["cached_tokens"] += record.cached_tokens
+    totals["tasks"] += record.tasks
+    totals["cost"] += record.cost
+    totals["latency"] += record.latency
+    totals["retry_wait"] += record.retry_wait
+    totals["retries"] += max(record.attempts - 1, 0)
+
+
+def _rounded(totals: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(totals)
+    out["cost"] = round(out["cost"], 6)
+    out["latency"] = round(out["latency"], 3)
+    out["retry_wait"] = round(out["retry_wait"], 3)
+    out["avg_latency"] = round(totals["latency"] / totals["calls"], 3) if totals["calls"] else 0.0
+    return out
+
+
+class UsageTracker:
+    """Collects usage records per project run and aggregates them per process."""
+
+    def __init__(self):
+        self.runs: Dict[str, List[UsageRecord]] = {}
+        self.run_started: Dict[str, str] = {}
+        self.process_totals: Dict[str, Dict[str, Any]] = defaultdict(_empty_totals)
+        self.process_started = datetime.utcnow().isoformat()
+
+    def start_run(self, project_id: str):
+        """Reset the records kept for ``project_id`` at the start of a run."""
+        self.runs[project_id] = []
+        self.run_started[project_id] = datetime.utcnow().isoformat()
+
+    def end_run(self, project_id: str):
+        """Drop a finished run's records; its summary is persisted in research/usage.json."""
+        self.runs.pop(project_id, None)
+        self.run_started.pop(project_id, None)
+
+    def record(self, record: UsageRecord):
+        if not record.project_id:
+            record.project_id, record.agent = usage_context.get()
+        # Only runs in progress keep records, so memory is bounded by the active runs
+        if record.project_id in self.runs:
+            self.runs[record.project_id].append(record)
+        _add(self.process_totals[record.service], record)
+
+    def summarize(self, project_id: str) -> Dict[str, Any]:
+        """Per-run summary for a project, broken down by agent and service."""
+        records = self.runs.get(project_id, [])
+        total = _empty_totals()
+        by_agent: Dict[str, Dict[str, Any]] = defaultdict(_empty_totals)
+        by_service: Dict[str, Dict[str, Any]] = defaultdict(_empty_totals)
+
+        for r in records:
+            _add(total, r)
+            _add(by_agent[r.agent or "unattributed"], r)
+            _add(by_service[r.service], r)
+
+        return {
+            "project_id": project_id,
+            "run_started": self.run_started.get(project_id),
+            "total": _rounded(total),
+            "by_agent": {k: _rounded(v) for k, v in by_agent.items()},
+            "by_service": {k: _rounded(v) for k, v in by_service.items()},
+            "calls": [asdict(r) for r in records],
+        }
+
+    def process_summary(self) -> Dict[str, Any]:
+        """Totals for every call made by this process since startup."""
+        total = _empty_totals()
+        for service_totals in self.process_totals.values():
+            for key, value in service_totals.items():
+                total[key] += value
+
+        return {
+            "process_started": self.process_started,
+            "total": _rounded(total),
+            "by_service": {k: _rounded(v) for k, v in self.process_totals.items()},
+            "active_runs": list(self.runs.keys()),
+        }
+
+
+usage_tracker = UsageTracker()
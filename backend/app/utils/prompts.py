@@ -145,6 +145,36 @@ Organize keywords into clusters and return JSON:
 Group by search intent and theme. Prioritize commercial and transactional keywords. Each cluster should be a viable ad group with 5-15 keywords.
 """
 
+CLUSTER_NAMING_PROMPT = """
+You are a paid search keyword strategist. The keywords below have already been grouped into themed clusters. Name and describe each cluster so it can be used as an ad group.
+
+Clusters (id | total monthly volume | top keywords by volume):
+{cluster_samples}
+
+Brand Context:
+{brand_context}
+
+Market: {market}
+Currency: {currency}
+
+Return JSON:
+{{
+    "clusters": [
+        {{
+            "id": 0,
+            "cluster_name": "Descriptive cluster name (suitable as ad group name)",
+            "theme": "Brief description of the search intent theme",
+            "intent": "informational|commercial|transactional|navigational",
+            "recommended_match_type": "broad|phrase|exact"
+        }}
+    ],
+    "negative_keywords": ["Keywords to exclude from campaigns"],
+    "keyword_gaps": ["Keyword opportunities not yet covered"]
+}}
+
+Return one entry for every cluster id listed, using the same id. Base names on the sample keywords only.
+"""
+
 SYNTHESIS_PROMPT = """
 You are a senior marketing strategist synthesizing comprehensive research for a paid search campaign.
 
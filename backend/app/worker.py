@@ -0,0 +1,99 @@
+"""
+Pipeline worker entry point.
+
+    python -m app.worker --processes 4 --concurrency 2
+
+Starts N worker processes, each claiming up to ``concurrency`` pipeline jobs
+at a time from the shared job queue. Run it from the backend directory on
+one or more hosts that share the queue, and set WORKER_EMBEDDED=false on the
+API so it only enqueues jobs and reports their status. Crashed worker
+processes are restarted; SIGINT/SIGTERM hands running jobs back to the
+queue before exiting.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+from typing import List
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def serve(concurrency: int):
+    """Run one worker in this process until SIGINT/SIGTERM."""
+    from app.services.client_registry import client_registry
+    from app.services.pipeline_worker import PipelineWorker
+
+    worker = PipelineWorker(concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    await client_registry.start()
+    try:
+        await worker.run()
+    finally:
+        await client_registry.close()
+
+
+def _process_main(concurrency: int):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(name)s: %(message)s")
+    asyncio.run(serve(concurrency))
+
+
+def supervise(processes: int, concurrency: int):
+    """Keep ``processes`` worker processes running until interrupted."""
+    ctx = multiprocessing.get_context("spawn")
+    stopping = False
+
+    def start(index: int) -> multiprocessing.Process:
+        proc = ctx.Process(target=_process_main, args=(concurrency,), name=f"worker-{index}")
+        proc.start()
+        return proc
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    workers: List[multiprocessing.Process] = [start(i) for i in range(processes)]
+    logger.info(f"Started {processes} worker process(es), {concurrency} job(s) each")
+
+    while not stopping:
+        time.sleep(1)
+        for i, proc in enumerate(workers):
+            if not proc.is_alive() and not stopping:
+                logger.warning(f"{proc.name} exited with code {proc.exitcode}; restarting")
+                workers[i] = start(i)
+
+    for proc in workers:
+        if proc.is_alive():
+            proc.terminate()
+    for proc in workers:
+        proc.join()
+    logger.info("All worker processes stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run pipeline worker processes")
+    parser.add_argument("-p", "--processes", type=int, default=settings.WORKER_PROCESSES)
+    parser.add_argument("-c", "--concurrency", type=int, default=settings.WORKER_CONCURRENCY,
+                        help="Pipelines each process runs at once")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _process_main(args.concurrency)
+    else:
+        supervise(args.processes, args.concurrency)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
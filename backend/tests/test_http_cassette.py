@@ -0,0 +1,41 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+
+from app.config import settings
+from app.services.http_cassette import RecordingTransport, cassette_path
+from app.services.replay_server import ReplayConfig, create_replay_app
+
+BODY = {"tasks": [{"result": [{"keyword": "running shoes", "search_volume": 1000}]}]}
+
+
+def _gzip_upstream(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(
+        200,
+        headers={"content-type": "application/json", "content-encoding": "gzip"},
+        content=gzip.compress(json.dumps(BODY).encode()),
+    )
+
+
+def test_gzip_response_records_and_replays(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_CASSETTE_DIR", str(tmp_path))
+
+    async def exchange():
+        url = "https://api.example.com/v3/keywords"
+        transport = RecordingTransport("dataforseo", httpx.MockTransport(_gzip_upstream))
+        async with httpx.AsyncClient(transport=transport) as client:
+            recorded = await client.post(url, json={"keywords": ["running shoes"]})
+
+        app = create_replay_app("dataforseo", cassette_path("dataforseo"), ReplayConfig(latency="none"))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app)) as client:
+            replayed = await client.post(url, json={"keywords": ["running shoes"]})
+        return recorded, replayed
+
+    recorded, replayed = asyncio.run(exchange())
+
+    assert recorded.json() == BODY
+    assert "content-encoding" not in recorded.headers
+    assert replayed.status_code == 200
+    assert replayed.json() == BODY
@@ -32,6 +32,9 @@ export function usePipeline() {
         } else if (status.status === 'failed') {
           setError('Pipeline failed. Check agent details for errors.');
           clearInterval(interval);
+        } else if (status.status === 'cancelled') {
+          setError('Pipeline cancelled.');
+          clearInterval(interval);
         }
       } catch {
         // Will retry on next interval
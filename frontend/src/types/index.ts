@@ -16,6 +16,7 @@ export interface ProjectConfig {
   market: string;
   competitor_urls: string[];
   project_folder?: string;
+  markets?: string[];
 }
 
 export interface Project {
@@ -29,7 +30,7 @@ export interface Project {
 
 export interface AgentProgress {
   agent: string;
-  status: 'pending' | 'running' | 'completed' | 'failed' | 'skipped';
+  status: 'pending' | 'running' | 'completed' | 'failed' | 'skipped' | 'cancelled';
   progress: number;
   message: string;
   timestamp?: string;